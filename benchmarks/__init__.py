@@ -0,0 +1,6 @@
+"""
+    benchmarks
+    ~~~~~~~~~~
+
+    Contains benchmark scripts for measuring probot performance.
+"""
@@ -0,0 +1,84 @@
+"""
+    benchmarks/decode
+    ~~~~~~~~~~~~~~~~~
+
+    Compares the available JSON codecs on webhook bodies of different sizes.
+
+    By default each codec decodes the bodies directly. With `--adapters`, signed deliveries are
+    instead sent through every installed adapter once per codec (as `benchmarks.pipeline` does)
+    with one handler registered, so the end-to-end saving of each codec over the standard
+    library `json` module (the behaviour before codecs were pluggable) is reported per adapter.
+
+    Usage: python -m benchmarks.decode [--number N] [--adapters [--requests N]]
+"""
+import argparse
+import statistics
+import timeit
+
+from probot import codec, models
+
+from . import payloads, pipeline
+
+
+def decode(args: argparse.Namespace) -> None:
+    """
+    Report the time each codec takes to decode each body.
+    """
+    print(f'{"event":<14}{"size":<8}{"bytes":>10}  ' + ''.join(f'{name:>12}' for name in codec.DECODERS))
+    for event, size, body in payloads.corpus():
+        timings = []
+        for decoder in codec.DECODERS.values():
+            best = min(timeit.repeat(lambda: decoder(body), number=args.number, repeat=args.repeat))
+            timings.append(best / args.number * 1e6)
+        print(f'{event:<14}{size:<8}{len(body):>10}  ' + ''.join(f'{t:>10.1f}us' for t in timings))
+
+
+def adapters(args: argparse.Namespace) -> None:
+    """
+    Report the end-to-end p50 latency of each adapter with each codec.
+    """
+    key = pipeline.private_key()
+    names = list(codec.DECODERS)
+
+    print(f'{"adapter":<11}{"event":<14}{"size":<8}' + ''.join(f'{name + " ms":>12}' for name in names) +
+          f'{"saving":>10}')
+    for adapter in pipeline.ADAPTERS:
+        if not pipeline.is_installed(adapter):
+            print(f'{adapter:<11}skipped: framework not installed')
+            continue
+
+        for event, size, body in payloads.corpus():
+            medians = []
+            for name in names:
+                settings = models.Settings(app_id=payloads.APP_ID,
+                                           private_key=key,
+                                           webhook_secret=payloads.SECRET,
+                                           json_codec=name,
+                                           loop_monitor_interval=0)
+                probot = pipeline.create_probot(adapter, settings, event, 1, False)
+                deliveries = [(payloads.headers(event, body), body) for _ in range(args.warmup + args.requests)]
+                latencies = pipeline.DRIVERS[adapter](probot, deliveries)[args.warmup:]
+                medians.append(statistics.median(latencies))
+
+            saving = 1 - min(medians) / medians[0]
+            print(f'{adapter:<11}{event:<14}{size:<8}' + ''.join(f'{m * 1e3:>12.3f}' for m in medians) +
+                  f'{saving:>10.1%}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark JSON decoding of webhook bodies')
+    parser.add_argument('--number', type=int, default=200, help='Decodes per measurement')
+    parser.add_argument('--repeat', type=int, default=5, help='Measurements per codec; best is reported')
+    parser.add_argument('--adapters', action='store_true', help='Measure end to end through every adapter')
+    parser.add_argument('--requests', type=int, default=200, help='Measured deliveries per adapter and codec')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured deliveries per adapter and codec')
+    args = parser.parse_args()
+
+    if args.adapters:
+        adapters(args)
+    else:
+        decode(args)
+
+
+if __name__ == '__main__':
+    main()
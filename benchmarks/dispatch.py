@@ -0,0 +1,164 @@
+"""
+    benchmarks/dispatch
+    ~~~~~~~~~~~~~~~~~~~
+
+    Micro-benchmarks for the CPU-only parts of the webhook request path, with regression checks.
+
+    Measures signature verification, request parsing (decode + event creation), handler and
+    middleware lookup, context creation (the GitHub client is lazy and never resolved) and
+    response wrapping for deliveries ranging from a ping to a huge push.
+
+    Results are compared against a JSON baseline; the run exits non-zero when any case is slower
+    than its baseline by more than `--threshold` percent, or when there is no baseline to compare
+    against. Baselines are machine specific so none is committed; record one with `--save` on the
+    machine the checks run on.
+
+    Usage: python -m benchmarks.dispatch [--save] [--baseline PATH] [--threshold PCT]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+from probot import auth, models
+from probot.wsgi import app
+
+from . import payloads
+
+# Default location of the recorded baseline.
+BASELINE = os.path.join(os.path.dirname(__file__), 'dispatch-baseline.json')
+
+# Deliveries measured: (case name, event name, payload factory).
+CASES: List[Tuple[str, str, Callable[[], dict]]] = [
+    ('ping', 'ping', payloads.ping),
+    ('pull_request-medium', 'pull_request', lambda: payloads.pull_request(payloads.SIZES['medium'])),
+    ('push-small', 'push', lambda: payloads.push(payloads.SIZES['small'])),
+    ('push-large', 'push', lambda: payloads.push(payloads.SIZES['large'])),
+    ('push-huge', 'push', lambda: payloads.push(4 * payloads.SIZES['large']))
+]
+
+
+def create_app() -> app.App:
+    """
+    Create an unconfigured WSGI app with a few handlers/middleware registered for every case.
+
+    :return: App
+    """
+    instance = app.App(adapter=None)
+    instance.register_global_middleware(lambda context: None)
+    for _, event, _ in CASES:
+        instance.register_event_middleware(models.new_id(event), lambda context: None)
+        for _ in range(3):
+            instance.register_handler(models.new_id(event), lambda context: None)
+    return instance
+
+
+def measure(function: Callable[[], object], repeat: int) -> float:
+    """
+    Measure the best per-call time of the given function.
+
+    :param function: Function to time
+    :param repeat: Number of measurements; the fastest is kept
+    :return: Seconds per call
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(repeat: int) -> Dict[str, float]:
+    """
+    Run every micro-benchmark.
+
+    :param repeat: Measurements per benchmark
+    :return: Microseconds per call keyed by '<path>/<case>'
+    """
+    instance = create_app()
+    signature = auth.WebhookSignature(payloads.SECRET)
+    results = {}
+
+    for case, event_name, factory in CASES:
+        body = payloads.encode(factory())
+        headers = models.Headers(payloads.headers(event_name, body))
+
+        def new_request() -> models.Request:
+            return models.Request(method='POST', body_raw=body, headers=headers)
+
+        request = new_request()
+        event = instance.parse_request(new_request())
+        response = models.Response(status_code=202)
+
+        paths = {
+            'verify_request_signature': lambda: instance.verify_request_signature(request, signature),
+            'parse_request': lambda: instance.parse_request(new_request()),
+            'handlers_for_event': lambda: instance.handlers_for_event(event),
+            'middleware_for_event': lambda: instance.middleware_for_event(event),
+            'create_context': lambda: instance.create_context(event, None),
+            'wrap_response': lambda: (instance.wrap_response(None), instance.wrap_response(response))
+        }
+        for path, function in paths.items():
+            results[f'{path}/{case}'] = measure(function, repeat) * 1e6
+
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """
+    Find cases that regressed past the threshold.
+
+    :param results: Current microseconds per call
+    :param baseline: Baseline microseconds per call
+    :param threshold: Allowed slowdown in percent
+    :return: Names of regressed cases
+    """
+    return [name for name, value in results.items()
+            if name in baseline and value > baseline[name] * (1 + threshold / 100)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Micro-benchmark the webhook dispatch path')
+    parser.add_argument('--baseline', default=BASELINE, help='Path of the JSON baseline')
+    parser.add_argument('--save', action='store_true', help='Record the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=20.0, help='Allowed slowdown in percent')
+    parser.add_argument('--repeat', type=int, default=5, help='Measurements per benchmark; best is kept')
+    args = parser.parse_args()
+
+    if not args.save and not os.path.exists(args.baseline):
+        sys.exit(f'No baseline at {args.baseline}; record one on this machine with --save first')
+
+    results = run(args.repeat)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(f'{"benchmark":<48}{"us/call":>12}{"baseline":>12}{"change":>10}')
+    for name, value in results.items():
+        if name in baseline:
+            change = (value / baseline[name] - 1) * 100
+            print(f'{name:<48}{value:>12.2f}{baseline[name]:>12.2f}{change:>+9.1f}%')
+        else:
+            print(f'{name:<48}{value:>12.2f}{"-":>12}{"-":>10}')
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f'Saved baseline to {args.baseline}')
+        return
+
+    missing = [name for name in results if name not in baseline]
+    if missing:
+        print(f'Missing from the baseline, re-record it with --save: {", ".join(missing)}')
+        sys.exit(1)
+
+    regressed = compare(results, baseline, args.threshold)
+    if regressed:
+        print(f'Regressed more than {args.threshold:g}%: {", ".join(regressed)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
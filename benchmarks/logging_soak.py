@@ -0,0 +1,118 @@
+"""
+    benchmarks/logging_soak
+    ~~~~~~~~~~~~~~~~~~~~~~~
+
+    Soak test showing per-event logging keeps memory flat across many deliveries.
+
+    Creates a context logger for each of millions of synthetic deliveries, logs through it,
+    and reports traced memory and the number of loggers known to the logging manager at
+    regular checkpoints. The soak runs once with fully materialised `ghwht` events (the
+    default) and once with lazy payload views. With `--legacy`, a child logger is created
+    per delivery instead, which is what happens when a logger name contains anything unique
+    to the delivery.
+
+    The first checkpoint is treated as warm-up. The soak exits non-zero when more shared event
+    loggers exist than event names, or when traced memory grows by more than `--max-growth`
+    KiB after warm-up, which is the expected outcome with `--legacy`.
+
+    Usage: python -m benchmarks.logging_soak [--deliveries N] [--kinds ghwht,views] [--max-growth KiB] [--legacy]
+"""
+import argparse
+import gc
+import logging
+import sys
+import time
+import tracemalloc
+import uuid
+from typing import List
+
+from probot import log, models, views
+
+from . import payloads
+
+# Event factories soaked, keyed by the name of the event representation.
+FACTORIES = {
+    'ghwht': models.new_event,
+    'views': views.new_event
+}
+
+
+def soak(kind: str, deliveries: int, checkpoints: int, legacy: bool, max_growth: float) -> List[str]:
+    """
+    Log through a context logger for each of `deliveries` events of the given kind.
+
+    :param kind: Event representation to soak ('ghwht' or 'views')
+    :param deliveries: Deliveries to simulate
+    :param checkpoints: Number of progress reports
+    :param legacy: Create a child logger per delivery
+    :param max_growth: Traced memory growth in KiB allowed after the first checkpoint
+    :return: Failed checks
+    """
+    factory = FACTORIES[kind]
+    events = []
+    for name, builder in payloads.BUILDERS.items():
+        payload = builder(payloads.SIZES['small'])
+        events.append((name, payload.pop('action', None), payload))
+
+    every = max(deliveries // checkpoints, 1)
+    baseline = None
+    current = 0
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    for i in range(1, deliveries + 1):
+        name, action, payload = events[i % len(events)]
+        delivery_id = uuid.uuid4()
+        event = factory(delivery_id, name, 1, action, payload)
+
+        if legacy:
+            logger = log.get_logger(f'{event.id}.{delivery_id}')
+        else:
+            logger = log.get_event_log(event)
+        logger.info('Processing delivery')
+
+        if i % every == 0:
+            # Event models leave reference cycles behind, measure what is actually retained.
+            gc.collect()
+            current, _ = tracemalloc.get_traced_memory()
+            elapsed = time.perf_counter() - started
+            loggers = len(logging.Logger.manager.loggerDict)
+            print(f'{kind:<8}{i:>12}{current / 1024:>14.0f}{loggers:>10}{elapsed / i * 1e6:>14.2f}')
+            if baseline is None:
+                baseline = current
+
+    tracemalloc.stop()
+
+    failures = []
+    if len(log.EVENT_LOGGERS) > len(payloads.BUILDERS):
+        failures.append(f'{kind}: {len(log.EVENT_LOGGERS)} event loggers for {len(payloads.BUILDERS)} event names')
+    growth = (current - (baseline or current)) / 1024
+    if growth > max_growth:
+        failures.append(f'{kind}: traced memory grew by {growth:.0f} KiB after warm-up (limit {max_growth:.0f} KiB)')
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Soak test per-event logging memory')
+    parser.add_argument('--deliveries', type=int, default=1_000_000, help='Deliveries to simulate per kind')
+    parser.add_argument('--checkpoints', type=int, default=10, help='Number of progress reports per kind')
+    parser.add_argument('--kinds', default=','.join(FACTORIES), help='Comma separated event kinds to soak')
+    parser.add_argument('--max-growth', type=float, default=256, help='Traced KiB allowed to grow after warm-up')
+    parser.add_argument('--legacy', action='store_true', help='Create a child logger per delivery')
+    args = parser.parse_args()
+
+    log.LOG.addHandler(logging.NullHandler())
+    log.LOG.setLevel(logging.INFO)
+    log.LOG.propagate = False
+
+    print(f'{"kind":<8}{"deliveries":>12}{"traced KiB":>14}{"loggers":>10}{"us/delivery":>14}')
+    failures = []
+    for kind in args.kinds.split(','):
+        failures.extend(soak(kind, args.deliveries, args.checkpoints, args.legacy, args.max_growth))
+
+    if failures:
+        sys.exit('\n'.join(failures))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+    benchmarks/memory
+    ~~~~~~~~~~~~~~~~~
+
+    Compares memory held per in-flight event for fully materialised `ghwht` events and
+    lazily materialised payload views.
+
+    A batch of events is built from each payload and kept alive, as if waiting on handlers,
+    while typical handler fields are read from each one.
+
+    Payloads come from recordings of real deliveries (`probot.capture` files or JSONL, see
+    `probot.replay`) when given; one representative (largest) payload per event name is measured.
+    Without recordings, the synthetic `push` and `pull_request` corpus is used, which only
+    approximates the shape of real payloads.
+
+    Usage: python -m benchmarks.memory [--events N] [--recordings capture.gz ...]
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+import uuid
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import ghwht
+
+from probot import replay, views
+
+from . import payloads
+
+# Dotted payload paths a typical handler reads.
+ACCESSED = ('installation.id', 'repository.full_name', 'sender.login')
+
+
+def build(factory: Callable, event: str, body: bytes, count: int) -> Tuple[List, int, int]:
+    """
+    Build `count` events from the given body and measure what they keep alive.
+
+    :param factory: Event factory (`ghwht.new_event` or `views.new_event`)
+    :param event: Event name
+    :param body: Raw payload
+    :param count: Number of events to keep in flight
+    :return: Events, bytes allocated and gc tracked objects created
+    """
+    gc.collect()
+    objects_before = len(gc.get_objects())
+    tracemalloc.start()
+
+    events = []
+    for _ in range(count):
+        payload = json.loads(body)
+        action = payload.pop('action', None)
+        instance = factory(uuid.uuid4(), event, 1, action, payload)
+        for path in ACCESSED:
+            instance.payload.get(path)
+        events.append(instance)
+
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    return events, allocated, len(gc.get_objects()) - objects_before
+
+
+def recorded(paths: Iterable[str]) -> List[Tuple[str, str, bytes]]:
+    """
+    Pick the largest recorded payload of each event name.
+
+    :param paths: Paths of capture files or JSONL recordings
+    :return: List of (event name, size label, body)
+    """
+    largest: Dict[str, bytes] = {}
+    for path in paths:
+        for delivery in replay.read_deliveries(path):
+            event = delivery.headers.get('X-GitHub-Event') or delivery.headers.get('x-github-event')
+            if event and len(delivery.body) > len(largest.get(event, b'')):
+                largest[event] = delivery.body
+    return [(event, 'recorded', body) for event, body in sorted(largest.items())]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark memory held per in-flight event')
+    parser.add_argument('--events', type=int, default=50, help='Events kept in flight per measurement')
+    parser.add_argument('--size', default='large', choices=sorted(payloads.SIZES), help='Synthetic payload size')
+    parser.add_argument('--recordings', nargs='*', default=(), help='Capture files/JSONL of real deliveries')
+    args = parser.parse_args()
+
+    corpus = recorded(args.recordings) if args.recordings else list(payloads.corpus(sizes=(args.size,)))
+
+    factories = {
+        'ghwht': ghwht.new_event,
+        'views': views.new_event
+    }
+
+    print(f'{"event":<28}{"size":<10}{"KiB":>8}{"repr":>8}{"KiB/event":>12}{"objects/event":>16}')
+    for event, size, body in corpus:
+        for name, factory in factories.items():
+            events, allocated, objects = build(factory, event, body, args.events)
+            print(f'{event:<28}{size:<10}{len(body) / 1024:>8.0f}{name:>8}'
+                  f'{allocated / len(events) / 1024:>12.1f}{objects / len(events):>16.0f}')
+            del events
+
+
+if __name__ == '__main__':
+    main()
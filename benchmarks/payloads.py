@@ -0,0 +1,270 @@
+"""
+    benchmarks/payloads
+    ~~~~~~~~~~~~~~~~~~~
+
+    Contains a synthetic corpus of realistic GitHub webhook payloads used by benchmarks.
+"""
+import hashlib
+import hmac
+import json
+import random
+import uuid
+from typing import Any, Dict, Iterator, Tuple
+
+# Approximate payload sizes (bytes) benchmarks are run against.
+SIZES = {
+    'small': 2 * 1024,
+    'medium': 25 * 1024,
+    'large': 250 * 1024
+}
+
+# Webhook secret used to sign synthetic payloads.
+SECRET = 'benchmark-secret'
+
+# GitHub App id synthetic deliveries target.
+APP_ID = '1'
+
+
+def user(rng: random.Random) -> Dict[str, Any]:
+    """
+    Create a synthetic GitHub user object.
+
+    :param rng: Random number generator
+    :return: User payload
+    """
+    user_id = rng.randint(1, 10_000_000)
+    login = f'user{user_id}'
+    return {
+        'login': login,
+        'id': user_id,
+        'node_id': f'MDQ6VXNlcj{user_id}',
+        'avatar_url': f'https://avatars.githubusercontent.com/u/{user_id}?v=4',
+        'url': f'https://api.github.com/users/{login}',
+        'html_url': f'https://github.com/{login}',
+        'type': 'User',
+        'site_admin': False
+    }
+
+
+def repository(rng: random.Random) -> Dict[str, Any]:
+    """
+    Create a synthetic GitHub repository object.
+
+    :param rng: Random number generator
+    :return: Repository payload
+    """
+    owner = user(rng)
+    name = f'repo-{rng.randint(1, 100_000)}'
+    full_name = f'{owner["login"]}/{name}'
+    return {
+        'id': rng.randint(1, 100_000_000),
+        'name': name,
+        'full_name': full_name,
+        'private': False,
+        'owner': owner,
+        'html_url': f'https://github.com/{full_name}',
+        'description': 'Synthetic repository used for benchmarking',
+        'fork': False,
+        'url': f'https://api.github.com/repos/{full_name}',
+        'created_at': '2020-01-01T00:00:00Z',
+        'updated_at': '2020-06-01T00:00:00Z',
+        'pushed_at': '2020-06-01T00:00:00Z',
+        'default_branch': 'master',
+        'stargazers_count': rng.randint(0, 5000),
+        'watchers_count': rng.randint(0, 5000),
+        'forks_count': rng.randint(0, 500),
+        'open_issues_count': rng.randint(0, 200),
+        'topics': ['python', 'github', 'bots']
+    }
+
+
+def commit(rng: random.Random, full_name: str) -> Dict[str, Any]:
+    """
+    Create a synthetic commit object as found in push payloads.
+
+    :param rng: Random number generator
+    :param full_name: Full name of the repository the commit belongs to
+    :return: Commit payload
+    """
+    sha = hashlib.sha1(str(rng.random()).encode('utf-8')).hexdigest()
+    author = {'name': 'Bench Mark', 'email': 'bench@example.com', 'username': 'benchmark'}
+    return {
+        'id': sha,
+        'tree_id': hashlib.sha1(sha.encode('utf-8')).hexdigest(),
+        'distinct': True,
+        'message': 'Synthetic commit message\n\n' + ' '.join('lorem' for _ in range(rng.randint(5, 40))),
+        'timestamp': '2020-06-01T00:00:00Z',
+        'url': f'https://github.com/{full_name}/commit/{sha}',
+        'author': author,
+        'committer': author,
+        'added': [f'src/added_{i}.py' for i in range(rng.randint(0, 5))],
+        'removed': [],
+        'modified': [f'src/module_{i}.py' for i in range(rng.randint(1, 10))]
+    }
+
+
+def push(size: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Create a synthetic push payload of roughly the given size.
+
+    :param size: Approximate encoded size in bytes
+    :param seed: Random seed
+    :return: Push payload
+    """
+    rng = random.Random(seed)
+    repo = repository(rng)
+    payload = {
+        'ref': 'refs/heads/master',
+        'before': '0' * 40,
+        'after': '1' * 40,
+        'repository': repo,
+        'pusher': {'name': 'benchmark', 'email': 'bench@example.com'},
+        'sender': user(rng),
+        'installation': {'id': 1, 'node_id': 'MDIzOkludGVncmF0aW9uSW5zdGFsbGF0aW9uMQ=='},
+        'created': False,
+        'deleted': False,
+        'forced': False,
+        'commits': []
+    }
+    while len(json.dumps(payload)) < size:
+        payload['commits'].append(commit(rng, repo['full_name']))
+    payload['head_commit'] = payload['commits'][-1] if payload['commits'] else None
+    return payload
+
+
+def pull_request(size: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Create a synthetic pull_request payload of roughly the given size.
+
+    :param size: Approximate encoded size in bytes
+    :param seed: Random seed
+    :return: Pull request payload
+    """
+    rng = random.Random(seed)
+    repo = repository(rng)
+    number = rng.randint(1, 5000)
+    payload = {
+        'action': 'opened',
+        'number': number,
+        'pull_request': {
+            'url': f'{repo["url"]}/pulls/{number}',
+            'id': rng.randint(1, 100_000_000),
+            'number': number,
+            'state': 'open',
+            'locked': False,
+            'title': 'Synthetic pull request',
+            'user': user(rng),
+            'body': '',
+            'labels': [],
+            'requested_reviewers': [],
+            'head': {'ref': 'feature', 'sha': '2' * 40, 'repo': repo},
+            'base': {'ref': 'master', 'sha': '3' * 40, 'repo': repo},
+            'merged': False,
+            'commits': rng.randint(1, 20),
+            'additions': rng.randint(1, 1000),
+            'deletions': rng.randint(1, 1000),
+            'changed_files': rng.randint(1, 50)
+        },
+        'repository': repo,
+        'sender': user(rng),
+        'installation': {'id': 1, 'node_id': 'MDIzOkludGVncmF0aW9uSW5zdGFsbGF0aW9uMQ=='}
+    }
+    pr = payload['pull_request']
+    while len(json.dumps(payload)) < size:
+        pr['labels'].append({'id': rng.randint(1, 10_000_000), 'name': f'label-{len(pr["labels"])}',
+                             'color': 'ededed', 'default': False})
+        pr['requested_reviewers'].append(user(rng))
+        pr['body'] += 'Synthetic description line for benchmarking.\n' * 4
+    return payload
+
+
+def ping(seed: int = 0) -> Dict[str, Any]:
+    """
+    Create a synthetic ping payload, sent when a webhook is first configured.
+
+    :param seed: Random seed
+    :return: Ping payload
+    """
+    rng = random.Random(seed)
+    return {
+        'zen': 'Keep it logically awesome.',
+        'hook_id': rng.randint(1, 100_000_000),
+        'hook': {'type': 'App', 'id': 1, 'active': True, 'events': ['push', 'pull_request'],
+                 'config': {'content_type': 'json', 'insecure_ssl': '0', 'url': 'https://example.com/'}},
+        'sender': user(rng),
+        'installation': {'id': 1, 'node_id': 'MDIzOkludGVncmF0aW9uSW5zdGFsbGF0aW9uMQ=='}
+    }
+
+
+# Payload builders keyed by event name.
+BUILDERS = {
+    'push': push,
+    'pull_request': pull_request
+}
+
+
+def encode(payload: Dict[str, Any]) -> bytes:
+    """
+    Encode the given payload as GitHub does.
+
+    :param payload: Payload
+    :return: Raw JSON body
+    """
+    return json.dumps(payload).encode('utf-8')
+
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    """
+    Create the `X-Hub-Signature` header value for the given body.
+
+    :param body: Raw body
+    :param secret: Webhook secret
+    :return: Signature header value
+    """
+    return 'sha1=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha1).hexdigest()
+
+
+def sign_256(body: bytes, secret: str = SECRET) -> str:
+    """
+    Create the `X-Hub-Signature-256` header value for the given body.
+
+    :param body: Raw body
+    :param secret: Webhook secret
+    :return: Signature header value
+    """
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+
+def headers(event: str, body: bytes, secret: str = SECRET, app_id: str = APP_ID) -> Dict[str, str]:
+    """
+    Create signed webhook delivery headers for the given event and body.
+
+    :param event: Event name
+    :param body: Raw body
+    :param secret: Webhook secret
+    :param app_id: Id of the GitHub App the delivery targets
+    :return: Headers
+    """
+    return {
+        'Content-Type': 'application/json',
+        'X-GitHub-Event': event,
+        'X-GitHub-Delivery': str(uuid.uuid4()),
+        'X-GitHub-Hook-ID': '1',
+        'X-GitHub-Hook-Installation-Target-ID': app_id,
+        'X-GitHub-Hook-Installation-Target-Type': 'integration',
+        'X-Hub-Signature': sign(body, secret),
+        'X-Hub-Signature-256': sign_256(body, secret)
+    }
+
+
+def corpus(events=tuple(BUILDERS), sizes=tuple(SIZES)) -> Iterator[Tuple[str, str, bytes]]:
+    """
+    Iterate encoded payloads for every combination of event and size.
+
+    :param events: Event names to include
+    :param sizes: Size names to include
+    :return: Iterator of (event name, size name, raw body)
+    """
+    for event in events:
+        for size in sizes:
+            yield event, size, encode(BUILDERS[event](SIZES[size]))
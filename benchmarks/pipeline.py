@@ -0,0 +1,271 @@
+"""
+    benchmarks/pipeline
+    ~~~~~~~~~~~~~~~~~~~
+
+    Benchmarks the full webhook pipeline of every adapter in-process.
+
+    Signed deliveries from the synthetic payload corpus are sent through each framework's
+    test client (Bottle has none, so its WSGI callable is driven directly). Requests/sec and
+    p50/p99 latency are reported by adapter, event, payload size and number of handlers.
+    The GitHub API is served by a local fake so results are reproducible offline.
+
+    Usage: python -m benchmarks.pipeline [--adapters aiohttp,flask] [--requests N] [--api] [--api-latency S]
+"""
+import argparse
+import asyncio
+import importlib
+import inspect
+import io
+import statistics
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+from wsgiref import util
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from probot import defaults, fakegithub, models
+
+from . import payloads
+
+# Adapters that can be benchmarked and whether their handlers are async.
+ADAPTERS = {
+    'aiohttp': True,
+    'starlette': True,
+    'fastapi': True,
+    'flask': False,
+    'bottle': False
+}
+
+# Type alias for a list of (headers, body) deliveries to send.
+Deliveries = List[Tuple[Dict[str, str], bytes]]
+
+
+def private_key() -> str:
+    """
+    Generate a throwaway GitHub App private key.
+
+    :return: PEM encoded private key
+    """
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend())
+    return key.private_bytes(serialization.Encoding.PEM,
+                             serialization.PrivateFormat.TraditionalOpenSSL,
+                             serialization.NoEncryption()).decode('utf-8')
+
+
+def new_handler(is_async: bool, api: bool) -> Callable:
+    """
+    Create a new event handler function.
+
+    A new function is created each time so registering several of them runs each one.
+    Async handlers make the blocking API call in a thread, as real ASGI handlers should, so
+    they do not stall the event loop the WSGI figures are compared against.
+
+    :param is_async: Create an async handler for ASGI adapters
+    :param api: Fetch the event repository from the (fake) GitHub API
+    :return: Handler
+    """
+    if is_async:
+        async def handler(context):
+            if api:
+                github = await context.github_async()
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, github.get_repo, context.event.payload.get('repository.full_name'))
+        return handler
+
+    def handler(context):
+        if api:
+            context.github.get_repo(context.event.payload.get('repository.full_name'))
+    return handler
+
+
+def create_probot(adapter: str, settings: models.Settings, event: str, handlers: int, api: bool):
+    """
+    Create a probot for the given adapter with `handlers` handlers registered for `event`.
+
+    :param adapter: Adapter name
+    :param settings: Probot settings
+    :param event: Event name to handle
+    :param handlers: Number of handlers to register
+    :param api: Whether handlers call the GitHub API
+    :return: Probot
+    """
+    module = importlib.import_module(f'probot.{"asgi" if ADAPTERS[adapter] else "wsgi"}.{adapter}')
+    framework = {
+        'aiohttp': lambda: importlib.import_module('aiohttp.web').Application(),
+        'starlette': lambda: importlib.import_module('starlette.applications').Starlette(),
+        'fastapi': lambda: importlib.import_module('fastapi').FastAPI(),
+        'flask': lambda: importlib.import_module('flask').Flask('benchmark'),
+        'bottle': lambda: importlib.import_module('bottle').Bottle()
+    }[adapter]()
+
+    probot = module.Probot(framework, settings)
+    for _ in range(handlers):
+        probot.on(event)(new_handler(ADAPTERS[adapter], api))
+    return probot
+
+
+def is_installed(adapter: str) -> bool:
+    """
+    Check if the web framework for the given adapter is installed.
+
+    :param adapter: Adapter name
+    :return: True if installed, False otherwise
+    """
+    try:
+        importlib.import_module(adapter)
+    except ImportError:
+        return False
+    return True
+
+
+def drive_aiohttp(probot, deliveries: Deliveries) -> List[float]:
+    """
+    Send deliveries through the aiohttp test client.
+    """
+    test_utils = importlib.import_module('aiohttp.test_utils')
+
+    async def run() -> List[float]:
+        async with test_utils.TestClient(test_utils.TestServer(probot.app.adapter.app)) as client:
+            latencies = []
+            for headers, body in deliveries:
+                started = time.perf_counter()
+                response = await client.post(defaults.PATH, data=body, headers=headers)
+                await response.read()
+                latencies.append(time.perf_counter() - started)
+                check(response.status)
+            return latencies
+
+    return asyncio.run(run())
+
+
+def drive_starlette(probot, deliveries: Deliveries) -> List[float]:
+    """
+    Send deliveries through the Starlette test client (also used for FastAPI).
+    """
+    testclient = importlib.import_module('starlette.testclient')
+    with testclient.TestClient(probot.app.adapter.app) as client:
+        body_arg = 'content' if 'content' in inspect.signature(client.post).parameters else 'data'
+        latencies = []
+        for headers, body in deliveries:
+            started = time.perf_counter()
+            response = client.post(defaults.PATH, headers=headers, **{body_arg: body})
+            latencies.append(time.perf_counter() - started)
+            check(response.status_code)
+        return latencies
+
+
+def drive_flask(probot, deliveries: Deliveries) -> List[float]:
+    """
+    Send deliveries through the Flask test client.
+    """
+    client = probot.app.adapter.app.test_client()
+    latencies = []
+    for headers, body in deliveries:
+        started = time.perf_counter()
+        response = client.post(defaults.PATH, data=body, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        check(response.status_code)
+    return latencies
+
+
+def drive_wsgi(probot, deliveries: Deliveries) -> List[float]:
+    """
+    Send deliveries by calling the WSGI application directly.
+    """
+    app = probot.app.adapter.app
+    latencies = []
+    for headers, body in deliveries:
+        environ = {
+            'REQUEST_METHOD': 'POST',
+            'PATH_INFO': defaults.PATH,
+            'CONTENT_LENGTH': str(len(body)),
+            'CONTENT_TYPE': headers['Content-Type'],
+            'wsgi.input': io.BytesIO(body)
+        }
+        for name, value in headers.items():
+            environ['HTTP_' + name.upper().replace('-', '_')] = value
+        util.setup_testing_defaults(environ)
+
+        status = []
+        started = time.perf_counter()
+        b''.join(app(environ, lambda s, h, exc_info=None: status.append(s)))
+        latencies.append(time.perf_counter() - started)
+        check(int(status[0].split()[0]))
+    return latencies
+
+
+# Functions driving deliveries through each adapter, keyed by adapter name.
+DRIVERS = {
+    'aiohttp': drive_aiohttp,
+    'starlette': drive_starlette,
+    'fastapi': drive_starlette,
+    'flask': drive_flask,
+    'bottle': drive_wsgi
+}
+
+
+def check(status: int) -> None:
+    """
+    Fail loudly if a delivery was not handled successfully.
+    """
+    if status >= 300:
+        raise RuntimeError(f'Delivery failed with HTTP {status}')
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """
+    Get the given percentile of the values.
+
+    :param values: Values
+    :param pct: Percentile (0-100)
+    :return: Percentile value
+    """
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the webhook pipeline of every adapter')
+    parser.add_argument('--adapters', default=','.join(ADAPTERS), help='Comma separated adapters to run')
+    parser.add_argument('--events', default=','.join(payloads.BUILDERS), help='Comma separated events')
+    parser.add_argument('--sizes', default=','.join(payloads.SIZES), help='Comma separated payload sizes')
+    parser.add_argument('--handlers', default='0,1,5', help='Comma separated handler counts')
+    parser.add_argument('--requests', type=int, default=200, help='Measured deliveries per case')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured deliveries per case')
+    parser.add_argument('--api', action='store_true', help='Handlers fetch the repository from the fake API')
+    parser.add_argument('--api-latency', type=float, default=0.0, help='Seconds the fake API takes to respond')
+    args = parser.parse_args()
+
+    key = private_key()
+
+    with fakegithub.FakeGitHub(latency=args.api_latency) as github:
+        settings = models.Settings(app_id=payloads.APP_ID,
+                                   private_key=key,
+                                   webhook_secret=payloads.SECRET,
+                                   github_base_url=github.url,
+                                   loop_monitor_interval=0)
+
+        print(f'{"adapter":<11}{"event":<14}{"size":<8}{"handlers":>9}{"rps":>10}{"p50 ms":>10}{"p99 ms":>10}')
+        for adapter in args.adapters.split(','):
+            if not is_installed(adapter):
+                print(f'{adapter:<11}skipped: framework not installed')
+                continue
+
+            for event in args.events.split(','):
+                for size in args.sizes.split(','):
+                    body = payloads.encode(payloads.BUILDERS[event](payloads.SIZES[size]))
+                    for handlers in (int(count) for count in args.handlers.split(',')):
+                        probot = create_probot(adapter, settings, event, handlers, args.api)
+                        deliveries = [(payloads.headers(event, body), body)
+                                      for _ in range(args.warmup + args.requests)]
+                        latencies = DRIVERS[adapter](probot, deliveries)[args.warmup:]
+                        rps = len(latencies) / sum(latencies)
+                        print(f'{adapter:<11}{event:<14}{size:<8}{handlers:>9}{rps:>10.0f}'
+                              f'{statistics.median(latencies) * 1e3:>10.2f}{percentile(latencies, 99) * 1e3:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+    benchmarks/signature
+    ~~~~~~~~~~~~~~~~~~~~
+
+    Measures webhook signature verification cost against body size.
+
+    Compares building a new HMAC from the secret per request (the previous behaviour) with
+    copying the precomputed keyed state, for both SHA-1 and SHA-256 signatures.
+
+    Usage: python -m benchmarks.signature [--number N]
+"""
+import argparse
+import hashlib
+import hmac
+import timeit
+
+from probot import auth
+
+from . import payloads
+
+# Body sizes (bytes) to measure.
+SIZES = (256, 1024, 8 * 1024, 64 * 1024, 512 * 1024, 4 * 1024 * 1024)
+
+
+def verify_legacy(headers, body: bytes) -> bool:
+    """
+    Verify the legacy `X-Hub-Signature` header by building a new HMAC from the secret.
+    """
+    algorithm, digest = headers['X-Hub-Signature'].split('=')
+    obj = hmac.new(key=payloads.SECRET.encode('utf-8'), msg=body, digestmod=algorithm)
+    return hmac.compare_digest(digest, obj.hexdigest())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark webhook signature verification')
+    parser.add_argument('--number', type=int, default=200, help='Verifications per measurement')
+    parser.add_argument('--repeat', type=int, default=5, help='Measurements per case; best is reported')
+    args = parser.parse_args()
+
+    signature = auth.WebhookSignature(payloads.SECRET)
+
+    cases = {
+        'legacy sha1': lambda headers, body: verify_legacy(headers, body),
+        'keyed sha1': lambda headers, body: signature.verify({'X-Hub-Signature': headers['X-Hub-Signature']}, body),
+        'keyed sha256': lambda headers, body: signature.verify(headers, body),
+        'keyed sha256 mv': lambda headers, body: signature.verify(headers, memoryview(body))
+    }
+
+    print(f'{"bytes":>10}  ' + ''.join(f'{name:>18}' for name in cases))
+    for size in SIZES:
+        body = hashlib.sha256(b'probot').digest() * (size // 32)
+        headers = payloads.headers('push', body)
+        timings = []
+        for case in cases.values():
+            assert case(headers, body)
+            best = min(timeit.repeat(lambda: case(headers, body), number=args.number, repeat=args.repeat))
+            timings.append(best / args.number * 1e6)
+        print(f'{len(body):>10}  ' + ''.join(f'{t:>16.2f}us' for t in timings))
+
+
+if __name__ == '__main__':
+    main()
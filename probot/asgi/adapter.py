@@ -5,9 +5,10 @@
     Contains abstract ASGI (async) adapter.
 """
 import abc
-from typing import Awaitable, Callable, TypeVar
+import hmac
+from typing import AsyncIterable, Awaitable, Callable, List, Mapping, Optional, Tuple, TypeVar
 
-from .. import models
+from .. import errors, models
 from ..hints import LifecycleEventHandlerResponse, ProbotAsyncHandler, ProbotAsyncLifecycleEventHandler
 from .. import base
 
@@ -27,6 +28,16 @@ class Adapter(base.Adapter[base.AdapterAppT, base.AdapterRequestT, base.AdapterR
         """
         raise NotImplementedError('Must be implemented by derived class')
 
+    @abc.abstractmethod
+    def register_metrics(self, path: str) -> None:
+        """
+        Register a GET route exposing process metrics in the Prometheus text format.
+
+        :param path: URL path to serve metrics on
+        :return: Nothing
+        """
+        raise NotImplementedError('Must be implemented by derived class')
+
     @abc.abstractmethod
     def register_lifecycle_event(self,
                                  event: models.LifecycleEvent,
@@ -61,6 +72,70 @@ class Adapter(base.Adapter[base.AdapterAppT, base.AdapterRequestT, base.AdapterR
         """
         raise NotImplementedError('Must be implemented by derived class')
 
+    @staticmethod
+    def parse_content_length(value: Optional[str]) -> Optional[int]:
+        """
+        Parse the value of a `Content-Length` header.
+
+        If the value is not a non-negative integer, raise an HTTP 400 Bad Request exception.
+
+        :param value: Header value, if sent
+        :return: Declared body size, or None if not sent
+        """
+        if not value:
+            return None
+        try:
+            content_length = int(value)
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            raise errors.HTTPException(400, 'Invalid Content-Length header')
+        return content_length
+
+    async def read_body(self,
+                        headers: Mapping[str, str],
+                        content_length: Optional[int],
+                        chunks: AsyncIterable[bytes]) -> Tuple[bytes, bool]:
+        """
+        Read a request body as it streams in, feeding each chunk into the webhook signature HMAC.
+
+        Bodies larger than `max_body_size` raise an HTTP 413 Payload Too Large exception as soon as
+        the declared or received size goes over the limit. Missing or invalid signatures raise an
+        HTTP 401 Unauthorized exception before the body is handed to the app.
+
+        :param headers: Request headers
+        :param content_length: Declared body size, if known
+        :param chunks: Body chunks as they are received
+        :return: Body and whether its signature was verified
+        """
+        self.check_body_size(content_length)
+
+        obj = None
+        digest = None
+        if self.webhook_signature:
+            signature = self.webhook_signature.select(headers)
+            if signature is None:
+                raise errors.HTTPException(401, 'Missing webhook signature')
+            algorithm, digest = signature
+            try:
+                obj = self.webhook_signature.new(algorithm)
+            except ValueError:
+                raise errors.HTTPException(401, 'Invalid webhook signature') from None
+
+        size = 0
+        body: List[bytes] = []
+        async for chunk in chunks:
+            size += len(chunk)
+            self.check_body_size(size)
+            if obj:
+                obj.update(chunk)
+            body.append(chunk)
+
+        if obj and not hmac.compare_digest(digest, obj.hexdigest()):
+            raise errors.HTTPException(401, 'Invalid webhook signature')
+
+        return b''.join(body), obj is not None
+
     @abc.abstractmethod
     def translate_response(self, response: models.Response) -> base.AdapterResponseT:
         """
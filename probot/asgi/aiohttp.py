@@ -8,7 +8,7 @@ from typing import Awaitable, Callable
 
 from aiohttp import web
 
-from .. import base, models
+from .. import base, defaults, errors, metrics, models
 from ..hints import LifecycleEventHandlerResponse, ProbotAsyncHandler, ProbotAsyncLifecycleEventHandler
 from . import adapter, app
 
@@ -30,6 +30,18 @@ class Adapter(adapter.Adapter[AdapterApp, AdapterRequest, AdapterResponse]):
         """
         self.app.add_routes([web.post(self.path, self.translate(handler))])
 
+    def register_metrics(self, path: str) -> None:
+        """
+        Register a GET route exposing process metrics in the Prometheus text format.
+
+        :param path: URL path to serve metrics on
+        :return: Nothing
+        """
+        async def metrics_view(_request: AdapterRequest) -> AdapterResponse:
+            return web.Response(body=self.render_metrics().encode('utf-8'),
+                                headers={'Content-Type': metrics.CONTENT_TYPE})
+        self.app.add_routes([web.get(path, metrics_view)])
+
     def register_lifecycle_event(self,
                                  event: models.LifecycleEvent,
                                  handler: ProbotAsyncLifecycleEventHandler) -> None:
@@ -40,8 +52,10 @@ class Adapter(adapter.Adapter[AdapterApp, AdapterRequest, AdapterResponse]):
         :param handler: Handler function to be called for the given lifecycle event
         :return: Nothing
         """
-        self.app.on_startup.append(self.translate_lifecycle_event(event, handler))
-        self.app.on_shutdown.append(self.translate_lifecycle_event(event, handler))
+        if event == models.LifecycleEvent.Startup:
+            self.app.on_startup.append(self.translate_lifecycle_event(event, handler))
+        else:
+            self.app.on_shutdown.append(self.translate_lifecycle_event(event, handler))
 
     @staticmethod
     def translate_lifecycle_event(
@@ -68,29 +82,36 @@ class Adapter(adapter.Adapter[AdapterApp, AdapterRequest, AdapterResponse]):
         :return: Response to return
         """
         async def wrapper(request: AdapterRequest) -> AdapterResponse:
-            native_request = await self.translate_request(request)
-            response = await handler(native_request)
-            return await self.translate_response(response)
+            try:
+                native_request = await self.translate_request(request)
+                response = await handler(native_request)
+            except errors.HTTPException as ex:
+                response = self.translate_exception(ex)
+            return await self.translate_response(self.observe_response(response))
         return wrapper
 
     async def translate_request(self, request: AdapterRequest) -> models.Request:
         """
         Translate a AIOHTTP request into a probot request.
 
+        The body is verified against the webhook signature as it streams in.
+
         :param request: AIOHTTP request
         :return: Probot request
         """
-        body = await request.read()
-        json = await request.json()
+        body, verified = await self.read_body(request.headers,
+                                              request.content_length,
+                                              request.content.iter_chunked(defaults.BODY_CHUNK_SIZE))
 
         # TODO: Translate query/headers to proper structure.
 
         return models.Request(
             method=request.method,
             body_raw=body,
-            body_json=json,
             query=request.query,
-            headers=request.headers
+            headers=request.headers,
+            decoder=self.json_decoder,
+            verified=verified
         )
 
     async def translate_response(self, response: models.Response) -> AdapterResponse:
@@ -4,17 +4,45 @@
 
     Contains HTTP application for use with ASGI (async) adapters.
 """
+import asyncio
 import inspect
+import time
+from typing import Iterable, List, Optional
 
-from .. import base, errors, models
+from .. import base, defaults, errors, instrument, log, models
 from ..hints import AsyncEventHandler, AsyncEventMiddleware
-from . import adapter
+from . import adapter, monitor, workers
+
+LOG = log.get_logger(__name__)
 
 
 class App(base.App[adapter.ASGIAdapterT, AsyncEventHandler]):
     """
     App for ASGI (async) adapters.
     """
+    def __init__(self, adapter: adapter.ASGIAdapterT) -> None:
+        super().__init__(adapter)
+        self.loop_monitor = None
+        self.prefetch_token = defaults.PREFETCH_TOKEN
+        self.workers: Optional[workers.WorkerPool] = None
+        self.spool_replay: Optional[asyncio.Task] = None
+
+    def configure(self, settings: models.Settings) -> None:
+        """
+        Configure this app using probot settings.
+
+        :param settings: Settings to use
+        :return: Nothing
+        """
+        super().configure(settings)
+        self.prefetch_token = settings.prefetch_token
+        if settings.loop_monitor_interval > 0:
+            self.loop_monitor = monitor.LoopMonitor(settings.loop_monitor_interval)
+        if settings.background_workers > 0:
+            self.workers = workers.WorkerPool(self.process_event,
+                                              settings.background_workers,
+                                              settings.background_queue_size)
+
     async def on_lifecycle_event(self, event: models.LifecycleEvent) -> None:
         """
         Handler function called for each lifecycle event.
@@ -25,9 +53,29 @@ class App(base.App[adapter.ASGIAdapterT, AsyncEventHandler]):
         :param event: Lifecycle event to handle
         :return: Nothing
         """
+        if self.loop_monitor and event == models.LifecycleEvent.Startup:
+            self.loop_monitor.start()
+        if self.workers and event == models.LifecycleEvent.Startup:
+            self.workers.start()
+        if self.spool and event == models.LifecycleEvent.Startup:
+            self.spool_replay = asyncio.get_event_loop().create_task(self.replay_spool())
+
         for handler in self.handlers_for_lifecycle_event(event):
             await handler(event)
 
+        if self.spool_replay and event == models.LifecycleEvent.Shutdown:
+            self.spool_replay.cancel()
+            await asyncio.gather(self.spool_replay, return_exceptions=True)
+            self.spool_replay = None
+        if self.workers and event == models.LifecycleEvent.Shutdown:
+            await self.workers.stop()
+        if self.spool and event == models.LifecycleEvent.Shutdown:
+            self.spool.close()
+        if self.capture and event == models.LifecycleEvent.Shutdown:
+            self.capture.close()
+        if self.loop_monitor and event == models.LifecycleEvent.Shutdown:
+            await self.loop_monitor.stop()
+
     async def on_request(self, request: models.Request) -> models.Response:
         """
         Handler function called for each webhook event.
@@ -36,21 +84,148 @@ class App(base.App[adapter.ASGIAdapterT, AsyncEventHandler]):
         content into the appropriate models and invoke all handlers registered
         for the specific GitHub event/action id.
 
+        When background workers are configured, the event is queued and a 202 Accepted
+        response is returned without waiting for the handlers.
+
+        Events with no registered middleware/handlers are acknowledged with a 200 OK from
+        their headers alone, without decoding the payload.
+
+        When duplicate detection is configured, deliveries whose id was already seen are
+        dropped before any parsing or context creation. Ids are only remembered once the
+        delivery was processed (or queued) without a server error.
+
+        When capturing is configured, sampled verified deliveries are written to capture
+        files in the background for later replay.
+
+        When a spool is configured, the verified delivery is durably recorded first so it
+        can be replayed on startup if the process dies before it is processed.
+
         :param request: Request to handle
         :return: Response
         """
         # Verify the webhook request; return 401 when invalid.
-        self.verify_request(request, self.app_id, self.webhook_secret)
+        started = time.perf_counter() if self.recorder else 0.0
+        self.verify_request(request, self.app_id, self.webhook_signature)
+        if self.recorder:
+            self.record_phase(instrument.VERIFY, started, event_name=request.headers.get('X-GitHub-Event', ''))
+
+        # Hand the verified delivery to the capture writer; this never blocks.
+        if self.capture:
+            self.capture.record(request)
+
+        # Skip events nothing is registered for without decoding the payload.
+        if not self.is_handled_request(request):
+            return base.UNHANDLED
 
+        # Drop redeliveries of webhooks we've already seen; return 200 so GitHub stops retrying.
+        if self.is_duplicate_request(request):
+            return base.DUPLICATE
+
+        # Durably record the verified delivery before acknowledging it.
+        spool_key = await asyncio.wrap_future(self.spool.append(request)) if self.spool else None
+
+        response = await self.dispatch_request(request, spool_key)
+
+        # Remember the delivery id now it has been handled, unless it failed and should be redelivered.
+        self.record_delivery(request, response)
+
+        return response
+
+    async def dispatch_request(self,
+                                request: models.Request,
+                                spool_key: Optional[int] = None) -> models.Response:
+        """
+        Parse the given verified request and process (or queue) the resulting event.
+
+        :param request: Verified request to dispatch
+        :param spool_key: Spool key of the delivery, if spooled
+        :return: Response
+        """
         # Parse request body into event of appropriate type based on event name/action.
+        started = time.perf_counter() if self.recorder else 0.0
         event = self.parse_request(request)
+        if self.recorder:
+            self.record_phase(instrument.PARSE, started, event)
+
+        # Skip actions nothing is registered for before creating a context.
+        if not self.is_handled_event(event):
+            if spool_key is not None:
+                self.spool.done(spool_key)
+            return base.UNHANDLED
+
+        # Acknowledge the event immediately and process it in the background when configured.
+        if self.workers:
+            response = self.workers.acknowledge(event, spool_key)
+            # The sender is told to retry a rejected event, so don't also replay it from the spool.
+            if response.status_code >= 500 and spool_key is not None:
+                self.spool.done(spool_key)
+            return response
+
+        return await self.process_event(event, spool_key)
+
+    async def process_event(self,
+                            event: models.EventT,
+                            spool_key: Optional[int] = None) -> models.Response:
+        """
+        Create the context for the given event and run all registered middleware and handlers.
 
+        A spooled delivery is marked done once processed, whatever the response. A handler
+        that failed would most likely fail again on replay, and replaying would repeat the
+        side effects of any handlers that succeeded; only deliveries interrupted by the
+        process dying are replayed.
+
+        :param event: Event to process
+        :param spool_key: Spool key of the delivery, if spooled
+        :return: Response
+        """
         # Wrap event into Context instance that providers clean interface/helpers to
         # user defined event handler functions.
-        context = self.create_context(event, self.app_id, self.private_key)
+        started = time.perf_counter() if self.recorder else 0.0
+        context = self.create_context(event, self.signer, self.github_base_url)
+        if self.recorder:
+            self.record_phase(instrument.CREATE_CONTEXT, started, event)
 
         # Process all registered event handlers for the current event/context.
-        return await self.on_event(context)
+        response = await self.on_event(context)
+
+        # Remove the delivery from the spool now that it has been processed, even if it failed.
+        if spool_key is not None:
+            self.spool.done(spool_key)
+
+        return response
+
+    async def replay_spool(self) -> None:
+        """
+        Dispatch deliveries left in the spool by a previous run that never finished processing.
+
+        This runs as a background task started on startup so it doesn't hold up readiness;
+        anything not replayed before shutdown stays in the spool for the next run.
+
+        :return: Nothing
+        """
+        loop = asyncio.get_event_loop()
+        entries = await loop.run_in_executor(None, lambda: list(self.spool.pending()))
+        for entry in entries:
+            LOG.info('Replaying spooled delivery %s', entry.delivery_id)
+            try:
+                await self.dispatch_request(entry.to_request(), entry.key)
+            except Exception:
+                LOG.exception('Failed to replay spooled delivery %s', entry.delivery_id)
+
+    async def authenticate(self, context: models.Context) -> None:
+        """
+        Authenticate the context GitHub client without blocking the event loop.
+
+        When the installation access token is already cached, the client resolves from the
+        cache; otherwise the token fetch is run in the default executor.
+
+        :param context: Context to authenticate
+        :return: Nothing
+        """
+        started = time.perf_counter() if self.recorder else 0.0
+        await context.github_async()
+        if self.recorder:
+            self.record_phase(instrument.AUTHENTICATE, started, context.event)
 
     async def on_event(self, context: models.Context) -> models.Response:
         """
@@ -68,38 +243,79 @@ class App(base.App[adapter.ASGIAdapterT, AsyncEventHandler]):
 
         If no handler functions return a response, this will default to returning a 200 OK response.
 
+        Handlers run concurrently when `handler_concurrency` is configured greater than one.
+
+        When `prefetch_token` is configured (the default), the installation access token is
+        fetched off the event loop before middleware runs, so plain `context.github` use never
+        blocks on it; events nothing is registered for never fetch one. Otherwise the client is
+        authenticated lazily and middleware/handlers should `await context.github_async()`.
+
         :param context: Context to pass to all event handlers
         :return: Response based on handlers
         """
-        response = models.Response(status_code=200)
+        response = models.OK
+        middleware = self.middleware_for_event(context.event)
+        handlers = self.handlers_for_event(context.event)
 
-        for middleware in self.middleware_for_event(context.event):
-            middleware_response = await self.process_middleware(middleware, context)
-            if middleware_response:
+        if self.prefetch_token and (middleware or handlers):
+            await self.authenticate(context)
+
+        for function in middleware:
+            middleware_response = await self.process_middleware(function, context)
+            if middleware_response is not None:
                 return middleware_response
 
-        for handler in self.handlers_for_event(context.event):
-            handler_response = await self.process_handler(handler, context)
+        for handler_response in await self.process_handlers(handlers, context):
             if handler_response.status_code >= response.status_code:
                 response = handler_response
 
         return response
 
+    async def process_handlers(self,
+                               handlers: Iterable[AsyncEventHandler],
+                               context: models.Context) -> List[models.Response]:
+        """
+        Run the given handlers with the given context.
+
+        When `handler_concurrency` is greater than one, handlers run concurrently with at most
+        that many in flight at once; otherwise they run one after another. Responses are returned
+        in handler order either way.
+
+        :param handlers: Handlers to run
+        :param context: Context to use
+        :return: Responses
+        """
+        if self.handler_concurrency <= 1:
+            return [await self.process_handler(handler, context) for handler in handlers]
+
+        semaphore = asyncio.Semaphore(self.handler_concurrency)
+
+        async def process(handler: AsyncEventHandler) -> models.Response:
+            async with semaphore:
+                return await self.process_handler(handler, context)
+
+        return await asyncio.gather(*(process(handler) for handler in handlers))
+
     async def process_middleware(self,
                                  middleware: AsyncEventMiddleware,
-                                 context: models.Context) -> models.Response:
+                                 context: models.Context) -> Optional[models.Response]:
         """
         Run the given middleware with the given context.
 
         :param middleware: Middleware to run
         :param context: Context to use
-        :return: Response
+        :return: Response to stop processing with, or None to continue
         """
+        started = time.perf_counter() if self.recorder else 0.0
         try:
-            return self.wrap_response(await middleware(context))
+            return await middleware(context)
         except Exception as ex:
+            base.ERRORS.labels('middleware').inc()
             return models.Response(content=str(ex),
                                    status_code=500)
+        finally:
+            if self.recorder:
+                self.record_phase(instrument.MIDDLEWARE, started, context.event, middleware)
 
     async def process_handler(self,
                               handler: AsyncEventHandler,
@@ -113,11 +329,16 @@ class App(base.App[adapter.ASGIAdapterT, AsyncEventHandler]):
         :param context: Context to use
         :return: Response
         """
+        started = time.perf_counter() if self.recorder else 0.0
         try:
             return self.wrap_response(await handler(context))
         except Exception as ex:
+            base.ERRORS.labels('handler').inc()
             return models.Response(content=str(ex),
                                    status_code=500)
+        finally:
+            if self.recorder:
+                self.record_phase(instrument.HANDLER, started, context.event, handler)
 
     def validate_middleware(self, middleware: AsyncEventMiddleware) -> None:
         """
@@ -0,0 +1,81 @@
+"""
+    probot/asgi/monitor
+    ~~~~~~~~~~~~~~~~~~~
+
+    Contains event loop responsiveness monitoring for ASGI apps.
+"""
+import asyncio
+from typing import Optional
+
+from .. import metrics
+
+LOOP_LAG = metrics.REGISTRY.histogram(
+    'probot_event_loop_lag_seconds',
+    'Delay between when an event loop probe was scheduled to wake and when it actually ran.'
+)
+LOOP_LAG_MAX = metrics.REGISTRY.gauge(
+    'probot_event_loop_lag_max_seconds',
+    'Largest event loop delay observed since startup.'
+)
+
+
+class LoopMonitor:
+    """
+    Measures how long the event loop is stalled by blocking work.
+
+    A probe task sleeps for `interval` seconds and records how late it woke up. Any
+    blocking call made on the loop shows up directly as lag.
+    """
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Start probing the running event loop.
+
+        :return: Nothing
+        """
+        if self._task is None:
+            self._task = asyncio.get_event_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Stop probing the event loop.
+
+        :return: Nothing
+        """
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run(self) -> None:
+        """
+        Probe the event loop until cancelled.
+
+        :return: Nothing
+        """
+        loop = asyncio.get_event_loop()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(loop.time() - scheduled, 0.0))
+
+    def record(self, lag: float) -> None:
+        """
+        Record an observed event loop lag.
+
+        :param lag: Seconds the probe woke up late
+        :return: Nothing
+        """
+        LOOP_LAG.observe(lag)
+        if lag > self.max_lag:
+            self.max_lag = lag
+            LOOP_LAG_MAX.set(lag)
@@ -8,7 +8,7 @@ from typing import Awaitable, Callable
 
 from starlette import applications, requests, responses
 
-from .. import base, models
+from .. import base, errors, metrics, models
 from ..hints import LifecycleEventHandlerResponse, ProbotAsyncHandler, ProbotAsyncLifecycleEventHandler
 from . import adapter, app
 
@@ -30,6 +30,17 @@ class Adapter(adapter.Adapter[AdapterApp, AdapterRequest, AdapterResponse]):
         """
         self.app.router.route(self.path, self.methods)(self.translate(handler))
 
+    def register_metrics(self, path: str) -> None:
+        """
+        Register a GET route exposing process metrics in the Prometheus text format.
+
+        :param path: URL path to serve metrics on
+        :return: Nothing
+        """
+        async def metrics_view(_request: AdapterRequest) -> AdapterResponse:
+            return responses.Response(content=self.render_metrics(), media_type=metrics.CONTENT_TYPE)
+        self.app.router.route(path, ['GET'])(metrics_view)
+
     def register_lifecycle_event(self,
                                  event: models.LifecycleEvent,
                                  handler: ProbotAsyncLifecycleEventHandler) -> None:
@@ -67,29 +78,35 @@ class Adapter(adapter.Adapter[AdapterApp, AdapterRequest, AdapterResponse]):
         :return: Response to return
         """
         async def wrapper(request: AdapterRequest) -> AdapterResponse:
-            native_request = await self.translate_request(request)
-            response = await handler(native_request)
-            return await self.translate_response(response)
+            try:
+                native_request = await self.translate_request(request)
+                response = await handler(native_request)
+            except errors.HTTPException as ex:
+                response = self.translate_exception(ex)
+            return await self.translate_response(self.observe_response(response))
         return wrapper
 
     async def translate_request(self, request: AdapterRequest) -> models.Request:
         """
         Translate a Starlette request into a probot request.
 
+        The body is verified against the webhook signature as it streams in.
+
         :param request: Starlette request
         :return: Probot request
         """
-        body = await request.body()
-        json = await request.json()
+        content_length = self.parse_content_length(request.headers.get('content-length'))
+        body, verified = await self.read_body(request.headers, content_length, request.stream())
 
         # TODO: Translate query/headers to proper structure.
 
         return models.Request(
             method=request.method,
             body_raw=body,
-            body_json=json,
             query=request.query_params,
-            headers=request.headers
+            headers=request.headers,
+            decoder=self.json_decoder,
+            verified=verified
         )
 
     async def translate_response(self, response: models.Response) -> AdapterResponse:
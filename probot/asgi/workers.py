@@ -0,0 +1,92 @@
+"""
+    probot/asgi/workers
+    ~~~~~~~~~~~~~~~~~~~
+
+    Contains the asyncio worker pool that processes acknowledged events in the background.
+"""
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+
+from .. import log, models, workers
+
+LOG = log.get_logger(__name__)
+
+
+class WorkerPool:
+    """
+    Pool of asyncio tasks processing events from a bounded queue.
+    """
+    def __init__(self,
+                 process: Callable[[models.EventT, Optional[int]], Awaitable[models.Response]],
+                 size: int,
+                 queue_size: int) -> None:
+        self.process = process
+        self.size = size
+        self.queue_size = queue_size
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """
+        Start the worker tasks on the running event loop.
+
+        :return: Nothing
+        """
+        if self.queue is not None:
+            return
+
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        loop = asyncio.get_event_loop()
+        self.tasks = [loop.create_task(self.run()) for _ in range(self.size)]
+
+    async def stop(self) -> None:
+        """
+        Wait for queued events to be processed, then stop the worker tasks.
+
+        :return: Nothing
+        """
+        if self.queue is None:
+            return
+
+        await self.queue.join()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.queue = None
+        self.tasks = []
+
+    def acknowledge(self,
+                    event: models.EventT,
+                    spool_key: Optional[int] = None) -> models.Response:
+        """
+        Queue the given event for background processing.
+
+        :param event: Event to process
+        :param spool_key: Spool key of the delivery, if spooled
+        :return: 202 Accepted response if the event was queued, 503 if the queue is full
+        """
+        self.start()
+        # Count the event before queueing it so a worker can never dequeue it first.
+        workers.QUEUE_DEPTH.inc()
+        try:
+            self.queue.put_nowait(workers.QueuedEvent(event, spool_key))
+        except asyncio.QueueFull:
+            workers.QUEUE_DEPTH.dec()
+            return workers.rejected()
+        return workers.ACCEPTED
+
+    async def run(self) -> None:
+        """
+        Process queued events until cancelled.
+
+        :return: Nothing
+        """
+        while True:
+            queued = await self.queue.get()
+            try:
+                queued.dequeued()
+                await self.process(queued.event, queued.spool_key)
+            except Exception:
+                LOG.exception('Background processing of event %s failed', queued.event.id)
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,448 @@
+"""
+    probot/auth
+    ~~~~~~~~~~~
+
+    Contains functionality for authenticating as a GitHub App.
+"""
+import calendar
+import datetime
+import hmac
+import threading
+import time
+from typing import Callable, Dict, Hashable, Mapping, Optional, Tuple, Union
+
+import jwt
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from github import (BadCredentialsException, Consts, GithubException, GithubIntegration, InstallationAuthorization,
+                    UnknownObjectException)
+
+from . import defaults, errors, log, metrics, pool
+
+LOG = log.get_logger(__name__)
+
+# Lifetime of an installation access token when GitHub does not tell us.
+DEFAULT_TOKEN_TTL = 3600
+
+
+class AppJWT:
+    """
+    Signs and caches the JSON Web Token used to authenticate as a GitHub App.
+
+    The PEM private key is parsed once and the signed token is reused until it gets
+    within `refresh_margin` seconds of expiring.
+    """
+    def __init__(self,
+                 app_id: str,
+                 private_key: str,
+                 ttl: float = defaults.APP_JWT_TTL,
+                 clock_drift: float = defaults.APP_JWT_CLOCK_DRIFT,
+                 refresh_margin: float = defaults.APP_JWT_REFRESH_MARGIN,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.app_id = app_id
+        self.ttl = ttl
+        self.clock_drift = clock_drift
+        self.refresh_margin = refresh_margin
+        self.clock = clock
+        self.key = load_private_key(private_key)
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def token(self) -> str:
+        """
+        Get a signed app JWT, signing a new one if the cached one is about to expire.
+        """
+        if self.clock() < self._expires_at - self.refresh_margin:
+            return self._token
+
+        with self._lock:
+            now = self.clock()
+            if now >= self._expires_at - self.refresh_margin:
+                self._token, self._expires_at = self.sign(now)
+            return self._token
+
+    def sign(self, now: float) -> Tuple[str, float]:
+        """
+        Sign a new app JWT.
+
+        :param now: Current unix timestamp
+        :return: Token and the time it expires
+        """
+        issued_at = int(now - self.clock_drift)
+        expires_at = issued_at + int(self.ttl)
+        payload = {'iat': issued_at, 'exp': expires_at, 'iss': self.app_id}
+
+        token = jwt.encode(payload, key=self.key, algorithm='RS256')
+        if isinstance(token, bytes):
+            token = token.decode('utf-8')
+        return token, expires_at
+
+
+def load_private_key(private_key: str):
+    """
+    Parse the given PEM encoded GitHub App private key.
+
+    If the key cannot be parsed, a SettingsException is raised.
+
+    :param private_key: PEM encoded private key
+    :return: Private key
+    """
+    try:
+        return serialization.load_pem_private_key(private_key.encode('utf-8'),
+                                                  password=None,
+                                                  backend=default_backend())
+    except (TypeError, ValueError) as ex:
+        raise errors.SettingsException('Invalid GitHub App private key') from ex
+
+
+class Integration(GithubIntegration):
+    """
+    GitHub App integration that authenticates with a shared, cached app JWT.
+    """
+    def __init__(self,
+                 signer: AppJWT,
+                 base_url: str = defaults.GITHUB_BASE_URL) -> None:
+        super().__init__(signer.app_id, None)
+        self.signer = signer
+        self.base_url = base_url
+
+    def create_jwt(self, *args, **kwargs) -> str:
+        """
+        Get the cached app JWT instead of signing a new one.
+
+        :return: App JWT
+        """
+        return self.signer.token
+
+    def get_access_token(self,
+                         installation_id: int,
+                         user_id: Optional[int] = None) -> InstallationAuthorization.InstallationAuthorization:
+        """
+        Mint an installation access token over the shared connection pool.
+
+        :param installation_id: ID of the installation to mint a token for
+        :param user_id: Optional ID of the user to mint a token for
+        :return: Installation authorization
+        """
+        response = pool.POOL.session.post(
+            f'{self.base_url}/app/installations/{installation_id}/access_tokens',
+            headers={
+                'Authorization': f'Bearer {self.create_jwt()}',
+                'Accept': Consts.mediaTypeIntegrationPreview,
+                'User-Agent': 'PyGithub/Python'
+            },
+            json={'user_id': user_id} if user_id else {},
+            timeout=defaults.HTTP_TIMEOUT
+        )
+        pool.GITHUB_REQUESTS.labels('POST', str(response.status_code)).inc()
+
+        if response.status_code == 201:
+            return InstallationAuthorization.InstallationAuthorization(
+                requester=None,
+                headers={},
+                attributes=response.json(),
+                completed=True
+            )
+        if response.status_code == 403:
+            raise BadCredentialsException(response.status_code, response.text)
+        if response.status_code == 404:
+            raise UnknownObjectException(response.status_code, response.text)
+        raise GithubException(response.status_code, response.text)
+
+
+class InstallationToken:
+    """
+    Represents an installation access token and when it expires.
+
+    A token value of `None` marks an installation that no longer has access to the app.
+    """
+    def __init__(self,
+                 token: Optional[str],
+                 expires_at: float) -> None:
+        self.token = token
+        self.expires_at = expires_at
+
+    def is_fresh(self, now: float, margin: float = 0) -> bool:
+        """
+        Check if the token is still usable at the given time.
+
+        :param now: Current unix timestamp
+        :param margin: Seconds before expiry the token should be considered stale
+        :return: True if the token can be used, False otherwise
+        """
+        return now < self.expires_at - margin
+
+
+TOKEN_CACHE_HITS = metrics.REGISTRY.counter(
+    'probot_token_cache_hits_total',
+    'Installation access token lookups served from the cache.'
+)
+TOKEN_CACHE_MISSES = metrics.REGISTRY.counter(
+    'probot_token_cache_misses_total',
+    'Installation access token lookups that minted a new token.'
+)
+
+
+# Type alias for the function that mints a new installation access token; it returns
+# the token and the time it expires, or raises a GithubException.
+TokenFetcher = Callable[[], Tuple[str, Optional[datetime.datetime]]]
+
+
+class InstallationTokenCache:
+    """
+    Process-wide cache of installation access tokens keyed by installation.
+
+    Tokens are re-minted once they get within `refresh_margin` seconds of expiring. Installations
+    that no longer have access to the app (403/404 responses) are remembered for `negative_ttl` seconds
+    so repeated events for them don't each pay a round trip to GitHub. Expired tokens (and the locks
+    of installations without a token) are purged when tokens are minted, at most once every
+    `prune_interval` seconds, so the cache only holds installations seen within the token lifetime.
+    """
+    #: Minimum seconds between purges of expired tokens.
+    prune_interval = 60.0
+
+    def __init__(self,
+                 refresh_margin: float = defaults.TOKEN_REFRESH_MARGIN,
+                 negative_ttl: float = defaults.TOKEN_NEGATIVE_TTL,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.refresh_margin = refresh_margin
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._tokens: Dict[Hashable, InstallationToken] = {}
+        self._locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+
+    def get(self,
+            key: Hashable,
+            fetch: TokenFetcher) -> Optional[str]:
+        """
+        Get the access token for the given installation, minting a new one when needed.
+
+        Only one caller mints a token for a given key at a time; concurrent callers wait
+        for it and share the result.
+
+        :param key: Key identifying the installation (API base URL, app id, installation id)
+        :param fetch: Function to mint a new token on a cache miss
+        :return: Token, or None if the installation no longer has access to the app
+        """
+        cached = self.lookup(key)
+        if cached:
+            self._count(hit=True)
+            return cached.token
+
+        with self._lock_for(key):
+            cached = self.lookup(key)
+            if cached:
+                self._count(hit=True)
+                return cached.token
+
+            self._count(hit=False)
+            entry = self._fetch(key, fetch)
+            self._tokens[key] = entry
+
+        self._prune()
+        return entry.token
+
+    def lookup(self, key: Hashable) -> Optional[InstallationToken]:
+        """
+        Get the cached token for the given installation if it is still fresh.
+
+        :param key: Key identifying the installation
+        :return: Cached token or None on a cache miss
+        """
+        entry = self._tokens.get(key)
+        if entry is None:
+            return None
+
+        margin = self.refresh_margin if entry.token else 0
+        if not entry.is_fresh(self.clock(), margin):
+            return None
+        return entry
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Remove the cached token for the given installation.
+
+        :param key: Key identifying the installation
+        :return: Nothing
+        """
+        self._tokens.pop(key, None)
+
+    def hit_ratio(self) -> float:
+        """
+        Get the fraction of token lookups served from the cache.
+
+        :return: Hit ratio, or zero before any lookups
+        """
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return hits / total if total else 0.0
+
+    def clear(self) -> None:
+        """
+        Remove all cached tokens.
+
+        :return: Nothing
+        """
+        self._tokens.clear()
+
+    def _fetch(self,
+               key: Hashable,
+               fetch: TokenFetcher) -> InstallationToken:
+        """
+        Mint a new token and compute when it expires.
+
+        :param key: Key identifying the installation
+        :param fetch: Function to mint a new token
+        :return: Token
+        """
+        now = self.clock()
+
+        try:
+            token, expires_at = fetch()
+        except GithubException as ex:
+            if ex.status not in (403, 404):
+                raise ex
+
+            LOG.warning('Installation %s no longer has access to app', key)
+            return InstallationToken(None, now + self.negative_ttl)
+
+        if expires_at is None:
+            return InstallationToken(token, now + DEFAULT_TOKEN_TTL)
+        return InstallationToken(token, calendar.timegm(expires_at.utctimetuple()))
+
+    def _count(self, hit: bool) -> None:
+        """
+        Count a cache hit or miss.
+
+        :param hit: True for a hit, False for a miss
+        :return: Nothing
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if hit:
+            TOKEN_CACHE_HITS.inc()
+        else:
+            TOKEN_CACHE_MISSES.inc()
+
+    def _prune(self) -> None:
+        """
+        Remove expired tokens, and locks no longer guarding a token, unless pruned recently.
+
+        :return: Nothing
+        """
+        now = self.clock()
+        with self._lock:
+            if now < self._next_prune:
+                return
+            self._next_prune = now + self.prune_interval
+
+            for key, entry in list(self._tokens.items()):
+                # Skip entries replaced by a concurrent mint since the snapshot.
+                if not entry.is_fresh(now) and self._tokens.get(key) is entry:
+                    del self._tokens[key]
+            # A caller holding a pruned lock it hasn't acquired yet may mint alongside one using a new
+            # lock; that only costs an extra mint.
+            for key, lock in list(self._locks.items()):
+                if key not in self._tokens and not lock.locked():
+                    del self._locks[key]
+
+    def _lock_for(self, key: Hashable) -> threading.Lock:
+        """
+        Get the lock that serializes token minting for the given installation.
+
+        :param key: Key identifying the installation
+        :return: Lock
+        """
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+
+# Webhook signature headers and their digest algorithm, in order of preference.
+SIGNATURE_HEADERS = (
+    ('X-Hub-Signature-256', 'sha256'),
+    ('X-Hub-Signature', 'sha1')
+)
+
+
+class WebhookSignature:
+    """
+    Verifies the HMAC signatures GitHub sends with each webhook delivery.
+
+    The HMAC key schedule for the webhook secret is computed once; each request starts from
+    a `copy()` of that keyed state instead of re-encoding the secret and building a new HMAC.
+    The SHA-256 signature is preferred, falling back to the legacy SHA-1 one.
+    """
+    def __init__(self, webhook_secret: str) -> None:
+        key = webhook_secret.encode('utf-8')
+        self._keyed = {algorithm: hmac.new(key, digestmod=algorithm) for _, algorithm in SIGNATURE_HEADERS}
+
+    def select(self, headers: Mapping[str, str]) -> Optional[Tuple[str, str]]:
+        """
+        Get the preferred signature sent with a delivery.
+
+        :param headers: Request headers
+        :return: Digest algorithm and expected hex digest, or None if the request is unsigned
+        """
+        for header, algorithm in SIGNATURE_HEADERS:
+            signature = headers.get(header)
+            if signature:
+                prefix, _, digest = signature.partition('=')
+                return prefix, digest
+        return None
+
+    def new(self, algorithm: str):
+        """
+        Get a fresh HMAC keyed with the webhook secret.
+
+        :param algorithm: Digest algorithm ('sha256' or 'sha1')
+        :return: HMAC object ready to be updated with the request body
+        """
+        try:
+            return self._keyed[algorithm].copy()
+        except KeyError:
+            raise ValueError(f'Unsupported webhook signature algorithm "{algorithm}"') from None
+
+    def verify(self,
+               headers: Mapping[str, str],
+               body: Union[bytes, bytearray, memoryview]) -> bool:
+        """
+        Check the given request body matches the signature in its headers.
+
+        :param headers: Request headers
+        :param body: Raw request body
+        :return: True if the signature is present and valid, False otherwise
+        """
+        signature = self.select(headers)
+        if signature is None:
+            return False
+
+        algorithm, digest = signature
+        try:
+            obj = self.new(algorithm)
+        except ValueError:
+            return False
+
+        obj.update(body)
+        return hmac.compare_digest(digest, obj.hexdigest())
+
+
+# Process-wide installation access token cache.
+TOKEN_CACHE = InstallationTokenCache()
+
+metrics.REGISTRY.gauge(
+    'probot_token_cache_hit_ratio',
+    'Fraction of installation access token lookups served from the cache.'
+).set_function(TOKEN_CACHE.hit_ratio)
@@ -5,15 +5,26 @@
     Contains abstract base types to be extended.
 """
 import abc
-import hmac
+import time
 import uuid
 from collections import defaultdict
-from typing import Callable, Dict, Generic, List, Optional, Set, Type, TypeVar
+from typing import Callable, Dict, Generic, Iterable, List, Optional, Tuple, Type, TypeVar
 
-from . import defaults, errors, github, models
+from . import auth, capture, codec, dedup, defaults, errors, github, instrument, metrics, models, pool, spool, views
 from .hints import (AdapterAppT, AdapterRequestT, AdapterResponseT, EventHandlerT,
                     EventMiddlewareT, LifecycleEventHandlerT, LifecycleEventHandlerResponse)
 
+REQUESTS = metrics.REGISTRY.counter(
+    'probot_requests_total',
+    'Webhook requests handled, by response status code.',
+    ('status',)
+)
+ERRORS = metrics.REGISTRY.counter(
+    'probot_errors_total',
+    'Exceptions raised by event middleware/handlers.',
+    ('kind',)
+)
+
 
 class Adapter(Generic[AdapterAppT, AdapterRequestT, AdapterResponseT],
               metaclass=abc.ABCMeta):
@@ -27,11 +38,62 @@ class Adapter(Generic[AdapterAppT, AdapterRequestT, AdapterResponseT],
                  path: str = defaults.PATH) -> None:
         self.app = app
         self.path = path
+        self.json_decoder: codec.Decoder = codec.loads
+        self.webhook_signature: Optional[auth.WebhookSignature] = None
+        self.max_body_size = defaults.MAX_BODY_SIZE
+
+    def check_body_size(self, size: Optional[int]) -> None:
+        """
+        Check the given request body size is within the configured limit.
+
+        If the body is too large, raise an HTTP 413 Payload Too Large exception.
+
+        :param size: Body size in bytes, or None if unknown
+        :return: Nothing
+        """
+        if size is not None and size > self.max_body_size:
+            raise errors.HTTPException(413, 'Request body too large')
+
+    @staticmethod
+    def observe_response(response: models.Response) -> models.Response:
+        """
+        Count the given webhook response by status code.
+
+        :param response: Response about to be returned
+        :return: Same response
+        """
+        REQUESTS.labels(str(response.status_code)).inc()
+        return response
+
+    @staticmethod
+    def render_metrics() -> str:
+        """
+        Render all process metrics in the Prometheus text exposition format.
+
+        :return: Exposition text
+        """
+        return metrics.REGISTRY.render()
+
+    @staticmethod
+    def translate_exception(ex: errors.HTTPException) -> models.Response:
+        """
+        Translate an HTTP exception raised while handling a request into a probot response.
+
+        :param ex: Exception to translate
+        :return: Response
+        """
+        return models.Response(status_code=ex.status_code, content=ex.detail)
 
 
 # Type alias for :class:`~probot.base.Adapter` derived classes.
 AdapterT = TypeVar('AdapterT', bound=Adapter)
 
+# Shared response for events that have no registered middleware/handlers.
+UNHANDLED = models.ImmutableResponse(status_code=200, content='Unhandled event')
+
+# Shared response for redeliveries of webhooks that were already processed.
+DUPLICATE = models.ImmutableResponse(status_code=200, content='Duplicate delivery')
+
 # Type alias for collection of event handlers keyed on event name/action.
 EventHandlerCollection = Dict[models.EventName, Dict[Optional[models.ActionT], List[EventHandlerT]]]
 
@@ -44,6 +106,15 @@ EventMiddlewareCollection = Dict[models.EventName, Dict[Optional[models.ActionT]
 # Type alias for collection of global middleware.
 GlobalMiddlewareCollection = List[EventMiddlewareT]
 
+# Type alias for compiled lookup table of event handlers keyed on event name/action.
+EventHandlerTable = Dict[models.EventName, Dict[Optional[models.ActionT], Tuple[EventHandlerT, ...]]]
+
+# Type alias for compiled lookup table of app lifecycle handlers keyed by name.
+LifecycleEventHandlerTable = Dict[models.LifecycleEvent, Tuple[LifecycleEventHandlerT, ...]]
+
+# Type alias for compiled lookup table of event middleware keyed on event name/action.
+EventMiddlewareTable = Dict[models.EventName, Dict[Optional[models.ActionT], Tuple[EventMiddlewareT, ...]]]
+
 
 class App(Generic[AdapterT, EventHandlerT],
           metaclass=abc.ABCMeta):
@@ -56,9 +127,22 @@ class App(Generic[AdapterT, EventHandlerT],
         self.lifecycle_event_handlers: LifecycleEventHandlerCollection = defaultdict(list)
         self.event_middleware: EventMiddlewareCollection = defaultdict(lambda: defaultdict(list))
         self.global_middleware: GlobalMiddlewareCollection = []
+        self.handler_table: EventHandlerTable = {}
+        self.lifecycle_event_handler_table: LifecycleEventHandlerTable = {}
+        self.event_middleware_table: EventMiddlewareTable = {}
+        self.global_middleware_table: Tuple[EventMiddlewareT, ...] = ()
         self.app_id = None
         self.private_key = None
+        self.signer = None
+        self.github_base_url = defaults.GITHUB_BASE_URL
         self.webhook_secret = None
+        self.webhook_signature: Optional[auth.WebhookSignature] = None
+        self.handler_concurrency = defaults.HANDLER_CONCURRENCY
+        self.lazy_events = False
+        self.recorder: Optional[instrument.Recorder] = None
+        self.spool: Optional[spool.Spool] = None
+        self.capture: Optional[capture.Capture] = None
+        self.delivery_cache: Optional[dedup.DeliveryCache] = None
 
     def configure(self, settings: models.Settings) -> None:
         """
@@ -69,8 +153,28 @@ class App(Generic[AdapterT, EventHandlerT],
         """
         self.app_id = settings.app_id
         self.private_key = settings.private_key
+        self.signer = auth.AppJWT(settings.app_id, settings.private_key)
+        self.github_base_url = settings.github_base_url
         self.webhook_secret = settings.webhook_secret
+        self.webhook_signature = auth.WebhookSignature(settings.webhook_secret)
+        self.handler_concurrency = settings.handler_concurrency
+        self.lazy_events = settings.lazy_events
+        if settings.phase_metrics:
+            self.recorder = instrument.HistogramRecorder()
+        self.adapter.json_decoder = codec.get_decoder(settings.json_codec)
+        self.adapter.webhook_signature = self.webhook_signature
+        self.adapter.max_body_size = settings.max_body_size
+        if settings.spool_path:
+            self.spool = spool.Spool(settings.spool_path)
+        self.capture = capture.new_capture(settings)
+        self.delivery_cache = dedup.new_delivery_cache(settings.dedup_backend,
+                                                       settings.dedup_ttl,
+                                                       settings.dedup_size,
+                                                       settings.dedup_path)
+        pool.install(settings.http_pool_size)
         self.adapter.register(self.on_request)
+        if settings.metrics_path:
+            self.adapter.register_metrics(settings.metrics_path)
         self.adapter.register_lifecycle_event(models.LifecycleEvent.Startup, self.on_lifecycle_event)
         self.adapter.register_lifecycle_event(models.LifecycleEvent.Shutdown, self.on_lifecycle_event)
 
@@ -85,6 +189,7 @@ class App(Generic[AdapterT, EventHandlerT],
         """
         self.validate_middleware(middleware)
         self.global_middleware.append(middleware)
+        self.compile_dispatch_tables()
 
     def register_event_middleware(self,
                                   event_id: models.ID,
@@ -100,6 +205,7 @@ class App(Generic[AdapterT, EventHandlerT],
         """
         self.validate_middleware(middleware)
         self.event_middleware[event_id.name][event_id.action].append(middleware)
+        self.compile_dispatch_tables()
 
     def register_lifecycle_event_handler(self,
                                          event: models.LifecycleEvent,
@@ -115,6 +221,7 @@ class App(Generic[AdapterT, EventHandlerT],
         """
         self.validate_handler(handler)
         self.lifecycle_event_handlers[event].append(handler)
+        self.compile_dispatch_tables()
 
     def register_handler(self,
                          event_id: models.ID,
@@ -130,6 +237,23 @@ class App(Generic[AdapterT, EventHandlerT],
         """
         self.validate_handler(handler)
         self.handlers[event_id.name][event_id.action].append(handler)
+        self.compile_dispatch_tables()
+
+    def compile_dispatch_tables(self) -> None:
+        """
+        Rebuild the lookup tables used to find handlers/middleware for an event.
+
+        Each event name/action maps to an ordered tuple of everything that should run for it,
+        de-duplicated in registration order, so looking them up per request is a dict hit.
+
+        :return: Nothing
+        """
+        self.global_middleware_table = unique(self.global_middleware)
+        self.event_middleware_table = compile_table(self.event_middleware, self.global_middleware)
+        self.handler_table = compile_table(self.handlers)
+        self.lifecycle_event_handler_table = {
+            event: unique(handlers) for event, handlers in self.lifecycle_event_handlers.items()
+        }
 
     @abc.abstractmethod
     def validate_middleware(self, middleware: EventMiddlewareT) -> None:
@@ -183,59 +307,110 @@ class App(Generic[AdapterT, EventHandlerT],
         """
         raise NotImplementedError('Must be implemented by derived class')
 
-    def middleware_for_event(self, event: models.EventT) -> Set[EventMiddlewareT]:
+    def middleware_for_event(self, event: models.EventT) -> Tuple[EventMiddlewareT, ...]:
         """
-        Get list of middleware that should be run for the given event.
+        Get middleware that should be run for the given event, in registration order.
 
         :param event: Event to get matching middleware for
-        :return: List of middleware
+        :return: Tuple of middleware
         """
-        event_middleware = self.event_middleware[event.id.name][None]
-        action_middleware = self.event_middleware[event.id.name][event.id.action]
-        return set(self.global_middleware + event_middleware + action_middleware)
+        actions = self.event_middleware_table.get(event.id.name)
+        if actions is None:
+            return self.global_middleware_table
+        middleware = actions.get(event.id.action)
+        return actions[None] if middleware is None else middleware
 
-    def handlers_for_event(self, event: models.EventT) -> Set[EventHandlerT]:
+    def handlers_for_event(self, event: models.EventT) -> Tuple[EventHandlerT, ...]:
         """
-        Get list of handlers that should be run for the given event.
+        Get handlers that should be run for the given event, in registration order.
 
         :param event: Event to get matching handlers for
-        :return: List of handlers
+        :return: Tuple of handlers
         """
-        event_handlers = self.handlers[event.id.name][None]
-        action_handlers = self.handlers[event.id.name][event.id.action]
-        return set(event_handlers + action_handlers)
+        actions = self.handler_table.get(event.id.name)
+        if actions is None:
+            return ()
+        handlers = actions.get(event.id.action)
+        return actions[None] if handlers is None else handlers
 
-    def handlers_for_lifecycle_event(self, event: models.LifecycleEvent) -> Set[LifecycleEventHandlerT]:
+    def handlers_for_lifecycle_event(self, event: models.LifecycleEvent) -> Tuple[LifecycleEventHandlerT, ...]:
         """
-        Get list of handlers that should be run for the given lifecycle event.
+        Get handlers that should be run for the given lifecycle event, in registration order.
 
         :param event: Event to get matching handlers for
-        :return: List of handlers
+        :return: Tuple of handlers
+        """
+        return self.lifecycle_event_handler_table.get(event, ())
+
+    def record_phase(self,
+                     phase: str,
+                     started: float,
+                     event: Optional[models.EventT] = None,
+                     function: Optional[Callable] = None,
+                     event_name: str = '') -> None:
+        """
+        Record the time since `started` against the given pipeline phase.
+
+        Callers only time phases when a recorder is attached, so this is never reached otherwise.
+
+        :param phase: Name of the phase
+        :param started: `time.perf_counter()` value when the phase started
+        :param event: Event being processed, if parsed yet
+        :param function: Middleware/handler that ran, if any
+        :param event_name: Event name to label with when the event has not been parsed yet
+        :return: Nothing
+        """
+        elapsed = time.perf_counter() - started
+        name, action = instrument.event_labels(event) if event is not None else (event_name, '')
+        self.recorder.record(phase, name, action, instrument.qualname(function), elapsed)
+
+    def is_handled_event_name(self, name: Optional[str]) -> bool:
         """
-        return set(self.lifecycle_event_handlers[event])
+        Check if anything could run for events with the given name, regardless of action.
+
+        This only needs the `X-GitHub-Event` header, so deliveries nobody handles can be
+        rejected before their payload is decoded.
+
+        :param name: Event name
+        :return: True if global middleware or any middleware/handler is registered for the name
+        """
+        return bool(self.global_middleware_table) or name in self.handler_table or name in self.event_middleware_table
+
+    def is_handled_event(self, event: models.EventT) -> bool:
+        """
+        Check if any middleware or handler would run for the given event name/action.
+
+        :param event: Event to check
+        :return: True if middleware or handlers are registered for the event, False otherwise
+        """
+        return bool(self.middleware_for_event(event)) or bool(self.handlers_for_event(event))
 
     @staticmethod
     def create_context(event: models.EventT,
-                       app_id: str,
-                       private_key: str) -> models.ContextT:
+                       signer: auth.AppJWT,
+                       base_url: str = defaults.GITHUB_BASE_URL) -> models.ContextT:
         """
         Create context for the given webhook event.
 
+        The GitHub client is not authenticated until a middleware/handler first uses it.
+
         :param event: Event to create context for
-        :param app_id: ID of the GitHub App
-        :param private_key: PEM of the GitHub App
+        :param signer: App JWT signer of the GitHub App
+        :param base_url: Base URL of the GitHub API
         :return: Context
         """
         return models.Context(
             event=event,
-            github=github.create_github_api(event, app_id, private_key)
+            github=github.create_lazy_github_api(event, signer, base_url)
         )
 
-    @staticmethod
-    def parse_request(request: models.Request) -> models.EventT:
+    def parse_request(self, request: models.Request) -> models.EventT:
         """
         Parse the given request into an event.
 
+        When `lazy_events` is configured, the payload is wrapped in slotted views that only
+        build nested objects when a middleware/handler first reads them.
+
         :param request: Request to parse
         :return: Event
         """
@@ -244,47 +419,89 @@ class App(Generic[AdapterT, EventHandlerT],
         hook_id = int(request.headers['X-GitHub-Hook-ID'])
         payload = request.body_json
         action = payload.pop('action', None)
+        if self.lazy_events:
+            return views.new_event(delivery_id, event_name, hook_id, action, payload)
         return models.new_event(delivery_id, event_name, hook_id, action, payload)
 
+    def is_duplicate_request(self, request: models.Request) -> bool:
+        """
+        Check if the given request is a redelivery of a webhook this app has already seen.
+
+        Always false when duplicate detection is not configured.
+
+        :param request: Verified request to check
+        :return: True if the delivery id was already seen, False otherwise
+        """
+        if not self.delivery_cache:
+            return False
+        delivery_id = request.headers.get('X-GitHub-Delivery')
+        return bool(delivery_id) and self.delivery_cache.is_duplicate(delivery_id)
+
+    def record_delivery(self,
+                        request: models.Request,
+                        response: models.Response) -> None:
+        """
+        Remember the delivery id of the given request for duplicate detection once it has been handled.
+
+        Deliveries answered with a server error (a failed handler or a full background queue) are
+        not remembered, so a redelivery of them is processed rather than dropped.
+
+        :param request: Dispatched request
+        :param response: Response the request was answered with
+        :return: Nothing
+        """
+        if not self.delivery_cache or response.status_code >= 500:
+            return
+        delivery_id = request.headers.get('X-GitHub-Delivery')
+        if delivery_id:
+            self.delivery_cache.add(delivery_id)
+
+    def is_handled_request(self, request: models.Request) -> bool:
+        """
+        Check if anything could run for the given request, using only its headers.
+
+        :param request: Verified request to check
+        :return: True if the event named by the request may be handled, False otherwise
+        """
+        return self.is_handled_event_name(request.headers.get('X-GitHub-Event'))
+
     def verify_request(self,
                        request: models.Request,
                        app_id: str,
-                       webhook_secret: str) -> None:
+                       signature: auth.WebhookSignature) -> None:
         """
         Verify the given request.
 
+        The signature check is skipped for requests the adapter already verified while reading the body.
+
         If unverified, raise an HTTP 401 Unauthorized exception.
 
         :param request: Request to verify
         :param app_id: Expected GitHub app id
-        :param webhook_secret: Shared webhook secret between GitHub and GitHub App
+        :param signature: Webhook signature verifier keyed with the shared webhook secret
         :return: Nothing
         """
-        self.verify_request_signature(request, webhook_secret)
+        if not request.verified:
+            self.verify_request_signature(request, signature)
         self.verify_request_target_id(request, app_id)
 
     @staticmethod
     def verify_request_signature(request: models.Request,
-                                 webhook_secret: str) -> None:
+                                 signature: auth.WebhookSignature) -> None:
         """
         Verify the given request originated from GitHub.
 
+        The `X-Hub-Signature-256` header is preferred over the legacy `X-Hub-Signature` header.
+
         If unverified, raise an HTTP 401 Unauthorized exception.
 
         :param request: Request to validate
-        :param webhook_secret: Shared webhook secret between GitHub and GitHub App
+        :param signature: Webhook signature verifier keyed with the shared webhook secret
         :return: Nothing
         """
-        algorithm, digest = request.headers['X-Hub-Signature'].split('=')
-
-        obj = hmac.new(
-            key=webhook_secret.encode('utf-8'),
-            msg=request.body_raw,
-            digestmod=algorithm
-        )
-
-        match = hmac.compare_digest(digest, obj.hexdigest())
-        if not match:
+        if not signature.select(request.headers):
+            raise errors.HTTPException(401, 'Missing webhook signature')
+        if not signature.verify(request.headers, request.body_raw):
             raise errors.HTTPException(401, 'Invalid webhook signature')
 
     @staticmethod
@@ -311,18 +528,51 @@ class App(Generic[AdapterT, EventHandlerT],
         Wrap the result of a handler execution into a Response object.
 
         If the handler returned a response, use that.
-        If the handler did not return a response, return a 200 OK response.
+        If the handler did not return a response, return the shared 200 OK response.
 
         :param result: Result of a handler execution
         :return: Response
         """
-        return result if result else models.Response(status_code=200)
+        return models.OK if result is None else result
 
 
 # Type alias for :class:`~probot.base.App` derived classes.
 AppT = TypeVar('AppT', bound=App)
 
 
+def unique(items: Iterable) -> tuple:
+    """
+    De-duplicate the given items, preserving the order they first appear in.
+
+    :param items: Items to de-duplicate
+    :return: Tuple of unique items
+    """
+    return tuple(dict.fromkeys(items))
+
+
+def compile_table(collection: Dict[models.EventName, Dict[Optional[models.ActionT], List]],
+                  prefix: Iterable = ()) -> Dict[models.EventName, Dict[Optional[models.ActionT], tuple]]:
+    """
+    Compile a collection of functions keyed on event name/action into a lookup table.
+
+    Every event name gets an entry for the `None` action holding the functions registered for
+    all actions of the event; each registered action holds those followed by its own functions.
+
+    :param collection: Functions keyed on event name/action
+    :param prefix: Functions that run before all others (e.g. global middleware)
+    :return: Lookup table
+    """
+    table = {}
+    for name, actions in collection.items():
+        event_level = list(prefix) + actions.get(None, [])
+        entries = {None: unique(event_level)}
+        for action, functions in actions.items():
+            if action is not None:
+                entries[action] = unique(event_level + functions)
+        table[name] = entries
+    return table
+
+
 class Probot(Generic[AppT, AdapterT, AdapterAppT],
              metaclass=abc.ABCMeta):
     """
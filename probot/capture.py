@@ -0,0 +1,254 @@
+"""
+    probot/capture
+    ~~~~~~~~~~~~~~
+
+    Contains the opt-in recorder that captures verified webhook deliveries to disk.
+
+    Captures are written to a directory as a series of gzip compressed files. Each file begins
+    with `MAGIC` followed by length-prefixed records, one per delivery:
+
+        >dII  received_at (unix timestamp), headers length, body length
+        headers as UTF-8 JSON, then the raw body bytes
+
+    Files are rotated once `rotate_size` uncompressed bytes have been written to them and can
+    be fed to `python -m probot.replay`.
+"""
+import gzip
+import json
+import os
+import queue
+import random
+import struct
+import threading
+import time
+from typing import IO, Dict, Iterator, Optional, Tuple
+
+from . import defaults, log, metrics, models
+
+LOG = log.get_logger(__name__)
+
+CAPTURE_RECORDED = metrics.REGISTRY.counter(
+    'probot_capture_recorded_total',
+    'Deliveries written to capture files.'
+)
+CAPTURE_DROPPED = metrics.REGISTRY.counter(
+    'probot_capture_dropped_total',
+    'Deliveries not captured because the capture buffer was full.'
+)
+
+# Leading bytes of the (decompressed) content of every capture file.
+MAGIC = b'PROBOTCAP1\n'
+
+# Layout of the fixed size header of each capture record.
+RECORD = struct.Struct('>dII')
+
+# Suffix of capture file names.
+SUFFIX = '.capture.gz'
+
+# Compression level of capture files; lower than gzip's default as throughput matters more than size.
+COMPRESS_LEVEL = 6
+
+
+class Capture:
+    """
+    Recorder appending sampled deliveries to rotating, compressed capture files.
+
+    Recording only copies the delivery into a bounded buffer; a single writer thread drains it
+    to disk so capturing never holds up the webhook response. When the buffer is full the delivery
+    is dropped rather than waited on.
+    """
+    def __init__(self,
+                 path: str,
+                 sample_rate: float = 1.0,
+                 sample_rates: Optional[Dict[str, float]] = None,
+                 rotate_size: int = defaults.CAPTURE_ROTATE_SIZE,
+                 buffer_size: int = defaults.CAPTURE_BUFFER_SIZE) -> None:
+        self.path = path
+        self.sample_rate = sample_rate
+        self.sample_rates = sample_rates or {}
+        self.rotate_size = rotate_size
+        self._buffer: queue.Queue = queue.Queue(maxsize=buffer_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._file: Optional[IO[bytes]] = None
+        self._written = 0
+        self._sequence = 0
+        os.makedirs(path, exist_ok=True)
+
+    def start(self) -> None:
+        """
+        Start the writer thread.
+
+        :return: Nothing
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name='probot-capture', daemon=True)
+                self._thread.start()
+
+    def close(self) -> None:
+        """
+        Write everything buffered, close the current capture file and stop the writer thread.
+
+        :return: Nothing
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            self._buffer.put(None)
+            thread.join()
+
+    def is_sampled(self, event_name: Optional[str]) -> bool:
+        """
+        Check if a delivery of the given event should be captured.
+
+        :param event_name: Name of the event, from the `X-GitHub-Event` header
+        :return: True if captured, False otherwise
+        """
+        rate = self.sample_rates.get(event_name, self.sample_rate)
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def record(self, request: models.Request) -> None:
+        """
+        Queue the given request to be captured if its event is sampled.
+
+        :param request: Verified request to record
+        :return: Nothing
+        """
+        if not self.is_sampled(request.headers.get('X-GitHub-Event')):
+            return
+
+        self.start()
+        try:
+            self._buffer.put_nowait((time.time(), dict(request.headers.items()), bytes(request.body_raw)))
+        except queue.Full:
+            CAPTURE_DROPPED.inc()
+
+    def run(self) -> None:
+        """
+        Write buffered deliveries until closed, flushing whenever the buffer is drained.
+
+        :return: Nothing
+        """
+        try:
+            while True:
+                item = self._buffer.get()
+                while item is not None:
+                    self.write(*item)
+                    try:
+                        item = self._buffer.get_nowait()
+                    except queue.Empty:
+                        break
+                if self._file:
+                    self._file.flush()
+                if item is None:
+                    return
+        finally:
+            self.rotate()
+
+    def write(self,
+              received_at: float,
+              headers: Dict[str, str],
+              body: bytes) -> None:
+        """
+        Append a single record to the current capture file, rotating it when full.
+
+        :param received_at: Unix timestamp the delivery was received at
+        :param headers: Request headers
+        :param body: Raw request body
+        :return: Nothing
+        """
+        encoded = json.dumps(headers).encode('utf-8')
+        try:
+            if self._file is None:
+                self._file = self.open()
+            self._file.write(RECORD.pack(received_at, len(encoded), len(body)))
+            self._file.write(encoded)
+            self._file.write(body)
+        except OSError:
+            LOG.exception('Failed to write delivery to capture file')
+            return
+
+        CAPTURE_RECORDED.inc()
+        self._written += RECORD.size + len(encoded) + len(body)
+        if self._written >= self.rotate_size:
+            self.rotate()
+
+    def open(self) -> IO[bytes]:
+        """
+        Open a new capture file.
+
+        :return: Binary file object
+        """
+        self._sequence += 1
+        name = f'{time.strftime("%Y%m%dT%H%M%S")}-{os.getpid()}-{self._sequence}{SUFFIX}'
+        f = gzip.open(os.path.join(self.path, name), 'wb', compresslevel=COMPRESS_LEVEL)
+        f.write(MAGIC)
+        self._written = len(MAGIC)
+        return f
+
+    def rotate(self) -> None:
+        """
+        Close the current capture file; the next record starts a new one.
+
+        :return: Nothing
+        """
+        f, self._file = self._file, None
+        if f:
+            try:
+                f.close()
+            except OSError:
+                LOG.exception('Failed to close capture file')
+
+
+def new_capture(settings: models.Settings) -> Optional[Capture]:
+    """
+    Create a delivery capture from probot settings.
+
+    :param settings: Settings to use
+    :return: Capture, or None when capturing is disabled
+    """
+    if not settings.capture_path:
+        return None
+    return Capture(settings.capture_path,
+                   settings.capture_sample_rate,
+                   settings.capture_sample_rates,
+                   settings.capture_rotate_size,
+                   settings.capture_buffer_size)
+
+
+def is_capture(f: IO[bytes]) -> bool:
+    """
+    Check if the given (decompressed) file is a capture file.
+
+    :param f: Binary file object supporting `peek`
+    :return: True if a capture file, False otherwise
+    """
+    return f.peek(len(MAGIC))[:len(MAGIC)] == MAGIC
+
+
+def read_records(f: IO[bytes]) -> Iterator[Tuple[Dict[str, str], bytes, float]]:
+    """
+    Read the records of a (decompressed) capture file.
+
+    A record cut short, e.g. by the process dying mid-write, ends the iteration.
+
+    :param f: Binary file object positioned at the start of the file
+    :return: Iterator of (headers, body, received_at)
+    """
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError('Not a probot capture file')
+
+    try:
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            received_at, headers_length, body_length = RECORD.unpack(header)
+            headers = f.read(headers_length)
+            body = f.read(body_length)
+            if len(headers) < headers_length or len(body) < body_length:
+                return
+            yield json.loads(headers), body, received_at
+    except EOFError:
+        return
@@ -0,0 +1,75 @@
+"""
+    probot/codec
+    ~~~~~~~~~~~~
+
+    Contains pluggable JSON decoders for webhook request bodies.
+"""
+import json
+from typing import Any, Callable, Dict, Optional, Union
+
+from . import errors
+
+# Type alias for functions that decode a raw JSON request body.
+Decoder = Callable[[Union[bytes, str]], Any]
+
+
+def stdlib_loads(body: Union[bytes, str]) -> Any:
+    """
+    Decode the given JSON body with the standard library `json` module.
+
+    :param body: Raw JSON body
+    :return: Decoded body
+    """
+    return json.loads(body)
+
+
+def load_decoders() -> Dict[str, Decoder]:
+    """
+    Find all available JSON decoders, including optional faster codecs that are installed.
+
+    :return: Decoders keyed by name
+    """
+    decoders: Dict[str, Decoder] = {'json': stdlib_loads}
+
+    try:
+        import ujson
+    except ImportError:
+        pass
+    else:
+        decoders['ujson'] = ujson.loads
+
+    try:
+        import orjson
+    except ImportError:
+        pass
+    else:
+        decoders['orjson'] = orjson.loads
+
+    return decoders
+
+
+#: All available JSON decoders keyed by name.
+DECODERS = load_decoders()
+
+#: Name of the fastest available JSON decoder.
+DEFAULT = next(name for name in ('orjson', 'ujson', 'json') if name in DECODERS)
+
+
+def get_decoder(name: Optional[str] = None) -> Decoder:
+    """
+    Get the JSON decoder with the given name, or the fastest available one.
+
+    If the named decoder is not installed, a SettingsException is raised.
+
+    :param name: Name of the decoder ('json', 'ujson', 'orjson') or None for the default
+    :return: Decoder
+    """
+    name = name or DEFAULT
+    try:
+        return DECODERS[name]
+    except KeyError:
+        raise errors.SettingsException(f'JSON codec "{name}" is not available') from None
+
+
+#: Fastest available JSON decoder.
+loads = get_decoder()
@@ -0,0 +1,205 @@
+"""
+    probot/dedup
+    ~~~~~~~~~~~~
+
+    Contains caches of recently seen delivery ids used to drop redelivered webhooks.
+"""
+import abc
+import collections
+import itertools
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+from . import defaults, errors, log, metrics
+
+LOG = log.get_logger(__name__)
+
+DELIVERIES = metrics.REGISTRY.counter(
+    'probot_deliveries_total',
+    'Verified webhook deliveries checked for duplicates.'
+)
+DUPLICATES = metrics.REGISTRY.counter(
+    'probot_duplicate_deliveries_total',
+    'Webhook deliveries dropped because their delivery id was already seen.'
+)
+DUPLICATE_RATIO = metrics.REGISTRY.gauge(
+    'probot_duplicate_delivery_ratio',
+    'Fraction of checked webhook deliveries that were duplicates.'
+)
+DUPLICATE_RATIO.set_function(lambda: DUPLICATES.labels().value / max(DELIVERIES.labels().value, 1))
+
+
+class DeliveryCache(metaclass=abc.ABCMeta):
+    """
+    Abstract cache of recently seen delivery ids.
+
+    Checking and recording are separate so a delivery is only remembered once it has been
+    processed (or queued) successfully; one that failed can still be redelivered. Two copies
+    of a delivery arriving at the same time may therefore both be processed.
+    """
+    def __init__(self,
+                 ttl: float = defaults.DEDUP_TTL,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.ttl = ttl
+        self.clock = clock
+
+    def is_duplicate(self, delivery_id: str) -> bool:
+        """
+        Check if the given delivery id was already seen.
+
+        :param delivery_id: Value of the `X-GitHub-Delivery` header
+        :return: True if the delivery was already seen, False otherwise
+        """
+        DELIVERIES.inc()
+        duplicate = self.contains(delivery_id)
+        if duplicate:
+            DUPLICATES.inc()
+        return duplicate
+
+    @abc.abstractmethod
+    def contains(self, delivery_id: str) -> bool:
+        """
+        Check if the given delivery id is present and unexpired.
+
+        :param delivery_id: Delivery id to check
+        :return: True if the delivery id is present, False otherwise
+        """
+        raise NotImplementedError('Must be implemented by derived class')
+
+    @abc.abstractmethod
+    def add(self, delivery_id: str) -> None:
+        """
+        Remember the given delivery id for `ttl` seconds.
+
+        :param delivery_id: Delivery id of a successfully processed delivery
+        :return: Nothing
+        """
+        raise NotImplementedError('Must be implemented by derived class')
+
+
+class MemoryDeliveryCache(DeliveryCache):
+    """
+    In-process LRU cache of delivery ids.
+    """
+    def __init__(self,
+                 ttl: float = defaults.DEDUP_TTL,
+                 size: int = defaults.DEDUP_SIZE,
+                 clock: Callable[[], float] = time.time) -> None:
+        super().__init__(ttl, clock)
+        self.size = size
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def contains(self, delivery_id: str) -> bool:
+        now = self.clock()
+        with self._lock:
+            expires_at = self._entries.get(delivery_id)
+            if expires_at is None:
+                return False
+            if expires_at <= now:
+                del self._entries[delivery_id]
+                return False
+            self._entries.move_to_end(delivery_id)
+            return True
+
+    def add(self, delivery_id: str) -> None:
+        expires_at = self.clock() + self.ttl
+        with self._lock:
+            self._entries[delivery_id] = expires_at
+            self._entries.move_to_end(delivery_id)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+class SQLiteDeliveryCache(DeliveryCache):
+    """
+    Delivery id cache stored in a SQLite database so several worker processes can share it.
+
+    Database errors (e.g. the database staying locked past the busy timeout) fail open: they are
+    logged and the delivery is treated as new rather than failing a valid webhook.
+    """
+    #: Number of recorded deliveries between purges of expired delivery ids.
+    purge_interval = 1000
+
+    #: Seconds to wait for a lock held by another process before giving up.
+    busy_timeout = 5.0
+
+    def __init__(self,
+                 path: str,
+                 ttl: float = defaults.DEDUP_TTL,
+                 clock: Callable[[], float] = time.time) -> None:
+        super().__init__(ttl, clock)
+        self.path = path
+        self._local = threading.local()
+        self._adds = itertools.count(1)
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS deliveries (delivery_id TEXT PRIMARY KEY, expires_at REAL NOT NULL)'
+            )
+
+    def contains(self, delivery_id: str) -> bool:
+        try:
+            row = self._connection().execute(
+                'SELECT 1 FROM deliveries WHERE delivery_id = ? AND expires_at > ?',
+                (delivery_id, self.clock())
+            ).fetchone()
+        except sqlite3.Error:
+            LOG.warning('Failed to check delivery %s for duplicates; treating it as new', delivery_id, exc_info=True)
+            return False
+        return row is not None
+
+    def add(self, delivery_id: str) -> None:
+        now = self.clock()
+        # `next` on a count is atomic, unlike `+=` on an attribute shared by request threads.
+        purge = next(self._adds) % self.purge_interval == 0
+        try:
+            with self._connection() as connection:
+                if purge:
+                    connection.execute('DELETE FROM deliveries WHERE expires_at <= ?', (now,))
+                connection.execute(
+                    'INSERT OR REPLACE INTO deliveries (delivery_id, expires_at) VALUES (?, ?)',
+                    (delivery_id, now + self.ttl)
+                )
+        except sqlite3.Error:
+            LOG.warning('Failed to record delivery %s for duplicate detection', delivery_id, exc_info=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Get the SQLite connection for the current thread.
+
+        :return: Connection
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path, timeout=self.busy_timeout)
+            connection.execute(f'PRAGMA busy_timeout={int(self.busy_timeout * 1000)}')
+            connection.execute('PRAGMA journal_mode=WAL')
+        return connection
+
+
+def new_delivery_cache(backend: Optional[str],
+                       ttl: float = defaults.DEDUP_TTL,
+                       size: int = defaults.DEDUP_SIZE,
+                       path: Optional[str] = None) -> Optional[DeliveryCache]:
+    """
+    Create the delivery id cache for the given backend name.
+
+    If the backend is unknown or missing required configuration, a SettingsException is raised.
+
+    :param backend: Backend name ('memory' or 'sqlite'), or None to disable duplicate detection
+    :param ttl: Seconds to remember each delivery id
+    :param size: Maximum number of delivery ids for the in-memory backend
+    :param path: Database path for the SQLite backend
+    :return: Delivery cache or None
+    """
+    if not backend:
+        return None
+    if backend == 'memory':
+        return MemoryDeliveryCache(ttl, size)
+    if backend == 'sqlite':
+        if not path:
+            raise errors.ConfigurationValueMissing('dedup_path')
+        return SQLiteDeliveryCache(path, ttl)
+    raise errors.SettingsException(f'Unknown dedup backend "{backend}"')
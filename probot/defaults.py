@@ -8,3 +8,63 @@ ENV_FILE = '.env'
 ENV_PREFIX = 'PROBOT_'
 METHOD = 'POST'
 PATH = '/'
+
+# Seconds before an installation access token expires that it is considered stale and re-minted.
+TOKEN_REFRESH_MARGIN = 300
+
+# Seconds to remember that an installation no longer has access to the app.
+TOKEN_NEGATIVE_TTL = 60
+
+# Seconds an app JWT is valid for; GitHub rejects anything longer than ten minutes.
+APP_JWT_TTL = 600
+
+# Seconds to backdate the app JWT issue time to allow for clock drift with GitHub.
+APP_JWT_CLOCK_DRIFT = 60
+
+# Seconds before an app JWT expires that it is considered stale and re-signed.
+APP_JWT_REFRESH_MARGIN = 60
+
+# Fetch installation access tokens off the event loop before ASGI middleware/handlers run.
+PREFETCH_TOKEN = True
+
+# Seconds between event loop responsiveness probes for ASGI apps; zero (the default) disables the probe.
+LOOP_MONITOR_INTERVAL = 0
+
+# Number of keep-alive connections kept open to the GitHub API per host.
+HTTP_POOL_SIZE = 10
+
+# Number of sessions kept for GitHub clients created with their own `retry` configuration.
+HTTP_RETRY_SESSIONS = 8
+
+# Base URL of the GitHub REST API.
+GITHUB_BASE_URL = 'https://api.github.com'
+
+# Seconds to wait on the GitHub API before giving up on a request.
+HTTP_TIMEOUT = 15
+
+# Number of handlers for a single event that may run at the same time; one runs them serially.
+HANDLER_CONCURRENCY = 1
+
+# Number of background workers processing acknowledged events; zero processes events before responding.
+BACKGROUND_WORKERS = 0
+
+# Maximum number of acknowledged events waiting for a background worker.
+BACKGROUND_QUEUE_SIZE = 1000
+
+# Seconds a delivery id is remembered for duplicate detection.
+DEDUP_TTL = 3600
+
+# Maximum number of delivery ids remembered by the in-memory duplicate detection cache.
+DEDUP_SIZE = 100000
+
+# Largest webhook request body (bytes) accepted; GitHub caps payloads at 25 MB.
+MAX_BODY_SIZE = 25 * 1024 * 1024
+
+# Size (bytes) of the chunks request bodies are read and hashed in when streamed.
+BODY_CHUNK_SIZE = 64 * 1024
+
+# Uncompressed bytes written to a capture file before it is rotated.
+CAPTURE_ROTATE_SIZE = 64 * 1024 * 1024
+
+# Maximum number of captured deliveries waiting to be written before new ones are dropped.
+CAPTURE_BUFFER_SIZE = 1000
@@ -0,0 +1,663 @@
+"""
+    probot/fakegithub
+    ~~~~~~~~~~~~~~~~~
+
+    Contains a local stand-in for the GitHub REST API to performance test handlers against.
+
+    The endpoints used by `probot.github`, the `models.Context` helpers and typical handlers are
+    implemented in memory: installation access tokens, organizations, repositories, branches,
+    issues, pull requests, issue/commit/review comments and the git database (refs, blobs, trees
+    and commits). Objects that were never created are made
+    up on demand so handlers can run against any owner/repo/number. Response latency,
+    rate limiting and error injection are configurable.
+
+    Point probot at it with the `github_base_url` setting, e.g.:
+
+        python -m probot.fakegithub --port 8080 --latency 0.05 --error-rate 0.01
+        PROBOT_GITHUB_BASE_URL=http://127.0.0.1:8080 ...
+"""
+import argparse
+import base64
+import datetime
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http import server
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+from urllib import parse
+
+# Type alias for a JSON response: status code and body.
+Reply = Tuple[int, Any]
+
+# Pattern matching the owner/repo prefix of repository scoped paths.
+REPO = r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)'
+
+# Timestamp returned for every created_at/updated_at field.
+TIMESTAMP = '2020-01-01T00:00:00Z'
+
+
+def git_sha(kind: str, content: bytes) -> str:
+    """
+    Compute the git object id of the given content.
+
+    :param kind: Git object type, e.g. 'blob'
+    :param content: Object content
+    :return: Hex SHA-1
+    """
+    return hashlib.sha1(f'{kind} {len(content)}\0'.encode('utf-8') + content).hexdigest()
+
+
+def json_sha(kind: str, value: Any) -> str:
+    """
+    Compute a stable object id for a JSON value.
+
+    :param kind: Git object type, e.g. 'tree'
+    :param value: JSON serializable value
+    :return: Hex SHA-1
+    """
+    return git_sha(kind, json.dumps(value, sort_keys=True).encode('utf-8'))
+
+
+def user(base: str, login: str, user_id: int = 1, kind: str = 'User') -> Dict[str, Any]:
+    """
+    Create a user object.
+    """
+    return {'login': login, 'id': user_id, 'type': kind, 'url': f'{base}/users/{login}'}
+
+
+def organization(base: str, login: str, org_id: int = 1) -> Dict[str, Any]:
+    """
+    Create an organization object.
+    """
+    return {
+        'login': login,
+        'id': org_id,
+        'type': 'Organization',
+        'name': login,
+        'url': f'{base}/orgs/{login}',
+        'repos_url': f'{base}/orgs/{login}/repos',
+        'created_at': TIMESTAMP,
+        'updated_at': TIMESTAMP
+    }
+
+
+def repository(base: str, owner: str, name: str, repo_id: int = 1) -> Dict[str, Any]:
+    """
+    Create a repository object.
+    """
+    full_name = f'{owner}/{name}'
+    return {
+        'id': repo_id,
+        'name': name,
+        'full_name': full_name,
+        'private': False,
+        'owner': user(base, owner),
+        'url': f'{base}/repos/{full_name}',
+        'default_branch': 'master',
+        'created_at': TIMESTAMP,
+        'updated_at': TIMESTAMP
+    }
+
+
+class FakeGitHub:
+    """
+    Fake GitHub API served from a background thread.
+
+    :param address: Host/port to listen on; port zero picks a free one
+    :param latency: Seconds added to every response
+    :param jitter: Maximum random seconds added on top of `latency`
+    :param rate_limit: Requests allowed per rate limit window
+    :param rate_limit_window: Seconds until the rate limit resets
+    :param error_rate: Probability (0-1) of answering a request with `error_status`
+    :param error_status: Status code of injected errors
+    :param seed: Seed for the latency jitter/error injection random generator
+    """
+    def __init__(self,
+                 address: Tuple[str, int] = ('127.0.0.1', 0),
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 rate_limit: int = 5000,
+                 rate_limit_window: float = 3600,
+                 error_rate: float = 0.0,
+                 error_status: int = 502,
+                 seed: Optional[int] = None) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.calls: Counter = Counter()
+        self.server = Server(address, Handler, self)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._rate_used = 0
+        self._rate_reset = time.time() + rate_limit_window
+        self._objects: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+        self._ids = 0
+        self._routes: List[Tuple[str, Pattern, Callable[..., Reply]]] = [
+            (method, re.compile(pattern), handler) for method, pattern, handler in (
+                ('GET', r'/rate_limit', self.get_rate_limit),
+                ('POST', r'/app/installations/(?P<installation_id>\d+)/access_tokens', self.create_access_token),
+                ('GET', r'/app/installations/(?P<installation_id>\d+)', self.get_installation),
+                ('GET', r'/orgs/(?P<org>[^/]+)', self.get_organization),
+                ('GET', r'/repositories/(?P<repo_id>\d+)', self.get_repository_by_id),
+                ('GET', REPO, self.get_repository),
+                ('GET', REPO + r'/branches/(?P<branch>.+)', self.get_branch),
+                ('GET', REPO + r'/comments/(?P<comment_id>\d+)', self.get_commit_comment),
+                ('GET', REPO + r'/issues', self.list_issues),
+                ('POST', REPO + r'/issues', self.create_issue),
+                ('GET', REPO + r'/issues/comments/(?P<comment_id>\d+)', self.get_comment),
+                ('PATCH', REPO + r'/issues/comments/(?P<comment_id>\d+)', self.update_comment),
+                ('DELETE', REPO + r'/issues/comments/(?P<comment_id>\d+)', self.delete_comment),
+                ('GET', REPO + r'/issues/(?P<number>\d+)', self.get_issue),
+                ('PATCH', REPO + r'/issues/(?P<number>\d+)', self.update_issue),
+                ('GET', REPO + r'/issues/(?P<number>\d+)/comments', self.list_comments),
+                ('POST', REPO + r'/issues/(?P<number>\d+)/comments', self.create_comment),
+                ('GET', REPO + r'/pulls/comments/(?P<comment_id>\d+)', self.get_review_comment),
+                ('GET', REPO + r'/pulls/(?P<number>\d+)', self.get_pull),
+                ('PATCH', REPO + r'/pulls/(?P<number>\d+)', self.update_pull),
+                ('GET', REPO + r'/git/refs?/(?P<ref>.+)', self.get_ref),
+                ('POST', REPO + r'/git/refs', self.create_ref),
+                ('PATCH', REPO + r'/git/refs/(?P<ref>.+)', self.update_ref),
+                ('DELETE', REPO + r'/git/refs/(?P<ref>.+)', self.delete_ref),
+                ('GET', REPO + r'/git/blobs/(?P<sha>[0-9a-f]+)', self.get_blob),
+                ('POST', REPO + r'/git/blobs', self.create_blob),
+                ('GET', REPO + r'/git/trees/(?P<sha>[0-9a-f]+)', self.get_tree),
+                ('POST', REPO + r'/git/trees', self.create_tree),
+                ('GET', REPO + r'/git/commits/(?P<sha>[0-9a-f]+)', self.get_git_commit),
+                ('POST', REPO + r'/git/commits', self.create_git_commit),
+                ('GET', REPO + r'/commits/(?P<sha>[^/]+)', self.get_commit)
+            )
+        ]
+
+    @property
+    def url(self) -> str:
+        """
+        Get the base URL of the fake API.
+        """
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeGitHub':
+        """
+        Start serving requests.
+
+        :return: Self
+        """
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fake-github', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop serving requests.
+
+        :return: Nothing
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> 'FakeGitHub':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def respond(self,
+                method: str,
+                path: str,
+                body: Any,
+                base: str) -> Tuple[int, Any, Dict[str, str]]:
+        """
+        Answer a single API request.
+
+        :param method: HTTP method
+        :param path: Request path, without query string
+        :param body: Decoded JSON request body, or None
+        :param base: Base URL objects link back to
+        :return: Status code, JSON body and extra response headers
+        """
+        with self._lock:
+            exceeded, headers = self.consume_rate_limit(path != '/rate_limit')
+            inject_error = self._random.random() < self.error_rate
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+
+        if delay > 0:
+            time.sleep(delay)
+        if exceeded:
+            return 403, {'message': 'API rate limit exceeded'}, headers
+        if inject_error:
+            return self.error_status, {'message': 'Injected error'}, headers
+
+        for route_method, pattern, handler in self._routes:
+            match = pattern.fullmatch(path)
+            if route_method == method and match:
+                with self._lock:
+                    self.calls[(method, pattern.pattern)] += 1
+                    status, reply = handler(base, body or {}, **match.groupdict())
+                return status, reply, headers
+        return 404, {'message': 'Not Found'}, headers
+
+    def consume_rate_limit(self, count: bool) -> Tuple[bool, Dict[str, str]]:
+        """
+        Count a request against the rate limit and get the rate limit headers to send.
+
+        Must be called with the lock held.
+
+        :param count: Whether the request counts against the limit
+        :return: Whether the limit was exceeded, and the rate limit headers
+        """
+        now = time.time()
+        if now >= self._rate_reset:
+            self._rate_used = 0
+            self._rate_reset = now + self.rate_limit_window
+
+        exceeded = count and self._rate_used >= self.rate_limit
+        if count and not exceeded:
+            self._rate_used += 1
+        return exceeded, {
+            'X-RateLimit-Limit': str(self.rate_limit),
+            'X-RateLimit-Remaining': str(max(self.rate_limit - self._rate_used, 0)),
+            'X-RateLimit-Reset': str(int(self._rate_reset)),
+            'X-RateLimit-Used': str(self._rate_used),
+            'X-RateLimit-Resource': 'core'
+        }
+
+    def new_id(self) -> int:
+        """
+        Allocate a new object id. Must be called with the lock held.
+        """
+        self._ids += 1
+        return self._ids
+
+    def get_rate_limit(self, base: str, body: Any) -> Reply:
+        rate = {'limit': self.rate_limit,
+                'remaining': max(self.rate_limit - self._rate_used, 0),
+                'reset': int(self._rate_reset),
+                'used': self._rate_used}
+        return 200, {'resources': {'core': rate}, 'rate': rate}
+
+    def create_access_token(self, base: str, body: Any, installation_id: str) -> Reply:
+        expires_at = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+        return 201, {'token': f'ghs_fake{installation_id}',
+                     'expires_at': expires_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                     'permissions': {}}
+
+    def get_installation(self, base: str, body: Any, installation_id: str) -> Reply:
+        return 200, {'id': int(installation_id),
+                     'account': user(base, 'owner'),
+                     'app_id': 1,
+                     'target_type': 'User',
+                     'access_tokens_url': f'{base}/app/installations/{installation_id}/access_tokens'}
+
+    def get_organization(self, base: str, body: Any, org: str) -> Reply:
+        return 200, organization(base, org)
+
+    def get_repository_by_id(self, base: str, body: Any, repo_id: str) -> Reply:
+        return 200, repository(base, 'owner', 'repo', int(repo_id))
+
+    def get_repository(self, base: str, body: Any, owner: str, repo: str) -> Reply:
+        return 200, repository(base, owner, repo)
+
+    def get_branch(self, base: str, body: Any, owner: str, repo: str, branch: str) -> Reply:
+        sha = self.ref(base, owner, repo, f'heads/{branch}')['object']['sha']
+        commit = self._objects.get((owner, repo, 'commits', sha)) or self.git_commit(base, owner, repo, sha)
+        return 200, {
+            'name': branch,
+            'commit': {'sha': sha, 'commit': commit, 'url': f'{base}/repos/{owner}/{repo}/commits/{sha}'},
+            'protected': False,
+            'protection_url': f'{base}/repos/{owner}/{repo}/branches/{branch}/protection'
+        }
+
+    def get_commit_comment(self, base: str, body: Any, owner: str, repo: str, comment_id: str) -> Reply:
+        key = (owner, repo, 'commit_comments', comment_id)
+        if key not in self._objects:
+            sha = json_sha('commit', ['master'])
+            self._objects[key] = {
+                'id': int(comment_id),
+                'body': f'Comment {comment_id}',
+                'user': user(base, owner),
+                'commit_id': sha,
+                'path': None,
+                'position': None,
+                'line': None,
+                'url': f'{base}/repos/{owner}/{repo}/comments/{comment_id}',
+                'created_at': TIMESTAMP,
+                'updated_at': TIMESTAMP
+            }
+        return 200, self._objects[key]
+
+    def get_review_comment(self, base: str, body: Any, owner: str, repo: str, comment_id: str) -> Reply:
+        key = (owner, repo, 'review_comments', comment_id)
+        if key not in self._objects:
+            self._objects[key] = {
+                'id': int(comment_id),
+                'body': f'Comment {comment_id}',
+                'user': user(base, owner),
+                'commit_id': json_sha('commit', ['master']),
+                'original_commit_id': json_sha('commit', ['master']),
+                'path': 'README.md',
+                'position': 1,
+                'original_position': 1,
+                'diff_hunk': '@@ -1 +1 @@',
+                'url': f'{base}/repos/{owner}/{repo}/pulls/comments/{comment_id}',
+                'created_at': TIMESTAMP,
+                'updated_at': TIMESTAMP
+            }
+        return 200, self._objects[key]
+
+    def issue(self, base: str, owner: str, repo: str, number: int) -> Dict[str, Any]:
+        """
+        Get (creating on demand) the issue or pull request with the given number.
+        """
+        key = (owner, repo, 'issues', str(number))
+        if key not in self._objects:
+            self._objects[key] = {
+                'id': self.new_id(),
+                'number': number,
+                'title': f'Issue {number}',
+                'body': '',
+                'state': 'open',
+                'user': user(base, owner),
+                'labels': [],
+                'comments': 0,
+                'url': f'{base}/repos/{owner}/{repo}/issues/{number}',
+                'created_at': TIMESTAMP,
+                'updated_at': TIMESTAMP
+            }
+        return self._objects[key]
+
+    def list_issues(self, base: str, body: Any, owner: str, repo: str) -> Reply:
+        return 200, [value for key, value in self._objects.items() if key[:3] == (owner, repo, 'issues')]
+
+    def create_issue(self, base: str, body: Any, owner: str, repo: str) -> Reply:
+        number = 1 + sum(1 for key in self._objects if key[:3] == (owner, repo, 'issues'))
+        issue = self.issue(base, owner, repo, number)
+        issue.update({name: body[name] for name in ('title', 'body') if name in body})
+        return 201, issue
+
+    def get_issue(self, base: str, body: Any, owner: str, repo: str, number: str) -> Reply:
+        return 200, self.issue(base, owner, repo, int(number))
+
+    def update_issue(self, base: str, body: Any, owner: str, repo: str, number: str) -> Reply:
+        issue = self.issue(base, owner, repo, int(number))
+        issue.update({name: body[name] for name in ('title', 'body', 'state') if name in body})
+        if 'labels' in body:
+            issue['labels'] = [{'name': label} for label in body['labels']]
+        return 200, issue
+
+    def list_comments(self, base: str, body: Any, owner: str, repo: str, number: str) -> Reply:
+        return 200, [value for key, value in self._objects.items()
+                     if key[:3] == (owner, repo, 'comments') and value['issue_number'] == int(number)]
+
+    def create_comment(self, base: str, body: Any, owner: str, repo: str, number: str) -> Reply:
+        comment_id = self.new_id()
+        comment = {
+            'id': comment_id,
+            'issue_number': int(number),
+            'body': body.get('body', ''),
+            'user': user(base, 'fake[bot]', kind='Bot'),
+            'url': f'{base}/repos/{owner}/{repo}/issues/comments/{comment_id}',
+            'created_at': TIMESTAMP,
+            'updated_at': TIMESTAMP
+        }
+        self._objects[(owner, repo, 'comments', str(comment_id))] = comment
+        self.issue(base, owner, repo, int(number))['comments'] += 1
+        return 201, comment
+
+    def comment(self, base: str, owner: str, repo: str, comment_id: str) -> Dict[str, Any]:
+        """
+        Get (creating on demand) the issue comment with the given id.
+        """
+        key = (owner, repo, 'comments', comment_id)
+        if key not in self._objects:
+            self._objects[key] = {
+                'id': int(comment_id),
+                'issue_number': None,
+                'body': f'Comment {comment_id}',
+                'user': user(base, owner),
+                'url': f'{base}/repos/{owner}/{repo}/issues/comments/{comment_id}',
+                'created_at': TIMESTAMP,
+                'updated_at': TIMESTAMP
+            }
+        return self._objects[key]
+
+    def get_comment(self, base: str, body: Any, owner: str, repo: str, comment_id: str) -> Reply:
+        return 200, self.comment(base, owner, repo, comment_id)
+
+    def update_comment(self, base: str, body: Any, owner: str, repo: str, comment_id: str) -> Reply:
+        comment = self.comment(base, owner, repo, comment_id)
+        comment['body'] = body.get('body', comment['body'])
+        return 200, comment
+
+    def delete_comment(self, base: str, body: Any, owner: str, repo: str, comment_id: str) -> Reply:
+        comment = self._objects.pop((owner, repo, 'comments', comment_id), None)
+        return (204, None) if comment else (404, {'message': 'Not Found'})
+
+    def pull(self, base: str, owner: str, repo: str, number: int) -> Dict[str, Any]:
+        """
+        Get (creating on demand) the pull request with the given number.
+        """
+        key = (owner, repo, 'pulls', str(number))
+        if key not in self._objects:
+            issue = self.issue(base, owner, repo, number)
+            branch = {'ref': 'master', 'sha': json_sha('commit', ['master']),
+                      'repo': repository(base, owner, repo)}
+            self._objects[key] = dict(issue,
+                                      url=f'{base}/repos/{owner}/{repo}/pulls/{number}',
+                                      issue_url=issue['url'],
+                                      merged=False,
+                                      mergeable=True,
+                                      head=dict(branch, ref=f'branch-{number}',
+                                                sha=json_sha('commit', [f'branch-{number}'])),
+                                      base=branch)
+        return self._objects[key]
+
+    def get_pull(self, base: str, body: Any, owner: str, repo: str, number: str) -> Reply:
+        return 200, self.pull(base, owner, repo, int(number))
+
+    def update_pull(self, base: str, body: Any, owner: str, repo: str, number: str) -> Reply:
+        pull = self.pull(base, owner, repo, int(number))
+        pull.update({name: body[name] for name in ('title', 'body', 'state') if name in body})
+        return 200, pull
+
+    def ref(self, base: str, owner: str, repo: str, ref: str, sha: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get (creating on demand) the git reference with the given name.
+        """
+        ref = ref if ref.startswith('refs/') else f'refs/{ref}'
+        key = (owner, repo, 'refs', ref)
+        if key not in self._objects or sha:
+            sha = sha or json_sha('commit', [ref])
+            self._objects[key] = {
+                'ref': ref,
+                'url': f'{base}/repos/{owner}/{repo}/git/{ref}',
+                'object': {'type': 'commit', 'sha': sha,
+                           'url': f'{base}/repos/{owner}/{repo}/git/commits/{sha}'}
+            }
+        return self._objects[key]
+
+    def get_ref(self, base: str, body: Any, owner: str, repo: str, ref: str) -> Reply:
+        return 200, self.ref(base, owner, repo, ref)
+
+    def create_ref(self, base: str, body: Any, owner: str, repo: str) -> Reply:
+        return 201, self.ref(base, owner, repo, body.get('ref', ''), body.get('sha'))
+
+    def update_ref(self, base: str, body: Any, owner: str, repo: str, ref: str) -> Reply:
+        return 200, self.ref(base, owner, repo, ref, body.get('sha'))
+
+    def delete_ref(self, base: str, body: Any, owner: str, repo: str, ref: str) -> Reply:
+        self._objects.pop((owner, repo, 'refs', ref if ref.startswith('refs/') else f'refs/{ref}'), None)
+        return 204, None
+
+    def get_blob(self, base: str, body: Any, owner: str, repo: str, sha: str) -> Reply:
+        blob = self._objects.get((owner, repo, 'blobs', sha))
+        return 200, blob or {'sha': sha, 'size': 0, 'encoding': 'base64', 'content': '',
+                             'url': f'{base}/repos/{owner}/{repo}/git/blobs/{sha}'}
+
+    def create_blob(self, base: str, body: Any, owner: str, repo: str) -> Reply:
+        content = body.get('content', '')
+        raw = base64.b64decode(content) if body.get('encoding') == 'base64' else content.encode('utf-8')
+        sha = git_sha('blob', raw)
+        self._objects[(owner, repo, 'blobs', sha)] = {
+            'sha': sha,
+            'size': len(raw),
+            'encoding': 'base64',
+            'content': base64.b64encode(raw).decode('ascii'),
+            'url': f'{base}/repos/{owner}/{repo}/git/blobs/{sha}'
+        }
+        return 201, {'sha': sha, 'url': f'{base}/repos/{owner}/{repo}/git/blobs/{sha}'}
+
+    def get_tree(self, base: str, body: Any, owner: str, repo: str, sha: str) -> Reply:
+        tree = self._objects.get((owner, repo, 'trees', sha))
+        return 200, tree or {'sha': sha, 'tree': [], 'truncated': False,
+                             'url': f'{base}/repos/{owner}/{repo}/git/trees/{sha}'}
+
+    def create_tree(self, base: str, body: Any, owner: str, repo: str) -> Reply:
+        entries = [dict(entry, sha=entry.get('sha') or git_sha('blob', entry.get('content', '').encode('utf-8')))
+                   for entry in body.get('tree', [])]
+        sha = json_sha('tree', [body.get('base_tree'), entries])
+        tree = {'sha': sha, 'tree': entries, 'truncated': False,
+                'url': f'{base}/repos/{owner}/{repo}/git/trees/{sha}'}
+        self._objects[(owner, repo, 'trees', sha)] = tree
+        return 201, tree
+
+    def git_commit(self, base: str, owner: str, repo: str, sha: str, body: Any = None) -> Dict[str, Any]:
+        """
+        Create the git commit object with the given sha.
+        """
+        body = body or {}
+        author = dict(body.get('author') or {'name': owner, 'email': f'{owner}@example.com'}, date=TIMESTAMP)
+        tree = body.get('tree') or json_sha('tree', [sha])
+        return {
+            'sha': sha,
+            'message': body.get('message', f'Commit {sha[:7]}'),
+            'author': author,
+            'committer': dict(body.get('committer') or author, date=TIMESTAMP),
+            'tree': {'sha': tree, 'url': f'{base}/repos/{owner}/{repo}/git/trees/{tree}'},
+            'parents': [{'sha': parent, 'url': f'{base}/repos/{owner}/{repo}/git/commits/{parent}'}
+                        for parent in body.get('parents', [])],
+            'url': f'{base}/repos/{owner}/{repo}/git/commits/{sha}'
+        }
+
+    def get_git_commit(self, base: str, body: Any, owner: str, repo: str, sha: str) -> Reply:
+        return 200, self._objects.get((owner, repo, 'commits', sha)) or self.git_commit(base, owner, repo, sha)
+
+    def create_git_commit(self, base: str, body: Any, owner: str, repo: str) -> Reply:
+        sha = json_sha('commit', body)
+        commit = self.git_commit(base, owner, repo, sha, body)
+        self._objects[(owner, repo, 'commits', sha)] = commit
+        return 201, commit
+
+    def get_commit(self, base: str, body: Any, owner: str, repo: str, sha: str) -> Reply:
+        if not re.fullmatch(r'[0-9a-f]{40}', sha):
+            sha = self.ref(base, owner, repo, f'heads/{sha}')['object']['sha']
+        commit = self._objects.get((owner, repo, 'commits', sha)) or self.git_commit(base, owner, repo, sha)
+        return 200, {
+            'sha': sha,
+            'commit': commit,
+            'author': user(base, owner),
+            'committer': user(base, owner),
+            'parents': commit['parents'],
+            'files': [],
+            'url': f'{base}/repos/{owner}/{repo}/commits/{sha}'
+        }
+
+
+class Server(server.ThreadingHTTPServer):
+    """
+    HTTP server answering requests with a `FakeGitHub`.
+    """
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], handler: type, fake: FakeGitHub) -> None:
+        super().__init__(address, handler)
+        self.fake = fake
+
+
+class Handler(server.BaseHTTPRequestHandler):
+    """
+    Request handler translating HTTP requests to `FakeGitHub.respond` calls.
+    """
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without this, delayed ACKs stall keep-alive clients ~40ms.
+    disable_nagle_algorithm = True
+    server: Server
+
+    def log_message(self, *args) -> None:
+        return
+
+    def do_GET(self) -> None:
+        self.handle_api_request()
+
+    do_POST = do_PATCH = do_PUT = do_DELETE = do_GET
+
+    def handle_api_request(self) -> None:
+        """
+        Answer the current request.
+
+        :return: Nothing
+        """
+        data = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        try:
+            body = json.loads(data) if data else None
+        except ValueError:
+            return self.reply(400, {'message': 'Problems parsing JSON'}, {})
+
+        base = f'http://{self.headers.get("Host") or self.server.fake.url[len("http://"):]}'
+        path = parse.urlsplit(self.path).path.rstrip('/') or '/'
+        status, reply, headers = self.server.fake.respond(self.command, path, body, base)
+        self.reply(status, reply, headers)
+
+    def reply(self, status: int, body: Any, headers: Dict[str, str]) -> None:
+        """
+        Send a JSON response.
+
+        :param status: HTTP status code
+        :param body: JSON serializable body, or None for no content
+        :param headers: Extra response headers
+        :return: Nothing
+        """
+        data = b'' if body is None else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m probot.fakegithub',
+                                     description='Serve a fake GitHub API for performance testing')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Maximum random seconds added to the latency')
+    parser.add_argument('--rate-limit', type=int, default=5000, help='Requests allowed per rate limit window')
+    parser.add_argument('--rate-limit-window', type=float, default=3600, help='Seconds until the rate limit resets')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Probability of an injected error response')
+    parser.add_argument('--error-status', type=int, default=502, help='Status code of injected errors')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for jitter/error injection')
+    args = parser.parse_args(argv)
+
+    fake = FakeGitHub((args.host, args.port), args.latency, args.jitter, args.rate_limit,
+                      args.rate_limit_window, args.error_rate, args.error_status, args.seed)
+    print(f'Serving fake GitHub API at {fake.url}')
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,15 +4,24 @@
 
     Contains all GitHub specific functionality.
 """
+import asyncio
+import threading
+from typing import Callable, Optional
+
 import ghwht
 
 from github import (Commit, Github, GithubIntegration, GithubException, GitAuthor, GitBlob, GitCommit, GitRef,
                     GitTree, InputGitAuthor, InputGitTreeElement, Issue, Organization, PullRequest, Repository)
 
-from . import log
+from . import auth, defaults, log, metrics, views
 
 LOG = log.get_logger(__name__)
 
+TOKEN_FETCHES_OFFLOADED = metrics.REGISTRY.counter(
+    'probot_token_fetches_offloaded_total',
+    'Installation access token fetches run in an executor to keep the event loop responsive.'
+)
+
 # Alias PyGithub API for cleaner imports.
 Github = Github
 GithubIntegration = GithubIntegration
@@ -72,35 +81,155 @@ ReleaseEvent = ghwht.ReleaseEvent
 RepositoryEvent = ghwht.RepositoryEvent
 
 
+def is_access_revoked(event: EventT) -> bool:
+    """
+    Check if the given event indicates the app no longer has access to its installation.
+
+    :param event: Event to check; either a `ghwht` event or a lazy payload view event
+    :return: True if access was revoked, False otherwise
+    """
+    if isinstance(event, views.Event):
+        return views.is_access_revoked(event)
+    return ghwht.is_access_revoked(event)
+
+
 def create_github_api(event: EventT,
-                      app_id: str,
-                      private_key: str) -> Github:
+                      signer: auth.AppJWT,
+                      base_url: str = defaults.GITHUB_BASE_URL) -> Github:
     """
     Create a new GitHub client for the given event.
 
     If the event doesn't contain installation information (for a GitHub App), or
     the event indicates the app access has been revoked, an unauthenticated client is returned.
 
+    Installation access tokens are cached process-wide until shortly before they expire.
+
     :param event: Event for a GitHub App
-    :param app_id: ID of GitHub App we're running
-    :param private_key: Private key of the GitHub App we're running
+    :param signer: App JWT signer of the GitHub App we're running
+    :param base_url: Base URL of the GitHub API
     :return: GitHub instance
     """
     installation_id = event.payload.get('installation.id')
 
-    if not installation_id or ghwht.is_access_revoked(event):
-        return Github()
-
-    try:
-        integration = GithubIntegration(app_id, private_key)
-        authorization = integration.get_access_token(installation_id)
-    except GithubException as ex:
-        if ex.status not in (403, 404):
-            raise ex
-
-        LOG.warning('Installation %s no longer has access to app %s',
-                    installation_id,
-                    app_id)
-        return Github()
-    else:
-        return Github(authorization.token)
+    if not installation_id:
+        return Github(base_url=base_url)
+
+    key = token_cache_key(signer, installation_id, base_url)
+
+    if is_access_revoked(event):
+        auth.TOKEN_CACHE.invalidate(key)
+        return Github(base_url=base_url)
+
+    def fetch():
+        authorization = auth.Integration(signer, base_url).get_access_token(installation_id)
+        return authorization.token, authorization.expires_at
+
+    token = auth.TOKEN_CACHE.get(key, fetch)
+    if not token:
+        return Github(base_url=base_url)
+    return Github(token, base_url=base_url)
+
+
+class LazyGithub:
+    """
+    Proxy for a GitHub client that is only created (and authenticated) on first use.
+
+    Events whose middleware/handlers never call the GitHub API never mint an installation access token.
+    """
+    def __init__(self,
+                 factory: Callable[[], Github],
+                 requires_fetch: Callable[[], bool] = lambda: True) -> None:
+        self._factory = factory
+        self._requires_fetch = requires_fetch
+        self._client: Optional[Github] = None
+        self._lock = threading.Lock()
+
+    @property
+    def resolved(self) -> bool:
+        """
+        Check if the underlying client has been created.
+        """
+        return self._client is not None
+
+    def resolve(self) -> Github:
+        """
+        Get the underlying client, creating it on first call.
+
+        :return: GitHub instance
+        """
+        client = self._client
+        if client is None:
+            with self._lock:
+                client = self._client
+                if client is None:
+                    client = self._client = self._factory()
+        return client
+
+    async def resolve_async(self) -> Github:
+        """
+        Get the underlying client, creating it in the default executor when that makes a network call.
+
+        :return: GitHub instance
+        """
+        if self.resolved or not self._requires_fetch():
+            return self.resolve()
+
+        TOKEN_FETCHES_OFFLOADED.inc()
+        return await asyncio.get_event_loop().run_in_executor(None, self.resolve)
+
+    def __getattr__(self, name: str):
+        return getattr(self.resolve(), name)
+
+    def __repr__(self) -> str:
+        class_name = self.__class__.__name__
+        return f'{class_name}(resolved={self.resolved!r})'
+
+
+def create_lazy_github_api(event: EventT,
+                           signer: auth.AppJWT,
+                           base_url: str = defaults.GITHUB_BASE_URL) -> LazyGithub:
+    """
+    Create a GitHub client for the given event that authenticates on first attribute access.
+
+    :param event: Event for a GitHub App
+    :param signer: App JWT signer of the GitHub App we're running
+    :param base_url: Base URL of the GitHub API
+    :return: Lazy GitHub instance
+    """
+    return LazyGithub(lambda: create_github_api(event, signer, base_url),
+                      lambda: requires_token_fetch(event, signer, base_url))
+
+
+def token_cache_key(signer: auth.AppJWT,
+                    installation_id: int,
+                    base_url: str = defaults.GITHUB_BASE_URL) -> tuple:
+    """
+    Get the installation access token cache key for the given installation.
+
+    The API base URL is part of the key as installation ids are only unique per GitHub instance.
+
+    :param signer: App JWT signer of the GitHub App we're running
+    :param installation_id: Installation id
+    :param base_url: Base URL of the GitHub API
+    :return: Cache key
+    """
+    return base_url, signer.app_id, installation_id
+
+
+def requires_token_fetch(event: EventT,
+                         signer: auth.AppJWT,
+                         base_url: str = defaults.GITHUB_BASE_URL) -> bool:
+    """
+    Check if creating a GitHub client for the given event would make a network call.
+
+    This is true when the event belongs to an installation whose access token is not cached.
+
+    :param event: Event for a GitHub App
+    :param signer: App JWT signer of the GitHub App we're running
+    :param base_url: Base URL of the GitHub API
+    :return: True if an installation access token must be minted, False otherwise
+    """
+    installation_id = event.payload.get('installation.id')
+    if not installation_id or is_access_revoked(event):
+        return False
+    return auth.TOKEN_CACHE.lookup(token_cache_key(signer, installation_id, base_url)) is None
@@ -0,0 +1,98 @@
+"""
+    probot/instrument
+    ~~~~~~~~~~~~~~~~~
+
+    Contains recorders for per-phase latency of the request pipeline.
+"""
+import abc
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from . import metrics
+
+# Request pipeline phases that are timed.
+VERIFY = 'verify'
+PARSE = 'parse'
+CREATE_CONTEXT = 'create_context'
+AUTHENTICATE = 'authenticate'
+MIDDLEWARE = 'middleware'
+HANDLER = 'handler'
+
+
+class Recorder(metaclass=abc.ABCMeta):
+    """
+    Abstract recorder of request pipeline phase timings.
+    """
+    @abc.abstractmethod
+    def record(self,
+               phase: str,
+               event: str,
+               action: str,
+               target: str,
+               seconds: float) -> None:
+        """
+        Record how long a phase took.
+
+        :param phase: Name of the phase, e.g. 'verify' or 'handler'
+        :param event: Event name, or an empty string when not yet known
+        :param action: Event action, or an empty string when there is none
+        :param target: Qualified name of the middleware/handler run, or an empty string
+        :param seconds: Monotonic duration of the phase
+        :return: Nothing
+        """
+        raise NotImplementedError('Must be implemented by derived class')
+
+
+class HistogramRecorder(Recorder):
+    """
+    Recorder that observes phase timings into a histogram exposed in Prometheus text format.
+    """
+    def __init__(self,
+                 registry: metrics.Registry = metrics.REGISTRY,
+                 buckets: Sequence[float] = metrics.DEFAULT_BUCKETS) -> None:
+        self.registry = registry
+        self.histogram = registry.histogram(
+            'probot_phase_duration_seconds',
+            'Time spent in each phase of handling a webhook delivery.',
+            ('phase', 'event', 'action', 'target'),
+            buckets
+        )
+
+    def record(self,
+               phase: str,
+               event: str,
+               action: str,
+               target: str,
+               seconds: float) -> None:
+        self.histogram.labels(phase, event, action, target).observe(seconds)
+
+    def render(self) -> str:
+        """
+        Render the recorded timings (and all other metrics in the registry) for exposition.
+
+        :return: Prometheus text exposition
+        """
+        return self.registry.render()
+
+
+def event_labels(event: Any) -> Tuple[str, str]:
+    """
+    Get the event name/action labels for the given event.
+
+    :param event: Event to label
+    :return: Event name and action, with an empty string for no action
+    """
+    name = getattr(event.id.name, 'value', event.id.name)
+    action = getattr(event.id.action, 'value', event.id.action)
+    return str(name), '' if action is None else str(action)
+
+
+def qualname(function: Optional[Callable]) -> str:
+    """
+    Get the label for the given middleware/handler function.
+
+    :param function: Function to label
+    :return: Module qualified name of the function
+    """
+    if function is None:
+        return ''
+    return f'{getattr(function, "__module__", "")}.{getattr(function, "__qualname__", repr(function))}'
@@ -5,9 +5,67 @@
     Contains functionality for logging.
 """
 import logging
+import threading
+from typing import Any, Dict, MutableMapping, Tuple
 
 LOG = logging.getLogger(__package__)
 
+# Parent logger of the per-event-name loggers used by event contexts.
+EVENTS_LOG = LOG.getChild('events')
+
+# Per-event-name loggers, keyed by event name. Bounded by the set of GitHub event names.
+EVENT_LOGGERS: Dict[str, logging.Logger] = {}
+EVENT_LOGGERS_LOCK = threading.Lock()
+
 
 def get_logger(name):
     return LOG.getChild(name)
+
+
+def get_event_logger(name: str) -> logging.Logger:
+    """
+    Get the shared logger for events with the given name.
+
+    :param name: Event name, e.g. 'pull_request'
+    :return: Logger
+    """
+    logger = EVENT_LOGGERS.get(name)
+    if logger is None:
+        with EVENT_LOGGERS_LOCK:
+            logger = EVENT_LOGGERS.get(name)
+            if logger is None:
+                logger = EVENT_LOGGERS[name] = EVENTS_LOG.getChild(name)
+    return logger
+
+
+class EventLoggerAdapter(logging.LoggerAdapter):
+    """
+    Logger adapter that attaches the fields of a single webhook delivery to every record.
+
+    Fields are set as attributes on the log record (e.g. `%(delivery_id)s` in a format string),
+    merged with any `extra` passed to the individual logging call.
+    """
+    def process(self, msg: Any, kwargs: MutableMapping[str, Any]) -> Tuple[Any, MutableMapping[str, Any]]:
+        extra = kwargs.get('extra')
+        kwargs['extra'] = {**self.extra, **extra} if extra else self.extra
+        return msg, kwargs
+
+
+def get_event_log(event) -> EventLoggerAdapter:
+    """
+    Get a logger for the given webhook event.
+
+    The underlying logger is shared by all events with the same name, so nothing is
+    retained per delivery once the event is done.
+
+    :param event: Event to log for
+    :return: Logger adapter carrying the delivery id, event, installation and repository
+    """
+    name = getattr(event.id.name, 'value', event.id.name)
+    payload = event.payload
+    return EventLoggerAdapter(get_event_logger(str(name)), {
+        'delivery_id': str(getattr(event, 'delivery_id', None)),
+        'event': str(event.id),
+        'installation_id': payload.get('installation.id'),
+        'repository': payload.get('repository.full_name')
+    })
@@ -0,0 +1,398 @@
+"""
+    probot/metrics
+    ~~~~~~~~~~~~~~
+
+    Contains lightweight in-process metrics with Prometheus text exposition.
+"""
+import bisect
+import math
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Default histogram buckets (seconds) for latency metrics.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Type alias for label values of a metric child.
+LabelValues = Tuple[str, ...]
+
+
+class CounterValue:
+    """
+    Value of a monotonically increasing counter.
+    """
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        """
+        Increment the counter.
+
+        :param amount: Amount to increment by
+        :return: Nothing
+        """
+        with self._lock:
+            self.value += amount
+
+
+class GaugeValue:
+    """
+    Value of a gauge that can go up and down or be computed on demand.
+    """
+    def __init__(self) -> None:
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        """
+        Set the gauge to the given value.
+
+        :param value: Value to set
+        :return: Nothing
+        """
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        """
+        Increment the gauge.
+
+        :param amount: Amount to increment by
+        :return: Nothing
+        """
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        """
+        Decrement the gauge.
+
+        :param amount: Amount to decrement by
+        :return: Nothing
+        """
+        with self._lock:
+            self.value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """
+        Compute the gauge value by calling the given function at exposition time.
+
+        :param function: Function returning the current value
+        :return: Nothing
+        """
+        self.function = function
+
+    def get(self) -> float:
+        """
+        Get the current gauge value.
+
+        :return: Value
+        """
+        return self.function() if self.function else self.value
+
+
+class HistogramValue:
+    """
+    Value of a histogram with fixed upper bound buckets.
+    """
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """
+        Record an observation.
+
+        :param value: Value to record
+        :return: Nothing
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def cumulative(self) -> Iterator[Tuple[float, int]]:
+        """
+        Iterate cumulative counts for each bucket upper bound, ending with +Inf.
+
+        :return: Iterator of (upper bound, cumulative count)
+        """
+        total = 0
+        for bound, count in zip(list(self.buckets) + [math.inf], self.counts):
+            total += count
+            yield bound, total
+
+
+class Metric:
+    """
+    Base class for a named metric with optional labels.
+    """
+    type = ''
+
+    def __init__(self,
+                 name: str,
+                 documentation: str,
+                 labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children: Dict[LabelValues, object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *labelvalues: str):
+        """
+        Get the child value for the given label values, creating it when needed.
+
+        :param labelvalues: Values for each label name, in order
+        :return: Child value
+        """
+        child = self.children.get(labelvalues)
+        if child is None:
+            if len(labelvalues) != len(self.labelnames):
+                raise ValueError(f'Metric {self.name} expects labels {self.labelnames}')
+            with self._lock:
+                child = self.children.get(labelvalues)
+                if child is None:
+                    child = self.children[labelvalues] = self.new_child()
+        return child
+
+    def new_child(self):
+        """
+        Create a new child value for this metric.
+
+        :return: Child value
+        """
+        raise NotImplementedError('Must be implemented by derived class')
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """
+        Iterate all samples of this metric.
+
+        :return: Iterator of (sample name, formatted labels, value)
+        """
+        raise NotImplementedError('Must be implemented by derived class')
+
+    def format_labels(self,
+                      labelvalues: LabelValues,
+                      extra: Optional[Tuple[str, str]] = None) -> str:
+        """
+        Format the given label values for exposition.
+
+        :param labelvalues: Values for each label name
+        :param extra: Optional additional label name/value pair
+        :return: Formatted labels
+        """
+        pairs = list(zip(self.labelnames, labelvalues))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{escape(str(value))}"' for name, value in pairs) + '}'
+
+
+class Counter(Metric):
+    """
+    Metric for monotonically increasing counts.
+    """
+    type = 'counter'
+
+    def new_child(self) -> CounterValue:
+        return CounterValue()
+
+    def inc(self, amount: float = 1) -> None:
+        """
+        Increment the unlabelled counter.
+
+        :param amount: Amount to increment by
+        :return: Nothing
+        """
+        self.labels().inc(amount)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        for labelvalues, child in list(self.children.items()):
+            yield self.name, self.format_labels(labelvalues), child.value
+
+
+class Gauge(Metric):
+    """
+    Metric for values that can go up and down.
+    """
+    type = 'gauge'
+
+    def new_child(self) -> GaugeValue:
+        return GaugeValue()
+
+    def set(self, value: float) -> None:
+        """
+        Set the unlabelled gauge to the given value.
+
+        :param value: Value to set
+        :return: Nothing
+        """
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1) -> None:
+        """
+        Increment the unlabelled gauge.
+
+        :param amount: Amount to increment by
+        :return: Nothing
+        """
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        """
+        Decrement the unlabelled gauge.
+
+        :param amount: Amount to decrement by
+        :return: Nothing
+        """
+        self.labels().dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """
+        Compute the unlabelled gauge by calling the given function at exposition time.
+
+        :param function: Function returning the current value
+        :return: Nothing
+        """
+        self.labels().set_function(function)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        for labelvalues, child in list(self.children.items()):
+            yield self.name, self.format_labels(labelvalues), child.get()
+
+
+class Histogram(Metric):
+    """
+    Metric for distributions of observed values, such as latencies.
+    """
+    type = 'histogram'
+
+    def __init__(self,
+                 name: str,
+                 documentation: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def new_child(self) -> HistogramValue:
+        return HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """
+        Record an observation on the unlabelled histogram.
+
+        :param value: Value to record
+        :return: Nothing
+        """
+        self.labels().observe(value)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        for labelvalues, child in list(self.children.items()):
+            for bound, count in child.cumulative():
+                le = '+Inf' if bound == math.inf else repr(float(bound))
+                yield self.name + '_bucket', self.format_labels(labelvalues, ('le', le)), count
+            yield self.name + '_sum', self.format_labels(labelvalues), child.sum
+            yield self.name + '_count', self.format_labels(labelvalues), child.count
+
+
+class Registry:
+    """
+    Collection of metrics exposed together.
+
+    Metrics are created through the registry so that defining the same metric more than
+    once (e.g. several apps in one process) returns the existing instance.
+    """
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """
+        Get or create the counter with the given name.
+        """
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """
+        Get or create the gauge with the given name.
+        """
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self,
+                  name: str,
+                  documentation: str,
+                  labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """
+        Get or create the histogram with the given name.
+        """
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def register(self, metric: Metric):
+        """
+        Register the given metric, returning the existing one if the name is already taken.
+
+        :param metric: Metric to register
+        :return: Registered metric
+        """
+        with self._lock:
+            existing = self.metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f'Metric {metric.name} already registered as {existing.type}')
+                return existing
+            self.metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        :return: Exposition text
+        """
+        lines: List[str] = []
+        for metric in list(self.metrics.values()):
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {format_value(value)}')
+        lines.append('')
+        return '\n'.join(lines)
+
+
+def escape(value: str) -> str:
+    """
+    Escape a label value for exposition.
+
+    :param value: Label value
+    :return: Escaped value
+    """
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def format_value(value: float) -> str:
+    """
+    Format a sample value for exposition.
+
+    :param value: Sample value
+    :return: Formatted value
+    """
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    return repr(float(value))
+
+
+# Process-wide metrics registry.
+REGISTRY = Registry()
+
+# Content type of the Prometheus text exposition format.
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
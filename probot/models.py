@@ -5,12 +5,13 @@
     Contains commonly used model types.
 """
 import enum
+import json
 
-from typing import Any, Dict, Generic, List, TypeVar
+from typing import Any, Dict, Generic, Iterable, Iterator, List, Mapping, Optional, Tuple, TypeVar, Union
 
-from pydantic import BaseSettings, BaseModel, Field, ValidationError
+from pydantic import BaseSettings, Field, ValidationError
 
-from . import defaults, descriptors, errors, github, log
+from . import codec, defaults, descriptors, errors, github, log
 
 # Alias the 'github' module API for cleaner imports.
 new_event = github.new_event
@@ -42,12 +43,41 @@ EventT = TypeVar('EventT', bound=github.Event)
 class Settings(BaseSettings):
     """
     Contains probot settings.
+
+    For ASGI apps, `prefetch_token` (on by default) fetches the installation access token off the
+    event loop before middleware/handlers that use it run. The calls PyGithub makes from handlers,
+    including the `Context.repo`/`issue`/`pull_request`/`comment` helpers, are still blocking
+    HTTP requests; async handlers should run them with `loop.run_in_executor`. Turning
+    `prefetch_token` off also makes the first `context.github` use of an event block the loop
+    unless handlers use `await context.github_async()`.
     """
     app_id: str
     private_key: str
     webhook_secret: str
 
     webhook_path: str = Field(default=defaults.PATH)
+    loop_monitor_interval: float = Field(default=defaults.LOOP_MONITOR_INTERVAL)
+    http_pool_size: int = Field(default=defaults.HTTP_POOL_SIZE, ge=1)
+    handler_concurrency: int = Field(default=defaults.HANDLER_CONCURRENCY, ge=1)
+    background_workers: int = Field(default=defaults.BACKGROUND_WORKERS, ge=0)
+    background_queue_size: int = Field(default=defaults.BACKGROUND_QUEUE_SIZE, ge=1)
+    spool_path: Optional[str] = Field(default=None)
+    dedup_backend: Optional[str] = Field(default=None)
+    dedup_ttl: float = Field(default=defaults.DEDUP_TTL, gt=0)
+    dedup_size: int = Field(default=defaults.DEDUP_SIZE, ge=1)
+    dedup_path: Optional[str] = Field(default=None)
+    json_codec: Optional[str] = Field(default=None)
+    max_body_size: int = Field(default=defaults.MAX_BODY_SIZE, gt=0)
+    lazy_events: bool = Field(default=False)
+    prefetch_token: bool = Field(default=defaults.PREFETCH_TOKEN)
+    phase_metrics: bool = Field(default=False)
+    metrics_path: Optional[str] = Field(default=None)
+    github_base_url: str = Field(default=defaults.GITHUB_BASE_URL)
+    capture_path: Optional[str] = Field(default=None)
+    capture_sample_rate: float = Field(default=1.0, ge=0, le=1)
+    capture_sample_rates: Dict[str, float] = Field(default_factory=dict)
+    capture_rotate_size: int = Field(default=defaults.CAPTURE_ROTATE_SIZE, gt=0)
+    capture_buffer_size: int = Field(default=defaults.CAPTURE_BUFFER_SIZE, ge=1)
 
     class Config:
         env_file = defaults.ENV_FILE
@@ -78,37 +108,161 @@ class LifecycleEvent(str, enum.Enum):
     Shutdown = 'shutdown'
 
 
+class Headers(Mapping[str, str]):
+    """
+    Case-insensitive mapping of HTTP headers.
+
+    Used for requests that are rebuilt outside of a web framework, e.g. replayed from disk.
+    """
+    def __init__(self, headers: Union[Mapping[str, str], Iterable[Tuple[str, str]]] = ()) -> None:
+        items = headers.items() if isinstance(headers, Mapping) else headers
+        self._headers = {name.lower(): (name, value) for name, value in items}
+
+    def __getitem__(self, name: str) -> str:
+        return self._headers[name.lower()][1]
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name.lower() in self._headers
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name, _ in self._headers.values())
+
+    def __len__(self) -> int:
+        return len(self._headers)
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({dict(self.items())!r})'
+
+
 class Request:
     """
     Represents a framework agnostic HTTP request.
 
+    The JSON body is decoded from `body_raw` the first time `body_json` is accessed, so
+    requests that are rejected early never pay for decoding.
+
+    Adapters that verify the webhook signature while streaming the body in mark the request
+    as `verified` so it is not hashed a second time.
+
     TODO - Add helper methods for translating framework-specific request models
     into this type upon creation.
     """
     def __init__(self,
                  method: str,
                  body_raw: bytes,
-                 body_json: Dict[str, Any],
+                 body_json: Optional[Dict[str, Any]] = None,
                  query: Dict[str, List[str]] = None,
-                 headers: Dict[str, List[str]] = None) -> None:
+                 headers: Dict[str, List[str]] = None,
+                 decoder: Optional[codec.Decoder] = None,
+                 verified: bool = False) -> None:
         self.method = method
         self.body_raw = body_raw
-        self.body_json = body_json
         self.query = query
         self.headers = headers
+        self.decoder = decoder or codec.loads
+        self.verified = verified
+        self._body_json = body_json
+
+    @property
+    def body_json(self) -> Dict[str, Any]:
+        """
+        Get the decoded JSON body, decoding it on first access.
+        """
+        if self._body_json is None:
+            self._body_json = self.decoder(self.body_raw)
+        return self._body_json
+
+    @body_json.setter
+    def body_json(self, value: Dict[str, Any]) -> None:
+        self._body_json = value
 
 
 # TypeVar for types that derive from :class:`~probot.models.Request`.
 RequestT = TypeVar('RequestT', bound=Request)
 
 
-class Response(BaseModel):
+class Response:
     """
     Represents a framework agnostic HTTP response.
+
+    Responses keep the `dict()`, `json()` and `copy()` methods of the pydantic model they replaced.
+    Like a (non-frozen) pydantic model, a response compares by value and is unhashable; only
+    :class:`~probot.models.ImmutableResponse` can be hashed.
     """
-    status_code: int = 200
-    content: str = ''
-    headers: Any = None
+    __slots__ = ('status_code', 'content', 'headers')
+
+    def __init__(self,
+                 status_code: int = 200,
+                 content: str = '',
+                 headers: Any = None) -> None:
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Response):
+            return NotImplemented
+        return (self.status_code, self.content, self.headers) == (other.status_code, other.content, other.headers)
+
+    __hash__ = None  # type: ignore
+
+    def dict(self) -> Dict[str, Any]:
+        """
+        Get the response fields as a dict.
+
+        :return: Dict of field name to value
+        """
+        return {'status_code': self.status_code, 'content': self.content, 'headers': self.headers}
+
+    def json(self, **kwargs: Any) -> str:
+        """
+        Get the response fields as a JSON string.
+
+        :param kwargs: Keyword arguments passed to `json.dumps`
+        :return: JSON string
+        """
+        return json.dumps(self.dict(), **kwargs)
+
+    def copy(self, update: Optional[Dict[str, Any]] = None) -> 'Response':
+        """
+        Create a mutable copy of the response.
+
+        :param update: Field values to change in the copy
+        :return: Response
+        """
+        return Response(**{**self.dict(), **(update or {})})
+
+    def __repr__(self) -> str:
+        class_name = self.__class__.__name__
+        return f'{class_name}(status_code={self.status_code!r}, content={self.content!r}, headers={self.headers!r})'
+
+
+class ImmutableResponse(Response):
+    """
+    Response that cannot be modified, so a single instance can be shared by every request.
+
+    It is hashable on its status code and content (headers may be an unhashable mapping); equal
+    responses have equal hashes since equality also compares those fields.
+    """
+    __slots__ = ()
+
+    def __init__(self,
+                 status_code: int = 200,
+                 content: str = '',
+                 headers: Any = None) -> None:
+        object.__setattr__(self, 'status_code', status_code)
+        object.__setattr__(self, 'content', content)
+        object.__setattr__(self, 'headers', headers)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f'{self.__class__.__name__} cannot be modified')
+
+    def __hash__(self) -> int:
+        return hash((self.status_code, self.content))
+
+
+# Shared 200 OK response returned when nothing more specific is needed.
+OK = ImmutableResponse(status_code=200)
 
 
 # TypeVar for types that derive from :class:`~probot.models.Response`.
@@ -124,7 +278,26 @@ class Context(Generic[EventT]):
                  github: github.Github) -> None:
         self.event = event
         self.github = github
-        self.log = log.get_logger(str(event.id))
+
+    @descriptors.cached
+    def log(self) -> log.EventLoggerAdapter:
+        """
+        Create a memoized logger that tags records with the event delivery id, installation and repository.
+        """
+        return log.get_event_log(self.event)
+
+    async def github_async(self) -> github.Github:
+        """
+        Get the GitHub client, authenticating it off the event loop on first use.
+
+        Async middleware/handlers should use this rather than `github` when the installation
+        access token may not be cached yet, as minting one is a blocking network call.
+
+        :return: GitHub instance
+        """
+        if isinstance(self.github, github.LazyGithub):
+            return await self.github.resolve_async()
+        return self.github
 
     @property
     def is_bot(self) -> bool:
@@ -132,7 +305,10 @@ class Context(Generic[EventT]):
         Check if event sender is a bot user.
         """
         sender = self.event.payload.get('sender')
-        return sender and sender.type == TargetType.Bot
+        if not sender:
+            return False
+        # Views expose the raw 'Bot' string while ghwht events may expose a TargetType member.
+        return getattr(sender.type, 'value', sender.type) == 'Bot'
 
     @descriptors.cached
     def default_branch(self) -> Issue:
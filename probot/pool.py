@@ -0,0 +1,186 @@
+"""
+    probot/pool
+    ~~~~~~~~~~~
+
+    Contains the process-wide HTTP connection pool shared by all GitHub clients.
+"""
+import collections
+import threading
+from typing import Any, Optional
+
+import requests
+from github import Requester
+from requests import adapters
+
+from . import defaults, log, metrics
+
+LOG = log.get_logger(__name__)
+
+GITHUB_REQUESTS = metrics.REGISTRY.counter(
+    'probot_github_api_requests_total',
+    'Requests made to the GitHub API, by method and response status code.',
+    ('method', 'status')
+)
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP session shared by every GitHub client created in this process.
+
+    PyGithub creates a new `requests.Session` for each client by default, so every webhook event
+    pays a fresh TCP/TLS handshake to the GitHub API. Routing all clients through one session lets
+    them reuse warm connections.
+
+    Clients created with PyGithub's `retry` option share a separate session per retry configuration,
+    as retries are set on the session's transport adapter. Only the most recently used
+    `defaults.HTTP_RETRY_SESSIONS` of those are kept.
+    """
+    def __init__(self, size: int = defaults.HTTP_POOL_SIZE) -> None:
+        self.size = size
+        self.session = create_session(size)
+        self._retry_sessions: collections.OrderedDict = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def session_for(self, retry: Any = None) -> requests.Session:
+        """
+        Get the session to send a request with the given retry configuration through.
+
+        :param retry: Retry count or `urllib3.Retry` given to PyGithub, or None
+        :return: Session
+        """
+        if not retry:
+            return self.session
+
+        with self._lock:
+            session = self._retry_sessions.get(retry)
+            if session is None:
+                session = self._retry_sessions[retry] = create_session(self.size, retry)
+                while len(self._retry_sessions) > defaults.HTTP_RETRY_SESSIONS:
+                    self._retry_sessions.popitem(last=False)
+            else:
+                self._retry_sessions.move_to_end(retry)
+        return session
+
+    def resize(self, size: int) -> None:
+        """
+        Resize the pool, replacing the shared session when the size changes.
+
+        :param size: Number of connections to keep open per host
+        :return: Nothing
+        """
+        with self._lock:
+            if size == self.size:
+                return
+            previous = self.session
+            self.session = create_session(size)
+            self.size = size
+            self._retry_sessions.clear()
+        previous.close()
+
+
+def create_session(size: int, retry: Any = None) -> requests.Session:
+    """
+    Create a keep-alive session holding up to `size` connections per host.
+
+    :param size: Number of connections to keep open per host
+    :param retry: Retry count or `urllib3.Retry` for failed requests, or None for the requests default
+    :return: Session
+    """
+    session = requests.Session()
+    if retry is None:
+        adapter = adapters.HTTPAdapter(pool_connections=size, pool_maxsize=size)
+    else:
+        adapter = adapters.HTTPAdapter(pool_connections=size, pool_maxsize=size, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# Process-wide connection pool.
+POOL = ConnectionPool()
+
+
+class PooledConnection:
+    """
+    PyGithub connection class that sends requests through the shared connection pool.
+
+    This mimics the interface PyGithub expects from its connection classes.
+    """
+    protocol = 'https'
+    default_port = 443
+
+    def __init__(self,
+                 host: str,
+                 port: Optional[int] = None,
+                 strict: bool = False,
+                 timeout: Optional[float] = None,
+                 retry: Any = None,
+                 **kwargs) -> None:
+        self.host = host
+        self.port = port or self.default_port
+        self.timeout = timeout or defaults.HTTP_TIMEOUT
+        self.retry = retry
+        self.verify = kwargs.get('verify', True)
+        self.verb = None
+        self.url = None
+        self.input = None
+        self.headers = None
+
+    def request(self, verb: str, url: str, input, headers) -> None:
+        """
+        Store the request to send on the following `getresponse` call.
+        """
+        self.verb = verb
+        self.url = url
+        self.input = input
+        self.headers = headers
+
+    def getresponse(self) -> Requester.RequestsResponse:
+        """
+        Send the stored request through the shared session.
+        """
+        response = POOL.session_for(self.retry).request(
+            self.verb,
+            f'{self.protocol}://{self.host}:{self.port}{self.url}',
+            headers=self.headers,
+            data=self.input,
+            timeout=self.timeout,
+            verify=self.verify,
+            allow_redirects=False
+        )
+        GITHUB_REQUESTS.labels(self.verb, str(response.status_code)).inc()
+        return Requester.RequestsResponse(response)
+
+    def close(self) -> None:
+        """
+        Nothing to close; connections belong to the shared pool and outlive any single client.
+        """
+        return
+
+
+class PooledHTTPConnection(PooledConnection):
+    """
+    Pooled connection class for plain HTTP GitHub API endpoints.
+    """
+    protocol = 'http'
+    default_port = 80
+
+
+class PooledHTTPSConnection(PooledConnection):
+    """
+    Pooled connection class for HTTPS GitHub API endpoints.
+    """
+    protocol = 'https'
+    default_port = 443
+
+
+def install(size: int = defaults.HTTP_POOL_SIZE) -> None:
+    """
+    Route all PyGithub clients through the shared connection pool.
+
+    :param size: Number of connections to keep open per host
+    :return: Nothing
+    """
+    POOL.resize(size)
+    Requester.Requester.injectConnectionClasses(PooledHTTPConnection, PooledHTTPSConnection)
+    LOG.debug('Using shared GitHub connection pool with %s connections per host', size)
@@ -0,0 +1,390 @@
+"""
+    probot/replay
+    ~~~~~~~~~~~~~
+
+    Contains a command line tool for replaying recorded webhook deliveries through a probot app.
+
+    Usage: python -m probot.replay module:probot recording [recording ...] [--rate N] [--concurrency N]
+                                   [--resign] [--time-compression F]
+
+    Recordings are either capture files written by `probot.capture` or JSONL files, optionally
+    gzip compressed. Each line of a JSONL recording is an object with `headers` (mapping), the raw
+    body as either `body` (text) or `body_base64`, and optionally `received_at` (unix timestamp).
+
+    Exits with status 1 if any delivery was answered with an error (4xx/5xx) status.
+"""
+import argparse
+import asyncio
+import base64
+import gzip
+import importlib
+import inspect
+import io
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent import futures
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import auth, base, capture, errors, log, models
+
+LOG = log.get_logger(__name__)
+
+# Leading bytes of a gzip stream.
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+class Delivery:
+    """
+    Recorded webhook delivery.
+    """
+    def __init__(self,
+                 headers: Dict[str, str],
+                 body: bytes,
+                 received_at: Optional[float] = None) -> None:
+        self.headers = headers
+        self.body = body
+        self.received_at = received_at
+
+    def to_request(self, decoder=None) -> models.Request:
+        """
+        Build the probot request for this delivery.
+
+        :param decoder: JSON decoder for the body
+        :return: Request
+        """
+        return models.Request(
+            method='POST',
+            body_raw=self.body,
+            headers=models.Headers(self.headers),
+            decoder=decoder
+        )
+
+
+def open_recording(path: str) -> IO[bytes]:
+    """
+    Open a recording, transparently decompressing gzip files.
+
+    :param path: Path of the recording
+    :return: Binary file object
+    """
+    f = open(path, 'rb')
+    if f.peek(2)[:2] == GZIP_MAGIC:
+        f.close()
+        return gzip.open(path, 'rb')
+    return f
+
+
+def read_jsonl(f: IO[bytes]) -> Iterator[Delivery]:
+    """
+    Read deliveries from a JSONL recording.
+
+    :param f: Binary file object
+    :return: Iterator of deliveries
+    """
+    text = io.TextIOWrapper(f, encoding='utf-8')
+    try:
+        for line in text:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'body_base64' in record:
+                body = base64.b64decode(record['body_base64'])
+            else:
+                body = record['body'].encode('utf-8')
+            yield Delivery(record['headers'], body, record.get('received_at'))
+    finally:
+        # Leave closing `f` to the caller.
+        text.detach()
+
+
+def read_deliveries(path: str) -> Iterator[Delivery]:
+    """
+    Read deliveries from the recording at the given path.
+
+    :param path: Path of a capture file or JSONL recording, optionally gzip compressed
+    :return: Iterator of deliveries
+    """
+    with open_recording(path) as f:
+        if capture.is_capture(f):
+            for headers, body, received_at in capture.read_records(f):
+                yield Delivery(headers, body, received_at)
+        else:
+            yield from read_jsonl(f)
+
+
+def resign(delivery: Delivery,
+           signature: auth.WebhookSignature,
+           app_id: str) -> Delivery:
+    """
+    Re-sign the given delivery for the local app so it passes verification.
+
+    :param delivery: Recorded delivery
+    :param signature: Webhook signature keyed with the local webhook secret
+    :param app_id: Local GitHub App id
+    :return: Re-signed delivery
+    """
+    headers = {name: value for name, value in delivery.headers.items()
+               if name.lower() not in ('x-hub-signature', 'x-hub-signature-256',
+                                       'x-github-hook-installation-target-id')}
+    for header, algorithm in auth.SIGNATURE_HEADERS:
+        obj = signature.new(algorithm)
+        obj.update(delivery.body)
+        headers[header] = f'{algorithm}={obj.hexdigest()}'
+    headers['X-GitHub-Hook-Installation-Target-ID'] = app_id
+    return Delivery(headers, delivery.body, delivery.received_at)
+
+
+def schedule(deliveries: Iterable[Delivery],
+             rate: float = 0,
+             time_compression: float = 0) -> Iterator[Tuple[Delivery, float]]:
+    """
+    Pair each delivery with the offset (seconds from the start) it should be sent at.
+
+    With a time compression factor, recorded arrival times are replayed that many times faster;
+    otherwise deliveries are paced at `rate` per second, or sent as fast as possible.
+
+    :param deliveries: Deliveries to send
+    :param rate: Deliveries per second; zero for unthrottled
+    :param time_compression: Factor to speed up recorded arrival times by; zero to ignore them
+    :return: Iterator of (delivery, offset)
+    """
+    first = None
+    for index, delivery in enumerate(deliveries):
+        if time_compression > 0 and delivery.received_at is not None:
+            first = delivery.received_at if first is None else first
+            yield delivery, (delivery.received_at - first) / time_compression
+        elif rate > 0:
+            yield delivery, index / rate
+        else:
+            yield delivery, 0.0
+
+
+class Summary:
+    """
+    Collects the outcome of replayed deliveries.
+    """
+    def __init__(self) -> None:
+        self.statuses: Counter = Counter()
+        self.latencies: List[float] = []
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, status: int, latency: float) -> None:
+        """
+        Record the outcome of one delivery.
+
+        :param status: Response status code
+        :param latency: Seconds taken by `on_request`
+        :return: Nothing
+        """
+        with self._lock:
+            self.statuses[status] += 1
+            self.latencies.append(latency)
+
+    def finish(self) -> None:
+        """
+        Mark the replay as finished.
+
+        :return: Nothing
+        """
+        self.finished = time.perf_counter()
+
+    @property
+    def failed(self) -> int:
+        """
+        Get the number of deliveries answered with an error status.
+
+        :return: Deliveries with a 4xx/5xx status
+        """
+        return sum(n for status, n in self.statuses.items() if status >= 400)
+
+    def report(self) -> str:
+        """
+        Render a throughput/latency summary.
+
+        :return: Summary text
+        """
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        count = len(self.latencies)
+        lines = [
+            f'Deliveries:  {count}',
+            f'Elapsed:     {elapsed:.2f}s',
+            f'Throughput:  {count / elapsed if elapsed else 0:.1f}/s',
+            'Statuses:    ' + ', '.join(f'{status}={n}' for status, n in sorted(self.statuses.items()))
+        ]
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            for name, pct in (('p50', 50), ('p90', 90), ('p99', 99)):
+                lines.append(f'Latency {name}: {ordered[min(int(pct / 100 * count), count - 1)] * 1e3:.2f}ms')
+            lines.append(f'Latency max: {ordered[-1] * 1e3:.2f}ms')
+        return '\n'.join(lines)
+
+
+def status_for(ex: Exception) -> int:
+    """
+    Get the status code to record for an exception raised by `on_request`.
+
+    :param ex: Exception raised
+    :return: Status code
+    """
+    if isinstance(ex, errors.HTTPException):
+        return ex.status_code
+    LOG.exception('Replayed delivery failed', exc_info=ex)
+    return 500
+
+
+async def replay_async(app: base.App,
+                       deliveries: Iterable[Tuple[Delivery, float]],
+                       concurrency: int,
+                       summary: Summary) -> None:
+    """
+    Replay deliveries through an ASGI app.
+
+    :param app: App to replay through
+    :param deliveries: Deliveries paired with their send offsets
+    :param concurrency: Maximum deliveries in flight
+    :param summary: Summary to record outcomes in
+    :return: Nothing
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_event_loop()
+    start = loop.time()
+    tasks = []
+
+    async def send(delivery: Delivery) -> None:
+        started = time.perf_counter()
+        try:
+            status = (await app.on_request(delivery.to_request(app.adapter.json_decoder))).status_code
+        except Exception as ex:
+            status = status_for(ex)
+        finally:
+            semaphore.release()
+        summary.add(status, time.perf_counter() - started)
+
+    await app.on_lifecycle_event(models.LifecycleEvent.Startup)
+    try:
+        for delivery, offset in deliveries:
+            delay = start + offset - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await semaphore.acquire()
+            tasks.append(loop.create_task(send(delivery)))
+        await asyncio.gather(*tasks)
+    finally:
+        await app.on_lifecycle_event(models.LifecycleEvent.Shutdown)
+
+
+def replay_sync(app: base.App,
+                deliveries: Iterable[Tuple[Delivery, float]],
+                concurrency: int,
+                summary: Summary) -> None:
+    """
+    Replay deliveries through a WSGI app on a thread pool.
+
+    :param app: App to replay through
+    :param deliveries: Deliveries paired with their send offsets
+    :param concurrency: Maximum deliveries in flight
+    :param summary: Summary to record outcomes in
+    :return: Nothing
+    """
+    semaphore = threading.BoundedSemaphore(concurrency)
+    start = time.monotonic()
+
+    def send(delivery: Delivery) -> None:
+        started = time.perf_counter()
+        try:
+            status = app.on_request(delivery.to_request(app.adapter.json_decoder)).status_code
+        except Exception as ex:
+            status = status_for(ex)
+        finally:
+            semaphore.release()
+        summary.add(status, time.perf_counter() - started)
+
+    app.on_lifecycle_event(models.LifecycleEvent.Startup)
+    try:
+        with futures.ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='probot-replay') as executor:
+            for delivery, offset in deliveries:
+                delay = start + offset - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                semaphore.acquire()
+                executor.submit(send, delivery)
+    finally:
+        app.on_lifecycle_event(models.LifecycleEvent.Shutdown)
+
+
+def load_probot(target: str) -> base.Probot:
+    """
+    Import the probot instance named by the given `module:attribute` string.
+
+    :param target: Import path of the probot, e.g. 'mybot.app:probot'
+    :return: Probot
+    """
+    module_name, _, attribute = target.partition(':')
+    if not attribute:
+        raise errors.SettingsException(f'Target "{target}" must be in "module:attribute" form')
+    probot = importlib.import_module(module_name)
+    for name in attribute.split('.'):
+        probot = getattr(probot, name)
+    return probot
+
+
+def replay(probot: base.Probot,
+           deliveries: Iterable[Delivery],
+           rate: float = 0,
+           concurrency: int = 1,
+           resign_deliveries: bool = False,
+           time_compression: float = 0) -> Summary:
+    """
+    Replay the given deliveries through the `on_request` handler of the given probot.
+
+    :param probot: Probot to replay through
+    :param deliveries: Recorded deliveries
+    :param rate: Deliveries per second; zero for unthrottled
+    :param concurrency: Maximum deliveries in flight
+    :param resign_deliveries: Re-sign deliveries with the local webhook secret and app id
+    :param time_compression: Factor to speed up recorded arrival times by; zero to ignore them
+    :return: Summary of the replay
+    """
+    app = probot.app
+    if resign_deliveries:
+        signature = auth.WebhookSignature(probot.settings.webhook_secret)
+        deliveries = (resign(delivery, signature, probot.settings.app_id) for delivery in deliveries)
+
+    paced = schedule(deliveries, rate, time_compression)
+    summary = Summary()
+    if inspect.iscoroutinefunction(app.on_request):
+        asyncio.run(replay_async(app, paced, concurrency, summary))
+    else:
+        replay_sync(app, paced, concurrency, summary)
+    summary.finish()
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m probot.replay',
+                                     description='Replay recorded webhook deliveries through a probot app')
+    parser.add_argument('target', help='Probot instance to replay through, as "module:attribute"')
+    parser.add_argument('recordings', nargs='+', help='Capture files or JSONL recordings, optionally gzip compressed')
+    parser.add_argument('--rate', type=float, default=0, help='Deliveries per second; 0 for unthrottled')
+    parser.add_argument('--concurrency', type=int, default=1, help='Maximum deliveries in flight')
+    parser.add_argument('--resign', action='store_true',
+                        help='Re-sign deliveries with the local webhook secret and app id')
+    parser.add_argument('--time-compression', type=float, default=0,
+                        help='Replay recorded arrival times this many times faster; 0 to ignore them')
+    args = parser.parse_args(argv)
+
+    probot = load_probot(args.target)
+    deliveries = (delivery for path in args.recordings for delivery in read_deliveries(path))
+    summary = replay(probot, deliveries, args.rate, max(args.concurrency, 1), args.resign, args.time_compression)
+    print(summary.report())
+    return 1 if summary.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
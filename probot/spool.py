@@ -0,0 +1,233 @@
+"""
+    probot/spool
+    ~~~~~~~~~~~~
+
+    Contains the durable on-disk spool of verified webhook deliveries.
+"""
+import json
+import sqlite3
+import threading
+import time
+from concurrent import futures
+from typing import Iterator, List, Optional, Tuple
+
+from . import log, metrics, models
+
+LOG = log.get_logger(__name__)
+
+SPOOL_COMMIT = metrics.REGISTRY.histogram(
+    'probot_spool_commit_seconds',
+    'Time taken to durably commit a batch of deliveries to the spool.'
+)
+SPOOL_BATCH = metrics.REGISTRY.histogram(
+    'probot_spool_batch_size',
+    'Number of deliveries committed to the spool together.',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS deliveries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    delivery_id TEXT,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    received_at REAL NOT NULL
+)
+'''
+
+
+class SpoolEntry:
+    """
+    Delivery recorded in the spool that has not been marked done.
+    """
+    def __init__(self,
+                 key: int,
+                 delivery_id: Optional[str],
+                 headers: models.Headers,
+                 body: bytes,
+                 received_at: float) -> None:
+        self.key = key
+        self.delivery_id = delivery_id
+        self.headers = headers
+        self.body = body
+        self.received_at = received_at
+
+    def to_request(self) -> models.Request:
+        """
+        Rebuild the probot request for this delivery.
+
+        :return: Request
+        """
+        return models.Request(
+            method='POST',
+            body_raw=self.body,
+            headers=self.headers
+        )
+
+
+class Spool:
+    """
+    Append-only SQLite journal of verified deliveries, committed before they are acknowledged.
+
+    Appends from all request threads/tasks are handed to a single writer thread which commits
+    everything that arrived while the previous commit was running in one transaction (group commit),
+    so the cost of each fsync is shared by every delivery in the batch. Deliveries are removed once
+    they have been processed; anything left over after a crash is replayed on startup.
+
+    Only deliveries already in the spool when it was opened are pending; anything appended since
+    belongs to a request of this process that is (or will be) processing it, so replaying it
+    would run its handlers twice.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._appends: List[Tuple[Optional[str], str, bytes, float, futures.Future]] = []
+        self._done: List[int] = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+        connection = self._connect()
+        try:
+            connection.executescript(SCHEMA)
+            self.watermark = connection.execute('SELECT COALESCE(MAX(id), 0) FROM deliveries').fetchone()[0]
+        finally:
+            connection.close()
+
+    def start(self) -> None:
+        """
+        Start the writer thread.
+
+        :return: Nothing
+        """
+        with self._condition:
+            if self._thread is None:
+                self._closed = False
+                self._thread = threading.Thread(target=self.run, name='probot-spool', daemon=True)
+                self._thread.start()
+
+    def close(self) -> None:
+        """
+        Commit anything outstanding and stop the writer thread.
+
+        :return: Nothing
+        """
+        with self._condition:
+            thread, self._thread = self._thread, None
+            self._closed = True
+            self._condition.notify()
+        if thread:
+            thread.join()
+
+    def append(self, request: models.Request) -> futures.Future:
+        """
+        Queue the given request to be durably written to the spool.
+
+        :param request: Verified request to record
+        :return: Future resolving to the spool key once the delivery has been committed
+        """
+        self.start()
+        future = futures.Future()
+        headers = json.dumps(dict(request.headers.items()))
+        delivery_id = request.headers.get('X-GitHub-Delivery')
+        with self._condition:
+            self._appends.append((delivery_id, headers, bytes(request.body_raw), time.time(), future))
+            self._condition.notify()
+        return future
+
+    def done(self, key: int) -> None:
+        """
+        Mark the delivery with the given spool key as processed.
+
+        This does not wait for the change to be committed; at worst the delivery is replayed again.
+
+        :param key: Spool key of the delivery
+        :return: Nothing
+        """
+        self.start()
+        with self._condition:
+            self._done.append(key)
+            self._condition.notify()
+
+    def pending(self) -> Iterator[SpoolEntry]:
+        """
+        Iterate deliveries left by a previous run that were recorded but never marked done, oldest first.
+
+        :return: Iterator of spool entries
+        """
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                'SELECT id, delivery_id, headers, body, received_at FROM deliveries WHERE id <= ? ORDER BY id',
+                (self.watermark,)
+            ).fetchall()
+        finally:
+            connection.close()
+
+        for key, delivery_id, headers, body, received_at in rows:
+            yield SpoolEntry(key, delivery_id, models.Headers(json.loads(headers)), body, received_at)
+
+    def run(self) -> None:
+        """
+        Commit queued appends/completions in batches until closed.
+
+        :return: Nothing
+        """
+        connection = self._connect()
+        try:
+            while True:
+                with self._condition:
+                    while not self._appends and not self._done and not self._closed:
+                        self._condition.wait()
+                    appends, self._appends = self._appends, []
+                    done, self._done = self._done, []
+                    closed = self._closed
+
+                if appends or done:
+                    self.commit(connection, appends, done)
+                if closed:
+                    return
+        finally:
+            connection.close()
+
+    @staticmethod
+    def commit(connection: sqlite3.Connection,
+               appends: List[Tuple[Optional[str], str, bytes, float, futures.Future]],
+               done: List[int]) -> None:
+        """
+        Write a batch of appends/completions in a single transaction.
+
+        :param connection: Writer connection
+        :param appends: Deliveries to record
+        :param done: Spool keys of deliveries to remove
+        :return: Nothing
+        """
+        started = time.perf_counter()
+        try:
+            with connection:
+                keys = [connection.execute(
+                    'INSERT INTO deliveries (delivery_id, headers, body, received_at) VALUES (?, ?, ?, ?)',
+                    (delivery_id, headers, body, received_at)
+                ).lastrowid for delivery_id, headers, body, received_at, _ in appends]
+                connection.executemany('DELETE FROM deliveries WHERE id = ?', [(key,) for key in done])
+        except sqlite3.Error as ex:
+            LOG.exception('Failed to commit %s deliveries to spool', len(appends))
+            for *_, future in appends:
+                future.set_exception(ex)
+            return
+
+        SPOOL_COMMIT.observe(time.perf_counter() - started)
+        if appends:
+            SPOOL_BATCH.observe(len(appends))
+        for key, (*_, future) in zip(keys, appends):
+            future.set_result(key)
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a connection to the spool database.
+
+        :return: Connection
+        """
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=FULL')
+        return connection
@@ -0,0 +1,225 @@
+"""
+    probot/views
+    ~~~~~~~~~~~~
+
+    Contains lightweight, lazily materialised views over decoded webhook payloads.
+"""
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import ghwht
+
+# Sentinel for values that have not been looked up/wrapped yet.
+MISSING = object()
+
+# Event name/actions that indicate the app no longer has access to an installation.
+ACCESS_REVOKED = frozenset([
+    ('installation', 'deleted'),
+    ('installation', 'suspend'),
+    ('github_app_authorization', 'revoked')
+])
+
+
+class ObjectView:
+    """
+    Read-only view over a decoded JSON object.
+
+    Keys are available as attributes or items. Nested objects/arrays are only wrapped
+    the first time they are accessed; scalars are returned as decoded.
+    """
+    __slots__ = ('_data', '_views')
+
+    def __init__(self, data: Dict[str, Any]) -> None:
+        self._data = data
+        self._views: Optional[Dict[str, Any]] = None
+
+    def __getattr__(self, name: str) -> Any:
+        # Protocol lookups (e.g. `__setstate__` by copy/pickle) happen before `__init__` sets the slots.
+        if name.startswith('__') or name in ObjectView.__slots__:
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, key: str) -> Any:
+        views = self._views
+        if views is not None:
+            value = views.get(key, MISSING)
+            if value is not MISSING:
+                return value
+
+        value = self._data[key]
+        if isinstance(value, (dict, list)):
+            value = wrap(value)
+            if views is None:
+                views = self._views = {}
+            views[key] = value
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __bool__(self) -> bool:
+        return bool(self._data)
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """
+        Get the value at the given key or dotted path (e.g. 'installation.id').
+
+        :param path: Key or dotted path
+        :param default: Value to return when the path does not exist
+        :return: Value at the path or default
+        """
+        value = self
+        for key in path.split('.'):
+            if not isinstance(value, ObjectView) or key not in value._data:
+                return default
+            value = value[key]
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the decoded JSON object this view wraps.
+
+        :return: Decoded object
+        """
+        return self._data
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self._data!r})'
+
+
+class ArrayView:
+    """
+    Read-only view over a decoded JSON array.
+
+    Nested objects/arrays are only wrapped the first time they are accessed.
+    """
+    __slots__ = ('_data', '_views')
+
+    def __init__(self, data: List[Any]) -> None:
+        self._data = data
+        self._views: Optional[Dict[int, Any]] = None
+
+    def __getitem__(self, index: int) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._data)))]
+
+        index = index + len(self._data) if index < 0 else index
+        views = self._views
+        if views is not None:
+            value = views.get(index, MISSING)
+            if value is not MISSING:
+                return value
+
+        value = self._data[index]
+        if isinstance(value, (dict, list)):
+            value = wrap(value)
+            if views is None:
+                views = self._views = {}
+            views[index] = value
+        return value
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in range(len(self._data)):
+            yield self[index]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __bool__(self) -> bool:
+        return bool(self._data)
+
+    def to_list(self) -> List[Any]:
+        """
+        Get the decoded JSON array this view wraps.
+
+        :return: Decoded array
+        """
+        return self._data
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self._data!r})'
+
+
+def wrap(value: Union[Dict[str, Any], List[Any]]) -> Union[ObjectView, ArrayView]:
+    """
+    Wrap the given decoded JSON object/array in a view.
+
+    :param value: Decoded object or array
+    :return: View
+    """
+    return ObjectView(value) if isinstance(value, dict) else ArrayView(value)
+
+
+class Event:
+    """
+    Webhook event whose payload is an :class:`~probot.views.ObjectView` over the decoded body.
+
+    Exposes the same `id` and `payload` interface handlers use on `ghwht` events.
+    """
+    __slots__ = ('id', 'delivery_id', 'hook_id', 'payload')
+
+    def __init__(self,
+                 id: ghwht.ID,
+                 delivery_id: Any,
+                 hook_id: int,
+                 payload: ObjectView) -> None:
+        self.id = id
+        self.delivery_id = delivery_id
+        self.hook_id = hook_id
+        self.payload = payload
+
+    @property
+    def name(self) -> str:
+        """
+        Get the event name.
+        """
+        return self.id.name
+
+    @property
+    def action(self) -> Optional[str]:
+        """
+        Get the event action.
+        """
+        return self.id.action
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}(id={self.id!r}, delivery_id={self.delivery_id!r})'
+
+
+def new_event(delivery_id: Any,
+              event_name: str,
+              hook_id: int,
+              action: Optional[str],
+              payload: Dict[str, Any]) -> Event:
+    """
+    Create a lazily materialised event for the given decoded payload.
+
+    :param delivery_id: Unique id of the delivery
+    :param event_name: Name of the event (`X-GitHub-Event`)
+    :param hook_id: Id of the webhook that sent the event
+    :param action: Event action, if any
+    :param payload: Decoded payload, with the action removed
+    :return: Event
+    """
+    event_id = ghwht.new_id(f'{event_name}.{action}' if action else event_name)
+    return Event(event_id, delivery_id, hook_id, ObjectView(payload))
+
+
+def is_access_revoked(event: Event) -> bool:
+    """
+    Check if the given event indicates the app no longer has access to its installation.
+
+    :param event: Event to check
+    :return: True if access was revoked, False otherwise
+    """
+    name = getattr(event.id.name, 'value', event.id.name)
+    action = getattr(event.id.action, 'value', event.id.action)
+    return (name, action) in ACCESS_REVOKED
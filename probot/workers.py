@@ -0,0 +1,61 @@
+"""
+    probot/workers
+    ~~~~~~~~~~~~~~
+
+    Contains types shared by the background worker pools that process acknowledged events.
+"""
+import time
+from typing import Optional
+
+from . import metrics, models
+
+QUEUE_DEPTH = metrics.REGISTRY.gauge(
+    'probot_background_queue_depth',
+    'Number of acknowledged events waiting for a background worker.'
+)
+QUEUE_WAIT = metrics.REGISTRY.histogram(
+    'probot_background_queue_wait_seconds',
+    'Time acknowledged events spent queued before a background worker picked them up.'
+)
+QUEUE_REJECTED = metrics.REGISTRY.counter(
+    'probot_background_queue_rejected_total',
+    'Events rejected because the background queue was full.'
+)
+
+
+class QueuedEvent:
+    """
+    Event waiting in a background queue along with when it was queued.
+    """
+    def __init__(self,
+                 event: models.EventT,
+                 spool_key: Optional[int] = None) -> None:
+        self.event = event
+        self.spool_key = spool_key
+        self.enqueued_at = time.monotonic()
+
+    def dequeued(self) -> None:
+        """
+        Record the time this event spent queued.
+
+        :return: Nothing
+        """
+        QUEUE_WAIT.observe(time.monotonic() - self.enqueued_at)
+        QUEUE_DEPTH.dec()
+
+
+# Shared response returned when an event has been queued for background processing.
+ACCEPTED = models.ImmutableResponse(status_code=202)
+
+# Shared response returned when the background queue is full.
+REJECTED = models.ImmutableResponse(status_code=503, content='Background queue full')
+
+
+def rejected() -> models.Response:
+    """
+    Response returned when the background queue is full.
+
+    :return: Response
+    """
+    QUEUE_REJECTED.inc()
+    return REJECTED
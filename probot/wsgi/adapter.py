@@ -5,10 +5,12 @@
     Contains base types to be used/extended by WSGI adapters.
 """
 import abc
-from typing import TypeVar
+import atexit
+import threading
+from typing import Callable, TypeVar
 
 from .. import models
-from ..hints import ProbotSyncHandler, ProbotSyncLifecycleEventHandler
+from ..hints import LifecycleEventHandlerResponse, ProbotSyncHandler, ProbotSyncLifecycleEventHandler
 from .. import base
 
 
@@ -27,6 +29,16 @@ class Adapter(base.Adapter[base.AdapterAppT, base.AdapterRequestT, base.AdapterR
         """
         raise NotImplementedError('Must be implemented by derived class')
 
+    @abc.abstractmethod
+    def register_metrics(self, path: str) -> None:
+        """
+        Register a GET route exposing process metrics in the Prometheus text format.
+
+        :param path: URL path to serve metrics on
+        :return: Nothing
+        """
+        raise NotImplementedError('Must be implemented by derived class')
+
     @abc.abstractmethod
     def register_lifecycle_event(self,
                                  event: models.LifecycleEvent,
@@ -40,6 +52,49 @@ class Adapter(base.Adapter[base.AdapterAppT, base.AdapterRequestT, base.AdapterR
         """
         raise NotImplementedError('Must be implemented by derived class')
 
+    @staticmethod
+    def translate_lifecycle_event(
+        event: models.LifecycleEvent,
+        handler: ProbotSyncLifecycleEventHandler
+    ) -> Callable[[], LifecycleEventHandlerResponse]:
+        """
+        Translate lifecycle events and delegate into Probot lifecycle event handlers.
+
+        WSGI has no notion of server startup, so the returned wrapper runs the handler
+        at most once; adapters call it before the first request is handled.
+
+        :param event: Lifecycle event to translate
+        :param handler: Handler function to wrap
+        :return: Wrapper function
+        """
+        lock = threading.Lock()
+        called = False
+
+        def wrapper() -> LifecycleEventHandlerResponse:
+            nonlocal called
+            if called:
+                return None
+            with lock:
+                if not called:
+                    try:
+                        handler(event)
+                    finally:
+                        called = True
+            return None
+        return wrapper
+
+    @staticmethod
+    def register_shutdown(event: models.LifecycleEvent,
+                          handler: ProbotSyncLifecycleEventHandler) -> None:
+        """
+        Register lifecycle event handler function to be called when the process exits.
+
+        :param event: Lifecycle event to register handler for
+        :param handler: Handler function to be called for the given lifecycle event
+        :return: Nothing
+        """
+        atexit.register(handler, event)
+
     @abc.abstractmethod
     def translate(self, handler: ProbotSyncHandler) -> base.AdapterResponseT:
         """
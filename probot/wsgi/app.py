@@ -5,16 +5,48 @@
     Contains HTTP application for use with WSGI (sync) adapters.
 """
 import inspect
+import threading
+import time
+from concurrent import futures
+from typing import Iterable, List, Optional
 
-from .. import base, errors, models
+from .. import base, errors, instrument, log, models
 from ..hints import SyncEventHandler, SyncEventMiddleware
-from . import adapter
+from . import adapter, workers
+
+LOG = log.get_logger(__name__)
 
 
 class App(base.App[adapter.WSGIAdapterT, SyncEventHandler]):
     """
     App for WSGI (sync) adapters.
     """
+    def __init__(self, adapter: adapter.WSGIAdapterT) -> None:
+        super().__init__(adapter)
+        self.executor: Optional[futures.ThreadPoolExecutor] = None
+        self.workers: Optional[workers.WorkerPool] = None
+        self.spool_replay: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+
+    def configure(self, settings: models.Settings) -> None:
+        """
+        Configure this app using probot settings.
+
+        When `handler_concurrency` is greater than one, a bounded thread pool shared by all
+        requests is created to run event handlers in parallel.
+
+        :param settings: Settings to use
+        :return: Nothing
+        """
+        super().configure(settings)
+        if self.handler_concurrency > 1:
+            self.executor = futures.ThreadPoolExecutor(max_workers=self.handler_concurrency,
+                                                       thread_name_prefix='probot-handler')
+        if settings.background_workers > 0:
+            self.workers = workers.WorkerPool(self.process_event,
+                                              settings.background_workers,
+                                              settings.background_queue_size)
+
     def on_lifecycle_event(self, event: models.LifecycleEvent) -> None:
         """
         Handler function called for each lifecycle event.
@@ -25,9 +57,26 @@ class App(base.App[adapter.WSGIAdapterT, SyncEventHandler]):
         :param event: Lifecycle event to handle
         :return: Nothing
         """
+        if self.spool and event == models.LifecycleEvent.Startup:
+            self.spool_replay = threading.Thread(target=self.replay_spool, name='probot-spool-replay', daemon=True)
+            self.spool_replay.start()
+
         for handler in self.handlers_for_lifecycle_event(event):
             handler(event)
 
+        if self.spool_replay and event == models.LifecycleEvent.Shutdown:
+            self.stopping.set()
+            self.spool_replay.join()
+            self.spool_replay = None
+        if self.workers and event == models.LifecycleEvent.Shutdown:
+            self.workers.stop()
+        if self.spool and event == models.LifecycleEvent.Shutdown:
+            self.spool.close()
+        if self.capture and event == models.LifecycleEvent.Shutdown:
+            self.capture.close()
+        if self.executor and event == models.LifecycleEvent.Shutdown:
+            self.executor.shutdown(wait=True)
+
     def on_request(self, request: models.Request) -> models.Response:
         """
         Handler function called for each webhook event.
@@ -36,25 +85,143 @@ class App(base.App[adapter.WSGIAdapterT, SyncEventHandler]):
         content into the appropriate models and invoke all handlers registered
         for the specific GitHub event/action id.
 
+        When background workers are configured, the event is queued and a 202 Accepted
+        response is returned without waiting for the handlers.
+
+        Events with no registered middleware/handlers are acknowledged with a 200 OK from
+        their headers alone, without decoding the payload.
+
+        When duplicate detection is configured, deliveries whose id was already seen are
+        dropped before any parsing or context creation. Ids are only remembered once the
+        delivery was processed (or queued) without a server error.
+
+        When capturing is configured, sampled verified deliveries are written to capture
+        files in the background for later replay.
+
+        When a spool is configured, the verified delivery is durably recorded first so it
+        can be replayed on startup if the process dies before it is processed.
+
         :param request: Request to handle
         :return: Response
         """
         # Verify the webhook request; return 401 when invalid.
-        self.verify_request(request, self.app_id, self.webhook_secret)
+        started = time.perf_counter() if self.recorder else 0.0
+        self.verify_request(request, self.app_id, self.webhook_signature)
+        if self.recorder:
+            self.record_phase(instrument.VERIFY, started, event_name=request.headers.get('X-GitHub-Event', ''))
+
+        # Hand the verified delivery to the capture writer; this never blocks.
+        if self.capture:
+            self.capture.record(request)
+
+        # Skip events nothing is registered for without decoding the payload.
+        if not self.is_handled_request(request):
+            return base.UNHANDLED
+
+        # Drop redeliveries of webhooks we've already seen; return 200 so GitHub stops retrying.
+        if self.is_duplicate_request(request):
+            return base.DUPLICATE
+
+        # Durably record the verified delivery before acknowledging it.
+        spool_key = self.spool.append(request).result() if self.spool else None
+
+        response = self.dispatch_request(request, spool_key)
+
+        # Remember the delivery id now it has been handled, unless it failed and should be redelivered.
+        self.record_delivery(request, response)
 
+        return response
+
+    def dispatch_request(self,
+                          request: models.Request,
+                          spool_key: Optional[int] = None) -> models.Response:
+        """
+        Parse the given verified request and process (or queue) the resulting event.
+
+        :param request: Verified request to dispatch
+        :param spool_key: Spool key of the delivery, if spooled
+        :return: Response
+        """
         # Parse request body into event of appropriate type based on event name/action.
+        started = time.perf_counter() if self.recorder else 0.0
         event = self.parse_request(request)
+        if self.recorder:
+            self.record_phase(instrument.PARSE, started, event)
 
+        # Skip actions nothing is registered for before creating a context.
+        if not self.is_handled_event(event):
+            if spool_key is not None:
+                self.spool.done(spool_key)
+            return base.UNHANDLED
+
+        # Acknowledge the event immediately and process it in the background when configured.
+        if self.workers:
+            response = self.workers.acknowledge(event, spool_key)
+            # The sender is told to retry a rejected event, so don't also replay it from the spool.
+            if response.status_code >= 500 and spool_key is not None:
+                self.spool.done(spool_key)
+            return response
+
+        return self.process_event(event, spool_key)
+
+    def process_event(self,
+                      event: models.EventT,
+                      spool_key: Optional[int] = None) -> models.Response:
+        """
+        Create the context for the given event and run all registered middleware and handlers.
+
+        A spooled delivery is marked done once processed, whatever the response. A handler
+        that failed would most likely fail again on replay, and replaying would repeat the
+        side effects of any handlers that succeeded; only deliveries interrupted by the
+        process dying are replayed.
+
+        :param event: Event to process
+        :param spool_key: Spool key of the delivery, if spooled
+        :return: Response
+        """
         # Wrap event into Context instance that providers clean interface/helpers to
         # user defined event handler functions.
-        context = self.create_context(event, self.app_id, self.private_key)
+        started = time.perf_counter() if self.recorder else 0.0
+        context = self.create_context(event, self.signer, self.github_base_url)
+        if self.recorder:
+            self.record_phase(instrument.CREATE_CONTEXT, started, event)
 
         # Process all registered event handlers for the current event/context.
-        return self.on_event(context)
+        response = self.on_event(context)
+
+        # Remove the delivery from the spool now that it has been processed, even if it failed.
+        if spool_key is not None:
+            self.spool.done(spool_key)
+
+        return response
+
+    def replay_spool(self) -> None:
+        """
+        Dispatch deliveries left in the spool by a previous run that never finished processing.
+
+        This runs on a background thread started on startup, which for WSGI adapters happens in
+        the first request, so that request isn't held up. Anything not replayed before shutdown
+        stays in the spool for the next run.
+
+        :return: Nothing
+        """
+        for entry in self.spool.pending():
+            if self.stopping.is_set():
+                return
+            LOG.info('Replaying spooled delivery %s', entry.delivery_id)
+            try:
+                self.dispatch_request(entry.to_request(), entry.key)
+            except Exception:
+                LOG.exception('Failed to replay spooled delivery %s', entry.delivery_id)
 
     def on_event(self, context: models.Context) -> models.Response:
         """
-        Process the given context for all registered handlers.
+        Process the given context for all registered middleware and handlers.
+
+        Middleware functions can optional return a response. If they chose to do so,
+        further processing of the request will be stopped and the response will be immediately
+        returned to the caller. If no response is returned, execution of the middleware chain
+        and handler functions will continue.
 
         Handler functions can optionally return a response. If they chose to do so,
         the response returned by this function will be prioritized by the greatest status_code
@@ -63,38 +230,65 @@ class App(base.App[adapter.WSGIAdapterT, SyncEventHandler]):
 
         If no handler functions return a response, this will default to returning a 200 OK response.
 
+        Handlers run in parallel on a shared thread pool when `handler_concurrency` is configured
+        greater than one.
+
         :param context: Context to pass to all event handlers
         :return: Response based on handlers
         """
-        response = models.Response(status_code=200)
+        response = models.OK
 
         for middleware in self.middleware_for_event(context.event):
             middleware_response = self.process_middleware(middleware, context)
-            if middleware_response:
+            if middleware_response is not None:
                 return middleware_response
 
-        for handler in self.handlers_for_event(context.event):
-            handler_response = self.process_handler(handler, context)
+        for handler_response in self.process_handlers(self.handlers_for_event(context.event), context):
             if handler_response.status_code >= response.status_code:
                 response = handler_response
 
         return response
 
+    def process_handlers(self,
+                         handlers: Iterable[SyncEventHandler],
+                         context: models.Context) -> List[models.Response]:
+        """
+        Run the given handlers with the given context.
+
+        When a handler thread pool is configured and there is more than one handler, they run
+        in parallel on the pool; otherwise they run one after another on the request thread.
+        Responses are returned in handler order either way.
+
+        :param handlers: Handlers to run
+        :param context: Context to use
+        :return: Responses
+        """
+        handlers = list(handlers)
+        if not self.executor or len(handlers) < 2:
+            return [self.process_handler(handler, context) for handler in handlers]
+
+        return list(self.executor.map(lambda handler: self.process_handler(handler, context), handlers))
+
     def process_middleware(self,
                            middleware: SyncEventMiddleware,
-                           context: models.Context) -> models.Response:
+                           context: models.Context) -> Optional[models.Response]:
         """
         Run the given middleware with the given context.
 
         :param middleware: Middleware to run
         :param context: Context to use
-        :return: Response
+        :return: Response to stop processing with, or None to continue
         """
+        started = time.perf_counter() if self.recorder else 0.0
         try:
-            return self.wrap_response(middleware(context))
+            return middleware(context)
         except Exception as ex:
+            base.ERRORS.labels('middleware').inc()
             response = models.Response(content=str(ex),
                                        status_code=500)
+        finally:
+            if self.recorder:
+                self.record_phase(instrument.MIDDLEWARE, started, context.event, middleware)
         return response
 
     def process_handler(self,
@@ -109,11 +303,16 @@ class App(base.App[adapter.WSGIAdapterT, SyncEventHandler]):
         :param context: Context to use
         :return: Response
         """
+        started = time.perf_counter() if self.recorder else 0.0
         try:
             return self.wrap_response(handler(context))
         except Exception as ex:
+            base.ERRORS.labels('handler').inc()
             response = models.Response(content=str(ex),
                                        status_code=500)
+        finally:
+            if self.recorder:
+                self.record_phase(instrument.HANDLER, started, context.event, handler)
         return response
 
     def validate_middleware(self, middleware: SyncEventMiddleware) -> None:
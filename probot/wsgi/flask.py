@@ -8,7 +8,7 @@ from typing import Callable
 
 import flask
 
-from .. import base, models
+from .. import base, errors, metrics, models
 from ..hints import ProbotSyncHandler, ProbotSyncLifecycleEventHandler
 from . import adapter, app
 
@@ -30,17 +30,33 @@ class Adapter(adapter.Adapter[AdapterApp, AdapterRequest, AdapterResponse]):
         """
         self.app.route(self.path, methods=self.methods)(self.translate(handler))
 
+    def register_metrics(self, path: str) -> None:
+        """
+        Register a GET route exposing process metrics in the Prometheus text format.
+
+        :param path: URL path to serve metrics on
+        :return: Nothing
+        """
+        def metrics_view() -> AdapterResponse:
+            return flask.Response(self.render_metrics(), 200, {'Content-Type': metrics.CONTENT_TYPE})
+        self.app.route(path, methods=['GET'], endpoint='probot_metrics')(metrics_view)
+
     def register_lifecycle_event(self,
                                  event: models.LifecycleEvent,
                                  handler: ProbotSyncLifecycleEventHandler) -> None:
         """
         Register lifecycle event handler function for the adapter.
 
+        Startup handlers run before the first request; shutdown handlers run at process exit.
+
         :param event: Lifecycle event to register handler for
         :param handler: Handler function to be called for the given lifecycle event
         :return: Nothing
         """
-        raise NotImplementedError('Flask lifecycle events not implemented')
+        if event == models.LifecycleEvent.Startup:
+            self.app.before_request(self.translate_lifecycle_event(event, handler))
+        else:
+            self.register_shutdown(event, handler)
 
     def translate(self, handler: ProbotSyncHandler) -> Callable[[AdapterRequest], AdapterResponse]:
         """
@@ -51,9 +67,12 @@ class Adapter(adapter.Adapter[AdapterApp, AdapterRequest, AdapterResponse]):
         :return: Response to return
         """
         def wrapper() -> flask.Response:
-            native_request = self.translate_request(flask.request)
-            response = handler(native_request)
-            return self.translate_response(response)
+            try:
+                native_request = self.translate_request(flask.request)
+                response = handler(native_request)
+            except errors.HTTPException as ex:
+                response = self.translate_exception(ex)
+            return self.translate_response(self.observe_response(response))
         return wrapper
 
     def translate_request(self, request: AdapterRequest) -> models.Request:
@@ -63,17 +82,17 @@ class Adapter(adapter.Adapter[AdapterApp, AdapterRequest, AdapterResponse]):
         :param request: Flask request
         :return: Probot request
         """
+        self.check_body_size(request.content_length)
         body = request.get_data()
-        json = request.get_json()
 
         # TODO: Translate query/headers to proper structure.
 
         return models.Request(
             method=request.method,
             body_raw=body,
-            body_json=json,
             query=request.args,
-            headers=request.headers
+            headers=request.headers,
+            decoder=self.json_decoder
         )
 
     def translate_response(self, response: models.Response) -> AdapterResponse:
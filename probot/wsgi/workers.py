@@ -0,0 +1,92 @@
+"""
+    probot/wsgi/workers
+    ~~~~~~~~~~~~~~~~~~~
+
+    Contains the thread worker pool that processes acknowledged events in the background.
+"""
+import queue
+import threading
+from typing import Callable, List, Optional
+
+from .. import log, models, workers
+
+LOG = log.get_logger(__name__)
+
+
+class WorkerPool:
+    """
+    Pool of threads processing events from a bounded queue.
+    """
+    def __init__(self,
+                 process: Callable[[models.EventT, Optional[int]], models.Response],
+                 size: int,
+                 queue_size: int) -> None:
+        self.process = process
+        self.size = size
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Start the worker threads.
+
+        :return: Nothing
+        """
+        with self._lock:
+            if self.threads:
+                return
+            self.threads = [threading.Thread(target=self.run, name=f'probot-worker-{i}', daemon=True)
+                            for i in range(self.size)]
+            for thread in self.threads:
+                thread.start()
+
+    def stop(self) -> None:
+        """
+        Wait for queued events to be processed, then stop the worker threads.
+
+        :return: Nothing
+        """
+        with self._lock:
+            threads, self.threads = self.threads, []
+
+        for _ in threads:
+            self.queue.put(None)
+        for thread in threads:
+            thread.join()
+
+    def acknowledge(self,
+                    event: models.EventT,
+                    spool_key: Optional[int] = None) -> models.Response:
+        """
+        Queue the given event for background processing.
+
+        :param event: Event to process
+        :param spool_key: Spool key of the delivery, if spooled
+        :return: 202 Accepted response if the event was queued, 503 if the queue is full
+        """
+        self.start()
+        # Count the event before queueing it so a worker can never dequeue it first.
+        workers.QUEUE_DEPTH.inc()
+        try:
+            self.queue.put_nowait(workers.QueuedEvent(event, spool_key))
+        except queue.Full:
+            workers.QUEUE_DEPTH.dec()
+            return workers.rejected()
+        return workers.ACCEPTED
+
+    def run(self) -> None:
+        """
+        Process queued events until a stop sentinel is received.
+
+        :return: Nothing
+        """
+        while True:
+            queued = self.queue.get()
+            if queued is None:
+                return
+            try:
+                queued.dequeued()
+                self.process(queued.event, queued.spool_key)
+            except Exception:
+                LOG.exception('Background processing of event %s failed', queued.event.id)
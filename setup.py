@@ -43,7 +43,7 @@ setup(
     description=meta['tagline'],
     long_description=get_long_description(),
     long_description_content_type='text/markdown',
-    packages=find_packages(),
+    packages=find_packages(exclude=('tests', 'tests.*', 'benchmarks', 'benchmarks.*')),
     package_data={'probot': ['py.typed']},
     zip_safe=False,
     classifiers=[
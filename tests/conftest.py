@@ -0,0 +1,85 @@
+"""
+    tests/conftest
+    ~~~~~~~~~~~~~~
+
+    Contains fixtures shared by the test suite.
+"""
+import hashlib
+import hmac
+import json
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from probot import models
+from probot.wsgi import app
+
+# GitHub App id deliveries are sent to.
+APP_ID = '1'
+
+# Webhook secret deliveries are signed with.
+SECRET = 'test-secret'
+
+
+@pytest.fixture(scope='session')
+def private_key() -> str:
+    """
+    PEM encoded RSA private key for the test GitHub App.
+    """
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(serialization.Encoding.PEM,
+                             serialization.PrivateFormat.TraditionalOpenSSL,
+                             serialization.NoEncryption()).decode('utf-8')
+
+
+@pytest.fixture
+def new_settings(private_key: str) -> Callable[..., models.Settings]:
+    """
+    Factory for probot settings of the test GitHub App; keyword arguments override settings.
+    """
+    def factory(**kwargs: Any) -> models.Settings:
+        return models.Settings(app_id=APP_ID,
+                               private_key=private_key,
+                               webhook_secret=SECRET,
+                               lazy_events=True,
+                               **kwargs)
+    return factory
+
+
+@pytest.fixture
+def new_app(mocker, new_settings) -> Callable[..., app.App]:
+    """
+    Factory for WSGI apps configured against a mock adapter; keyword arguments override settings.
+    """
+    def factory(**kwargs: Any) -> app.App:
+        instance = app.App(mocker.Mock())
+        instance.configure(new_settings(**kwargs))
+        return instance
+    return factory
+
+
+@pytest.fixture
+def new_request() -> Callable[..., models.Request]:
+    """
+    Factory for signed webhook deliveries to the test GitHub App.
+    """
+    def factory(event: str = 'push',
+                action: Optional[str] = None,
+                delivery_id: Optional[str] = None,
+                payload: Optional[Dict[str, Any]] = None) -> models.Request:
+        payload = dict(payload or {'installation': {'id': 1}, 'repository': {'full_name': 'org/repo'}})
+        if action:
+            payload['action'] = action
+        body = json.dumps(payload).encode('utf-8')
+        signature = hmac.new(SECRET.encode('utf-8'), body, hashlib.sha256).hexdigest()
+        return models.Request(method='POST', body_raw=body, headers=models.Headers({
+            'X-GitHub-Event': event,
+            'X-GitHub-Delivery': delivery_id or str(uuid.uuid4()),
+            'X-GitHub-Hook-ID': '1',
+            'X-GitHub-Hook-Installation-Target-ID': APP_ID,
+            'X-Hub-Signature-256': f'sha256={signature}'
+        }))
+    return factory
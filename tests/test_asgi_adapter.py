@@ -0,0 +1,126 @@
+"""
+    tests/test_asgi_adapter
+    ~~~~~~~~~~~~~~~~~~~~~~~
+
+    Tests for reading and verifying streamed request bodies in ASGI adapters.
+"""
+import asyncio
+import hashlib
+import hmac
+from typing import List
+
+import pytest
+
+from probot import auth, errors, models
+from probot.asgi import fastapi, starlette
+
+# Webhook secret deliveries are signed with.
+SECRET = 'secret'
+
+
+def signature(body: bytes) -> str:
+    return 'sha256=' + hmac.new(SECRET.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+
+class Stream:
+    """
+    Async iterable of body chunks recording how many were consumed.
+    """
+    def __init__(self, chunks: List[bytes]) -> None:
+        self.chunks = chunks
+        self.consumed = 0
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+
+@pytest.fixture(params=[starlette, fastapi], ids=['starlette', 'fastapi'])
+def adapter(request):
+    instance = request.param.Adapter(request.param.AdapterApp())
+    instance.webhook_signature = auth.WebhookSignature(SECRET)
+    instance.max_body_size = 10
+    return instance
+
+
+def read_body(adapter, headers, chunks, content_length=None):
+    return asyncio.run(adapter.read_body(headers, content_length, chunks))
+
+
+def test_streamed_body_verified(adapter):
+    body, verified = read_body(adapter, {'X-Hub-Signature-256': signature(b'abcdef')}, Stream([b'abc', b'def']))
+
+    assert body == b'abcdef'
+    assert verified
+
+
+def test_declared_size_over_limit_is_413_before_reading(adapter):
+    stream = Stream([b'a' * 11])
+    with pytest.raises(errors.HTTPException) as ex:
+        read_body(adapter, {'X-Hub-Signature-256': signature(b'a' * 11)}, stream, content_length=11)
+
+    assert ex.value.status_code == 413
+    assert stream.consumed == 0
+
+
+def test_streamed_size_over_limit_is_413_mid_stream(adapter):
+    stream = Stream([b'a' * 6, b'a' * 6, b'a' * 6])
+    with pytest.raises(errors.HTTPException) as ex:
+        read_body(adapter, {'X-Hub-Signature-256': signature(b'a' * 18)}, stream)
+
+    assert ex.value.status_code == 413
+    assert stream.consumed == 2
+
+
+def test_invalid_signature_is_401(adapter):
+    with pytest.raises(errors.HTTPException) as ex:
+        read_body(adapter, {'X-Hub-Signature-256': signature(b'other')}, Stream([b'abc', b'def']))
+
+    assert ex.value.status_code == 401
+    assert ex.value.detail == 'Invalid webhook signature'
+
+
+@pytest.mark.parametrize('headers', [{}, {'X-Hub-Signature-256': 'md5=abc'}])
+def test_missing_or_unsupported_signature_is_401_before_reading(adapter, headers):
+    stream = Stream([b'abc'])
+    with pytest.raises(errors.HTTPException) as ex:
+        read_body(adapter, headers, stream)
+
+    assert ex.value.status_code == 401
+    assert stream.consumed == 0
+
+
+@pytest.mark.parametrize('value, expected', [(None, None), ('', None), ('0', 0), ('12', 12), (' 12 ', 12)])
+def test_content_length_parsed(adapter, value, expected):
+    assert adapter.parse_content_length(value) == expected
+
+
+@pytest.mark.parametrize('value', ['abc', '-1', '1.5', '²'])
+def test_malformed_content_length_is_400(adapter, value):
+    with pytest.raises(errors.HTTPException) as ex:
+        adapter.parse_content_length(value)
+
+    assert ex.value.status_code == 400
+
+
+def test_malformed_content_length_request_answered_400(adapter):
+    body = b'{}'
+    scope = {
+        'type': 'http',
+        'method': 'POST',
+        'path': '/',
+        'query_string': b'',
+        'headers': [(b'content-length', b'abc'), (b'x-hub-signature-256', signature(body).encode('ascii'))]
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def handler(request: models.Request) -> models.Response:
+        return models.OK
+
+    async def run():
+        return await adapter.translate(handler)(starlette.AdapterRequest(scope, receive))
+
+    assert asyncio.run(run()).status_code == 400
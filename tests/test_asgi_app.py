@@ -0,0 +1,81 @@
+"""
+    tests/test_asgi_app
+    ~~~~~~~~~~~~~~~~~~~
+
+    Tests for how the ASGI app keeps blocking GitHub API calls off the event loop.
+"""
+import asyncio
+import threading
+
+import pytest
+import requests
+
+from probot import fakegithub, models
+from probot.asgi import app
+
+# Event id of the deliveries sent by these tests.
+PUSH = models.new_id('push')
+
+
+@pytest.fixture
+def request_threads(monkeypatch):
+    """
+    Names of the threads each GitHub API request was sent from.
+    """
+    threads = []
+    send = requests.Session.request
+
+    def request(self, *args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return send(self, *args, **kwargs)
+
+    monkeypatch.setattr(requests.Session, 'request', request)
+    return threads
+
+
+def deliver(mocker, settings: models.Settings, request: models.Request, handler) -> models.Response:
+    instance = app.App(mocker.Mock())
+    instance.configure(settings)
+    instance.register_handler(PUSH, handler)
+
+    async def run():
+        threading.current_thread().name = 'event-loop'
+        return await instance.on_request(request)
+
+    return asyncio.run(run())
+
+
+def test_default_keeps_token_fetch_off_loop(mocker, new_settings, new_request, request_threads):
+    clients = []
+
+    async def handler(context):
+        clients.append(context.github.get_repo)
+
+    with fakegithub.FakeGitHub() as fake:
+        response = deliver(mocker, new_settings(github_base_url=fake.url), new_request(), handler)
+        minted = fake.calls
+
+    assert response.status_code == 200
+    assert clients
+    assert any('access_tokens' in pattern for _, pattern in minted)
+    assert request_threads and 'event-loop' not in request_threads
+
+
+def test_without_prefetch_token_fetch_blocks_loop(mocker, new_settings, new_request, request_threads):
+    async def handler(context):
+        context.github.get_repo
+
+    with fakegithub.FakeGitHub() as fake:
+        deliver(mocker, new_settings(github_base_url=fake.url, prefetch_token=False), new_request(), handler)
+
+    assert request_threads == ['event-loop']
+
+
+def test_unhandled_event_fetches_no_token(mocker, new_settings, new_request, request_threads):
+    async def handler(context):
+        context.github.get_repo
+
+    with fakegithub.FakeGitHub() as fake:
+        deliver(mocker, new_settings(github_base_url=fake.url), new_request('issues', 'opened'), handler)
+
+    assert request_threads == []
@@ -0,0 +1,260 @@
+"""
+    tests/test_auth
+    ~~~~~~~~~~~~~~~
+
+    Tests for GitHub App authentication helpers.
+"""
+import datetime
+import hashlib
+import hmac
+import threading
+import time
+
+import pytest
+from github import GithubException
+
+from probot import auth, base, errors, github, models
+
+
+class Clock:
+    """
+    Clock that only moves when told to.
+    """
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Fetcher:
+    """
+    Token fetcher counting how many tokens it minted.
+    """
+    def __init__(self, clock: Clock, ttl: float = 3600, error: int = None) -> None:
+        self.clock = clock
+        self.ttl = ttl
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.error:
+            raise GithubException(self.error, {'message': 'error'})
+        expires_at = datetime.datetime.utcfromtimestamp(self.clock() + self.ttl)
+        return f'token-{self.calls}', expires_at
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def cache(clock) -> auth.InstallationTokenCache:
+    return auth.InstallationTokenCache(refresh_margin=300, negative_ttl=60, clock=clock)
+
+
+def test_token_cached_until_refresh_margin(cache, clock):
+    fetch = Fetcher(clock)
+
+    assert cache.get('key', fetch) == 'token-1'
+    clock.now += 3600 - 301
+    assert cache.get('key', fetch) == 'token-1'
+    clock.now += 1
+    assert cache.get('key', fetch) == 'token-2'
+    assert fetch.calls == 2
+
+
+def test_token_without_expiry_uses_default_ttl(cache, clock):
+    cache.get('key', lambda: ('token', None))
+
+    clock.now += auth.DEFAULT_TOKEN_TTL - 301
+    assert cache.lookup('key').token == 'token'
+    clock.now += 1
+    assert cache.lookup('key') is None
+
+
+@pytest.mark.parametrize('status', [403, 404])
+def test_revoked_installation_remembered_for_negative_ttl(cache, clock, status):
+    fetch = Fetcher(clock, error=status)
+
+    assert cache.get('key', fetch) is None
+    clock.now += 59
+    assert cache.get('key', fetch) is None
+    assert fetch.calls == 1
+    clock.now += 1
+    assert cache.get('key', fetch) is None
+    assert fetch.calls == 2
+
+
+def test_other_errors_not_cached(cache, clock):
+    fetch = Fetcher(clock, error=500)
+
+    for _ in range(2):
+        with pytest.raises(GithubException):
+            cache.get('key', fetch)
+    assert fetch.calls == 2
+
+
+def test_invalidate(cache, clock):
+    fetch = Fetcher(clock)
+    cache.get('key', fetch)
+    cache.invalidate('key')
+
+    assert cache.get('key', fetch) == 'token-2'
+
+
+def test_hits_and_misses_counted(cache, clock):
+    hits, misses = auth.TOKEN_CACHE_HITS.labels().value, auth.TOKEN_CACHE_MISSES.labels().value
+    fetch = Fetcher(clock)
+    for _ in range(4):
+        cache.get('key', fetch)
+
+    assert (cache.hits, cache.misses) == (3, 1)
+    assert cache.hit_ratio() == 0.75
+    assert auth.TOKEN_CACHE_HITS.labels().value == hits + 3
+    assert auth.TOKEN_CACHE_MISSES.labels().value == misses + 1
+
+
+def test_concurrent_callers_share_one_mint(cache, clock):
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return 'token', None
+
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(cache.get('key', fetch))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert tokens == ['token'] * 8
+    assert len(calls) == 1
+
+
+def test_keys_do_not_block_each_other(cache, clock):
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return 'slow', None
+
+    thread = threading.Thread(target=cache.get, args=('slow', slow))
+    thread.start()
+    try:
+        assert cache.get('fast', lambda: ('fast', None)) == 'fast'
+    finally:
+        release.set()
+        thread.join(5)
+
+
+def test_expired_tokens_pruned(cache, clock):
+    cache.get('old', Fetcher(clock, ttl=600))
+    cache.get('revoked', Fetcher(clock, error=404))
+    clock.now += cache.prune_interval + 600
+    cache.get('new', Fetcher(clock))
+
+    assert set(cache._tokens) == {'new'}
+    assert set(cache._locks) == {'new'}
+
+
+def test_prune_runs_at_most_once_per_interval(cache, clock):
+    cache.get('old', Fetcher(clock, ttl=1))
+    clock.now += 2
+    cache.get('new', Fetcher(clock))
+    cache.get('newer', Fetcher(clock))
+
+    assert set(cache._tokens) == {'old', 'new', 'newer'}
+
+
+def test_token_cache_key_includes_base_url_and_app(private_key):
+    first = auth.AppJWT('1', private_key)
+    second = auth.AppJWT('2', private_key)
+
+    keys = {
+        github.token_cache_key(first, 10, 'https://api.github.com'),
+        github.token_cache_key(first, 10, 'https://github.example.com/api/v3'),
+        github.token_cache_key(second, 10, 'https://api.github.com'),
+        github.token_cache_key(first, 11, 'https://api.github.com')
+    }
+    assert len(keys) == 4
+    assert github.token_cache_key(first, 10, 'https://api.github.com') in keys
+
+
+def signed(body: bytes, secret: str = 'secret', **algorithms: bool) -> dict:
+    """
+    Sign the body with each given algorithm ('sha256'/'sha1') into webhook headers.
+    """
+    headers = {}
+    if algorithms.get('sha256'):
+        headers['X-Hub-Signature-256'] = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    if algorithms.get('sha1'):
+        headers['X-Hub-Signature'] = 'sha1=' + hmac.new(secret.encode(), body, hashlib.sha1).hexdigest()
+    return headers
+
+
+@pytest.fixture
+def signature() -> auth.WebhookSignature:
+    return auth.WebhookSignature('secret')
+
+
+def test_sha256_preferred(signature):
+    headers = dict(signed(b'body', sha256=True), **signed(b'other', sha1=True))
+
+    assert signature.select(headers)[0] == 'sha256'
+    assert signature.verify(headers, b'body')
+    assert not signature.verify(headers, b'other')
+
+
+def test_sha1_fallback(signature):
+    headers = signed(b'body', sha1=True)
+
+    assert signature.select(headers)[0] == 'sha1'
+    assert signature.verify(headers, b'body')
+    assert not signature.verify(headers, b'tampered')
+
+
+def test_wrong_secret_rejected(signature):
+    assert not signature.verify(signed(b'body', secret='other', sha256=True), b'body')
+
+
+@pytest.mark.parametrize('body_type', [bytes, bytearray, memoryview])
+def test_body_types_verified(signature, body_type):
+    assert signature.verify(signed(b'body', sha256=True), body_type(b'body'))
+
+
+def test_each_request_starts_from_fresh_hmac(signature):
+    headers = signed(b'body', sha256=True)
+    for _ in range(3):
+        assert signature.verify(headers, b'body')
+
+
+@pytest.mark.parametrize('headers, detail', [
+    ({}, 'Missing webhook signature'),
+    ({'X-Hub-Signature-256': ''}, 'Missing webhook signature'),
+    ({'X-Hub-Signature-256': 'not-a-signature'}, 'Invalid webhook signature'),
+    ({'X-Hub-Signature-256': 'md5=abc'}, 'Invalid webhook signature'),
+    ({'X-Hub-Signature-256': 'sha256=' + 'a' * 64}, 'Invalid webhook signature'),
+    ({'X-Hub-Signature': 'sha256=abc'}, 'Invalid webhook signature')
+])
+def test_missing_or_malformed_signature_is_401(signature, headers, detail):
+    request = models.Request(method='POST', body_raw=b'body', headers=models.Headers(headers))
+
+    with pytest.raises(errors.HTTPException) as ex:
+        base.App.verify_request_signature(request, signature)
+    assert ex.value.status_code == 401
+    assert ex.value.detail == detail
+
+
+def test_valid_signature_accepted(signature):
+    request = models.Request(method='POST', body_raw=memoryview(b'body'),
+                             headers=models.Headers(signed(b'body', sha256=True)))
+
+    base.App.verify_request_signature(request, signature)
@@ -0,0 +1,164 @@
+"""
+    tests/test_dedup
+    ~~~~~~~~~~~~~~~~
+
+    Tests for the delivery id caches and how apps record handled deliveries.
+"""
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from probot import base, dedup, models
+
+# Event id of the deliveries sent by these tests.
+PUSH = models.new_id('push')
+
+
+class Clock:
+    """
+    Clock that only moves when told to.
+    """
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def new_cache(request, tmp_path):
+    """
+    Factory for each delivery cache backend using the given clock.
+    """
+    def factory(clock: Clock, ttl: float = 60) -> dedup.DeliveryCache:
+        if request.param == 'memory':
+            return dedup.MemoryDeliveryCache(ttl, clock=clock)
+        return dedup.SQLiteDeliveryCache(os.path.join(str(tmp_path), 'dedup.db'), ttl, clock=clock)
+    return factory
+
+
+def test_only_added_deliveries_are_duplicates(new_cache):
+    cache = new_cache(Clock())
+
+    assert not cache.is_duplicate('a')
+    assert not cache.is_duplicate('a')
+    cache.add('a')
+    assert cache.is_duplicate('a')
+    assert not cache.is_duplicate('b')
+
+
+def test_deliveries_expire_after_ttl(new_cache):
+    clock = Clock()
+    cache = new_cache(clock, ttl=60)
+    cache.add('a')
+
+    clock.now += 59
+    assert cache.is_duplicate('a')
+    clock.now += 1
+    assert not cache.is_duplicate('a')
+
+    cache.add('a')
+    assert cache.is_duplicate('a')
+
+
+def test_memory_expired_entries_are_removed():
+    clock = Clock()
+    cache = dedup.MemoryDeliveryCache(ttl=60, clock=clock)
+    cache.add('a')
+
+    clock.now += 60
+    assert not cache.contains('a')
+    assert len(cache._entries) == 0
+
+
+def test_memory_evicts_least_recently_seen():
+    cache = dedup.MemoryDeliveryCache(ttl=60, size=2, clock=Clock())
+    cache.add('a')
+    cache.add('b')
+    assert cache.is_duplicate('a')
+    cache.add('c')
+
+    assert cache.is_duplicate('a')
+    assert not cache.is_duplicate('b')
+    assert cache.is_duplicate('c')
+
+
+def test_sqlite_shared_between_caches(tmp_path):
+    path = os.path.join(str(tmp_path), 'dedup.db')
+    clock = Clock()
+    dedup.SQLiteDeliveryCache(path, clock=clock).add('a')
+
+    assert dedup.SQLiteDeliveryCache(path, clock=clock).is_duplicate('a')
+
+
+def test_sqlite_purges_expired(tmp_path):
+    clock = Clock()
+    cache = dedup.SQLiteDeliveryCache(os.path.join(str(tmp_path), 'dedup.db'), ttl=60, clock=clock)
+    cache.purge_interval = 2
+    cache.add('a')
+    clock.now += 60
+    cache.add('b')
+
+    rows = cache._connection().execute('SELECT delivery_id FROM deliveries').fetchall()
+    assert rows == [('b',)]
+
+
+def test_sqlite_purges_on_schedule_across_threads(tmp_path):
+    clock = Clock()
+    cache = dedup.SQLiteDeliveryCache(os.path.join(str(tmp_path), 'dedup.db'), ttl=60, clock=clock)
+    cache.purge_interval = 401
+    cache.add('expired')
+    clock.now += 60
+
+    def add(prefix: str) -> None:
+        for i in range(100):
+            cache.add(f'{prefix}-{i}')
+
+    threads = [threading.Thread(target=add, args=(str(n),)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not cache._connection().execute("SELECT 1 FROM deliveries WHERE delivery_id = 'expired'").fetchall()
+    assert next(cache._adds) == 402
+
+
+def test_sqlite_errors_fail_open(tmp_path, mocker):
+    cache = dedup.SQLiteDeliveryCache(os.path.join(str(tmp_path), 'dedup.db'), clock=Clock())
+    connection = mocker.MagicMock()
+    connection.execute.side_effect = sqlite3.OperationalError('database is locked')
+    connection.__enter__.return_value = connection
+    mocker.patch.object(cache, '_connection', return_value=connection)
+
+    cache.add('a')
+    assert not cache.is_duplicate('a')
+
+
+def test_handled_delivery_is_dropped_when_redelivered(new_app, new_request):
+    handled = []
+    instance = new_app(dedup_backend='memory')
+    instance.register_handler(PUSH, handled.append)
+    request = new_request()
+
+    assert instance.on_request(request).status_code == 200
+    assert instance.on_request(new_request(delivery_id=request.headers['X-GitHub-Delivery'])) is base.DUPLICATE
+    assert len(handled) == 1
+
+
+def test_failed_delivery_is_processed_when_redelivered(new_app, new_request):
+    handled = []
+
+    def handler(context):
+        handled.append(context)
+        raise RuntimeError('boom')
+
+    instance = new_app(dedup_backend='memory')
+    instance.register_handler(PUSH, handler)
+    request = new_request()
+
+    assert instance.on_request(request).status_code == 500
+    assert instance.on_request(new_request(delivery_id=request.headers['X-GitHub-Delivery'])).status_code == 500
+    assert len(handled) == 2
@@ -0,0 +1,101 @@
+"""
+    tests/test_dispatch
+    ~~~~~~~~~~~~~~~~~~~
+
+    Tests for the compiled handler/middleware dispatch tables.
+"""
+import types
+
+import pytest
+
+from probot import models
+from probot.wsgi import app
+
+
+def new_event(event_id: str):
+    return types.SimpleNamespace(id=models.new_id(event_id))
+
+
+def new_function(name: str):
+    def function(context):
+        return None
+    function.__name__ = name
+    return function
+
+
+@pytest.fixture
+def instance() -> app.App:
+    return app.App(adapter=None)
+
+
+def test_handlers_in_registration_order(instance):
+    first, second, third = new_function('first'), new_function('second'), new_function('third')
+    instance.register_handler(models.new_id('issues.opened'), third)
+    instance.register_handler(models.new_id('issues'), first)
+    instance.register_handler(models.new_id('issues'), second)
+
+    assert instance.handlers_for_event(new_event('issues.opened')) == (first, second, third)
+    assert instance.handlers_for_event(new_event('issues.closed')) == (first, second)
+    assert instance.handlers_for_event(new_event('issues')) == (first, second)
+
+
+def test_order_stable_across_registrations(instance):
+    functions = [new_function(f'handler{i}') for i in range(20)]
+    for function in functions:
+        instance.register_handler(models.new_id('push'), function)
+
+    for _ in range(3):
+        assert instance.handlers_for_event(new_event('push')) == tuple(functions)
+
+
+def test_handlers_deduplicated_across_name_and_action(instance):
+    handler, other = new_function('handler'), new_function('other')
+    instance.register_handler(models.new_id('issues'), handler)
+    instance.register_handler(models.new_id('issues.opened'), other)
+    instance.register_handler(models.new_id('issues.opened'), handler)
+    instance.register_handler(models.new_id('issues.opened'), other)
+
+    assert instance.handlers_for_event(new_event('issues.opened')) == (handler, other)
+
+
+def test_middleware_global_first_and_deduplicated(instance):
+    shared, event_level, action_level = new_function('shared'), new_function('event'), new_function('action')
+    instance.register_global_middleware(shared)
+    instance.register_event_middleware(models.new_id('issues.opened'), action_level)
+    instance.register_event_middleware(models.new_id('issues'), event_level)
+    instance.register_event_middleware(models.new_id('issues'), shared)
+    instance.register_event_middleware(models.new_id('issues.opened'), shared)
+
+    assert instance.middleware_for_event(new_event('issues.opened')) == (shared, event_level, action_level)
+    assert instance.middleware_for_event(new_event('issues.closed')) == (shared, event_level)
+    assert instance.middleware_for_event(new_event('push')) == (shared,)
+
+
+def test_global_middleware_registered_later_runs_first(instance):
+    event_level, late = new_function('event'), new_function('late')
+    instance.register_event_middleware(models.new_id('push'), event_level)
+    instance.register_global_middleware(late)
+
+    assert instance.middleware_for_event(new_event('push')) == (late, event_level)
+
+
+def test_lifecycle_handlers_in_order_and_deduplicated(instance):
+    first, second = new_function('first'), new_function('second')
+    for handler in (first, second, first):
+        instance.register_lifecycle_event_handler(models.LifecycleEvent.Startup, handler)
+
+    assert instance.handlers_for_lifecycle_event(models.LifecycleEvent.Startup) == (first, second)
+    assert instance.handlers_for_lifecycle_event(models.LifecycleEvent.Shutdown) == ()
+
+
+def test_unknown_events_do_not_register_entries(instance):
+    instance.register_handler(models.new_id('push'), new_function('handler'))
+    instance.register_event_middleware(models.new_id('push'), new_function('middleware'))
+
+    assert instance.handlers_for_event(new_event('issues.opened')) == ()
+    assert instance.handlers_for_event(new_event('push.unknown')) == instance.handlers_for_event(new_event('push'))
+    assert instance.middleware_for_event(new_event('issues.opened')) == ()
+    assert set(instance.handlers) == {'push'}
+    assert set(instance.handlers['push']) == {None}
+    assert set(instance.event_middleware) == {'push'}
+    assert set(instance.event_middleware['push']) == {None}
@@ -0,0 +1,66 @@
+"""
+    tests/test_fakegithub
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Tests that the `models.Context` helpers resolve against the fake GitHub API.
+"""
+import uuid
+
+import pytest
+
+from probot import fakegithub, models, views
+
+# Payload shared by every event; each test adds what its event carries.
+PAYLOAD = {
+    'installation': {'id': 1},
+    'repository': {'id': 7, 'full_name': 'owner/repo'},
+    'organization': {'login': 'org'},
+    'issue': {'number': 3},
+    'pull_request': {'number': 4},
+    'comment': {'id': 5}
+}
+
+
+@pytest.fixture(scope='module')
+def fake():
+    with fakegithub.FakeGitHub() as instance:
+        yield instance
+
+
+def new_context(fake: fakegithub.FakeGitHub, event: str, action: str = None) -> models.Context:
+    github = models.Github(login_or_token='token', base_url=fake.url)
+    return models.Context(views.new_event(uuid.uuid4(), event, 1, action, dict(PAYLOAD)), github)
+
+
+def test_repo(fake):
+    repo = new_context(fake, 'issues', 'opened').repo
+
+    assert repo.id == 7
+    assert repo.full_name == 'owner/repo'
+
+
+def test_org(fake):
+    assert new_context(fake, 'issues', 'opened').org.login == 'org'
+
+
+def test_default_branch(fake):
+    branch = new_context(fake, 'issues', 'opened').default_branch
+
+    assert branch.name == 'master'
+    assert branch.commit.sha == fakegithub.json_sha('commit', ['refs/heads/master'])
+
+
+def test_issue(fake):
+    assert new_context(fake, 'issues', 'opened').issue.number == 3
+
+
+def test_pull_request(fake):
+    assert new_context(fake, 'pull_request', 'opened').pull_request.number == 4
+
+
+@pytest.mark.parametrize('event', ['commit_comment', 'issue_comment', 'pull_request_review_comment'])
+def test_comment(fake, event):
+    comment = new_context(fake, event, 'created').comment
+
+    assert comment.id == 5
+    assert comment.body == 'Comment 5'
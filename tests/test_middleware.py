@@ -0,0 +1,91 @@
+"""
+    tests/test_middleware
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Tests for how middleware responses stop or continue event processing.
+"""
+import asyncio
+
+import pytest
+
+from probot import models
+from probot.asgi import app as asgi_app
+
+# Event id of the deliveries sent by these tests.
+PUSH = models.new_id('push')
+
+
+def wsgi_deliver(new_app, new_request, middleware, handler):
+    instance = new_app()
+    for function in middleware:
+        instance.register_global_middleware(function)
+    instance.register_handler(PUSH, handler)
+    return instance.on_request(new_request())
+
+
+def asgi_deliver(mocker, new_settings, new_request, middleware, handler):
+    instance = asgi_app.App(mocker.Mock())
+    instance.configure(new_settings(prefetch_token=False))
+
+    def coroutine(function):
+        async def wrapper(context):
+            return function(context)
+        return wrapper
+
+    for function in middleware:
+        instance.register_global_middleware(coroutine(function))
+    instance.register_handler(PUSH, coroutine(handler))
+    return asyncio.run(instance.on_request(new_request()))
+
+
+@pytest.fixture(params=['wsgi', 'asgi'])
+def deliver(request, mocker, new_app, new_settings, new_request):
+    """
+    Send a delivery through an app of each type with the given middleware and handler.
+    """
+    if request.param == 'wsgi':
+        return lambda middleware, handler: wsgi_deliver(new_app, new_request, middleware, handler)
+    return lambda middleware, handler: asgi_deliver(mocker, new_settings, new_request, middleware, handler)
+
+
+def test_middleware_returning_none_continues(deliver):
+    calls = []
+
+    response = deliver([lambda context: calls.append('first'), lambda context: calls.append('second')],
+                       lambda context: calls.append('handler') or models.Response(status_code=202))
+
+    assert calls == ['first', 'second', 'handler']
+    assert response.status_code == 202
+
+
+def test_middleware_response_stops_processing(deliver):
+    calls = []
+    forbidden = models.Response(status_code=403, content='Forbidden')
+
+    response = deliver([lambda context: forbidden, lambda context: calls.append('second')],
+                       lambda context: calls.append('handler'))
+
+    assert calls == []
+    assert response == forbidden
+
+
+def test_middleware_ok_response_stops_processing(deliver):
+    calls = []
+
+    response = deliver([lambda context: models.OK], lambda context: calls.append('handler'))
+
+    assert calls == []
+    assert response == models.OK
+
+
+def test_middleware_error_stops_processing(deliver):
+    calls = []
+
+    def middleware(context):
+        raise RuntimeError('boom')
+
+    response = deliver([middleware], lambda context: calls.append('handler'))
+
+    assert calls == []
+    assert response.status_code == 500
+    assert response.content == 'boom'
@@ -0,0 +1,66 @@
+"""
+    tests/test_models
+    ~~~~~~~~~~~~~~~~~
+
+    Tests for the framework agnostic response types.
+"""
+from typing import Any
+
+import pytest
+from pydantic import BaseModel
+
+from probot import base, models, workers
+
+
+class PydanticResponse(BaseModel):
+    """
+    The pydantic response model `models.Response` replaced.
+    """
+    status_code: int = 200
+    content: str = ''
+    headers: Any = None
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'status_code': 404, 'content': 'missing', 'headers': {'X-A': 'b'}}])
+def test_response_matches_pydantic_model(kwargs):
+    response, expected = models.Response(**kwargs), PydanticResponse(**kwargs)
+
+    assert response.dict() == expected.dict()
+    assert response.json() == expected.json()
+    assert response.copy().dict() == expected.copy().dict()
+    assert response.copy(update={'status_code': 500}).dict() == expected.copy(update={'status_code': 500}).dict()
+
+
+def test_response_copy_is_independent():
+    response = models.Response(status_code=201)
+    copy = response.copy()
+    copy.status_code = 500
+
+    assert response.status_code == 201
+
+
+def test_response_equality_and_hashing():
+    assert models.Response(status_code=202) == models.Response(status_code=202)
+    assert models.Response(status_code=202) != models.Response(status_code=200)
+    assert models.ImmutableResponse(status_code=200) == models.OK
+    assert hash(models.ImmutableResponse(status_code=200)) == hash(models.OK)
+    with pytest.raises(TypeError):
+        hash(models.Response())
+
+
+@pytest.mark.parametrize('response', [models.OK, base.UNHANDLED, base.DUPLICATE, workers.ACCEPTED, workers.REJECTED])
+def test_shared_responses_are_immutable(response):
+    before = response.dict()
+    for name in ('status_code', 'content', 'headers', 'other'):
+        with pytest.raises(AttributeError):
+            setattr(response, name, None)
+
+    assert response.dict() == before
+
+
+def test_shared_response_copy_is_mutable():
+    copy = models.OK.copy()
+    copy.status_code = 500
+
+    assert type(copy) is models.Response
+    assert models.OK.status_code == 200
@@ -0,0 +1,46 @@
+"""
+    tests/test_pool
+    ~~~~~~~~~~~~~~~
+
+    Tests for the shared GitHub API connection pool.
+"""
+from urllib3.util import retry as urllib3_retry
+
+from probot import defaults, pool
+
+
+def adapter(session):
+    return session.get_adapter('https://api.github.com')
+
+
+def test_connection_without_retry_uses_shared_session():
+    connection = pool.PooledHTTPSConnection('api.github.com')
+
+    assert pool.POOL.session_for(connection.retry) is pool.POOL.session
+
+
+def test_connection_keeps_retry_configuration():
+    retry = urllib3_retry.Retry(total=3, backoff_factor=0.5)
+    connection = pool.PooledHTTPSConnection('api.github.com', retry=retry)
+    session = pool.POOL.session_for(connection.retry)
+
+    assert session is not pool.POOL.session
+    assert adapter(session).max_retries is retry
+    assert pool.POOL.session_for(retry) is session
+
+
+def test_retry_count_sets_max_retries():
+    session = pool.ConnectionPool(size=2).session_for(5)
+
+    assert adapter(session).max_retries.total == 5
+    assert adapter(session)._pool_maxsize == 2
+
+
+def test_retry_sessions_are_bounded():
+    instance = pool.ConnectionPool()
+    first = instance.session_for(1)
+    for count in range(2, defaults.HTTP_RETRY_SESSIONS + 2):
+        instance.session_for(count)
+
+    assert len(instance._retry_sessions) == defaults.HTTP_RETRY_SESSIONS
+    assert instance.session_for(1) is not first
@@ -0,0 +1,72 @@
+"""
+    tests/test_replay
+    ~~~~~~~~~~~~~~~~~
+
+    Tests for replaying recorded webhook deliveries.
+"""
+import gc
+import gzip
+import json
+import sys
+import types
+import warnings
+
+import pytest
+
+from probot import replay
+
+flask_app = pytest.importorskip('flask')
+
+from probot.wsgi import flask  # noqa: E402
+
+
+@pytest.fixture
+def recording(tmp_path, new_request):
+    """
+    Factory writing a JSONL recording of the given requests, optionally overriding headers of each.
+    """
+    def factory(requests, compress=False, **headers):
+        path = tmp_path / ('recording.jsonl.gz' if compress else 'recording.jsonl')
+        lines = ''.join(json.dumps({'headers': {**request.headers, **headers},
+                                    'body': request.body_raw.decode('utf-8')}) + '\n' for request in requests)
+        with (gzip.open(path, 'wt') if compress else open(path, 'w')) as f:
+            f.write(lines)
+        return str(path)
+    return factory
+
+
+@pytest.fixture
+def target(monkeypatch, new_settings):
+    """
+    Register a flask probot importable as `replay_target:probot`.
+    """
+    module = types.ModuleType('replay_target')
+    module.probot = flask.Probot(flask_app.Flask('replay'), new_settings())
+    module.probot.on('push')(lambda context: None)
+    monkeypatch.setitem(sys.modules, 'replay_target', module)
+    return 'replay_target:probot'
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_read_deliveries_closes_recording(recording, new_request, compress):
+    request = new_request()
+    path = recording([request], compress)
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        deliveries = list(replay.read_deliveries(path))
+        gc.collect()
+
+    assert [delivery.body for delivery in deliveries] == [request.body_raw]
+    assert not [warning for warning in caught if issubclass(warning.category, ResourceWarning)]
+
+
+def test_main_succeeds_when_all_deliveries_accepted(target, recording, new_request):
+    assert replay.main([target, recording([new_request(), new_request()], compress=True)]) == 0
+
+
+def test_main_fails_when_any_delivery_rejected(target, recording, new_request):
+    accepted = recording([new_request()], compress=True)
+    rejected = recording([new_request()], **{'X-Hub-Signature-256': 'sha256=' + '0' * 64})
+
+    assert replay.main([target, accepted, rejected]) == 1
@@ -0,0 +1,174 @@
+"""
+    tests/test_spool
+    ~~~~~~~~~~~~~~~~
+
+    Tests for the delivery spool and how apps replay it and mark deliveries done.
+"""
+import os
+import threading
+from typing import List
+
+from probot import models, spool, workers
+
+# Event id of the deliveries sent by these tests.
+PUSH = models.new_id('push')
+
+
+def spool_path(tmp_path) -> str:
+    return os.path.join(str(tmp_path), 'spool.db')
+
+
+def leftover(tmp_path) -> List[spool.SpoolEntry]:
+    """
+    Get the deliveries the next run would replay.
+    """
+    return list(spool.Spool(spool_path(tmp_path)).pending())
+
+
+def test_spool_pending_until_done(tmp_path, new_request):
+    journal = spool.Spool(spool_path(tmp_path))
+    request = new_request()
+    key = journal.append(request).result()
+    journal.append(new_request()).result()
+    assert list(journal.pending()) == []
+
+    journal = spool.Spool(spool_path(tmp_path))
+    entries = list(journal.pending())
+    assert [entry.delivery_id for entry in entries][0] == request.headers['X-GitHub-Delivery']
+    assert entries[0].key == key
+    assert entries[0].body == request.body_raw
+    assert entries[0].to_request().headers['X-GitHub-Event'] == 'push'
+
+    journal.done(key)
+    journal.close()
+    assert [entry.key for entry in journal.pending()] == [key + 1]
+
+
+def test_processed_delivery_is_done(tmp_path, new_app, new_request):
+    instance = new_app(spool_path=spool_path(tmp_path))
+    instance.register_handler(PUSH, lambda context: None)
+
+    response = instance.on_request(new_request())
+    instance.spool.close()
+
+    assert response.status_code == 200
+    assert leftover(tmp_path) == []
+
+
+def test_failed_delivery_is_done(tmp_path, new_app, new_request):
+    def handler(context):
+        raise RuntimeError('boom')
+
+    instance = new_app(spool_path=spool_path(tmp_path))
+    instance.register_handler(PUSH, handler)
+
+    response = instance.on_request(new_request())
+    instance.spool.close()
+
+    assert response.status_code == 500
+    assert leftover(tmp_path) == []
+
+
+def test_unhandled_action_is_done(tmp_path, new_app, new_request):
+    instance = new_app(spool_path=spool_path(tmp_path))
+    instance.register_handler(models.new_id('pull_request.opened'), lambda context: None)
+
+    instance.on_request(new_request('pull_request', 'closed'))
+    instance.spool.close()
+
+    assert leftover(tmp_path) == []
+
+
+def test_rejected_delivery_is_done(tmp_path, new_app, new_request):
+    started, release = threading.Event(), threading.Event()
+
+    def handler(context):
+        started.set()
+        release.wait(5)
+
+    instance = new_app(spool_path=spool_path(tmp_path), background_workers=1, background_queue_size=1)
+    instance.register_handler(PUSH, handler)
+
+    assert instance.on_request(new_request()) is workers.ACCEPTED
+    assert started.wait(5)
+    assert instance.on_request(new_request()) is workers.ACCEPTED
+    rejected = new_request()
+    assert instance.on_request(rejected) is workers.REJECTED
+
+    instance.spool.close()
+    pending = [entry.delivery_id for entry in leftover(tmp_path)]
+    assert rejected.headers['X-GitHub-Delivery'] not in pending
+    assert len(pending) == 2
+
+    release.set()
+    instance.on_lifecycle_event(models.LifecycleEvent.Shutdown)
+    assert leftover(tmp_path) == []
+
+
+def test_pending_deliveries_replayed_on_startup(tmp_path, new_app, new_request):
+    journal = spool.Spool(spool_path(tmp_path))
+    requests = [new_request(), new_request()]
+    for request in requests:
+        journal.append(request).result()
+    journal.close()
+
+    replayed = []
+    instance = new_app(spool_path=spool_path(tmp_path))
+    instance.register_handler(PUSH, lambda context: replayed.append(str(context.event.delivery_id)))
+
+    instance.on_lifecycle_event(models.LifecycleEvent.Startup)
+    instance.spool_replay.join(5)
+    instance.on_lifecycle_event(models.LifecycleEvent.Shutdown)
+
+    assert replayed == [request.headers['X-GitHub-Delivery'] for request in requests]
+    assert leftover(tmp_path) == []
+
+
+def test_replay_stops_on_shutdown(tmp_path, new_app, new_request):
+    journal = spool.Spool(spool_path(tmp_path))
+    for _ in range(3):
+        journal.append(new_request()).result()
+    journal.close()
+
+    replayed = []
+    instance = new_app(spool_path=spool_path(tmp_path))
+    instance.register_handler(PUSH, lambda context: replayed.append(context.event.delivery_id))
+    instance.stopping.set()
+
+    instance.on_lifecycle_event(models.LifecycleEvent.Startup)
+    instance.on_lifecycle_event(models.LifecycleEvent.Shutdown)
+
+    assert replayed == []
+    assert len(leftover(tmp_path)) == 3
+
+
+def test_live_delivery_not_replayed(tmp_path, new_app, new_request):
+    journal = spool.Spool(spool_path(tmp_path))
+    left = new_request()
+    journal.append(left).result()
+    journal.close()
+
+    started, release = threading.Event(), threading.Event()
+    handled = []
+
+    def handler(context):
+        handled.append(str(context.event.delivery_id))
+        if len(handled) == 1:
+            started.set()
+            release.wait(5)
+
+    instance = new_app(spool_path=spool_path(tmp_path))
+    instance.register_handler(PUSH, handler)
+    live = new_request()
+    thread = threading.Thread(target=instance.on_request, args=(live,))
+    thread.start()
+    assert started.wait(5)
+
+    instance.on_lifecycle_event(models.LifecycleEvent.Startup)
+    instance.spool_replay.join(5)
+    release.set()
+    thread.join(5)
+    instance.on_lifecycle_event(models.LifecycleEvent.Shutdown)
+
+    assert sorted(handled) == sorted([live.headers['X-GitHub-Delivery'], left.headers['X-GitHub-Delivery']])
+    assert leftover(tmp_path) == []
@@ -0,0 +1,122 @@
+"""
+    tests/test_views
+    ~~~~~~~~~~~~~~~~
+
+    Tests for the lazily materialised payload views.
+"""
+import copy
+import pickle
+import uuid
+
+import pytest
+
+from probot import models, views
+
+# Payload shaped like a pull_request webhook body.
+PAYLOAD = {
+    'number': 5,
+    'installation': {'id': 10},
+    'repository': {'id': 7, 'full_name': 'owner/repo', 'owner': {'login': 'owner'}},
+    'pull_request': {
+        'number': 5,
+        'draft': False,
+        'body': None,
+        'labels': [{'name': 'bug'}, {'name': 'help wanted'}],
+        '_links': {'self': {'href': 'https://api.github.com/repos/owner/repo/pulls/5'}}
+    },
+    'sender': {'login': 'dependabot[bot]', 'type': 'Bot'}
+}
+
+# Dotted paths handlers commonly read.
+PATHS = [
+    'number',
+    'installation.id',
+    'repository.id',
+    'repository.full_name',
+    'repository.owner.login',
+    'pull_request.draft',
+    'pull_request.body',
+    'sender.type',
+    'missing',
+    'installation.missing',
+    'number.missing'
+]
+
+
+@pytest.fixture
+def view() -> views.ObjectView:
+    return views.ObjectView(copy.deepcopy(PAYLOAD))
+
+
+@pytest.mark.parametrize('path', PATHS)
+def test_dotted_get_matches_ghwht(view, path):
+    event = models.new_event(uuid.uuid4(), 'pull_request', 1, 'opened', copy.deepcopy(PAYLOAD))
+
+    assert view.get(path) == event.payload.get(path)
+    assert view.get(path, 'default') == event.payload.get(path, 'default')
+
+
+def test_attribute_access(view):
+    assert view.number == 5
+    assert view.repository.owner.login == 'owner'
+    assert view.pull_request.body is None
+    assert [label.name for label in view.pull_request.labels] == ['bug', 'help wanted']
+    assert view.pull_request.labels[-1].name == 'help wanted'
+    assert view.pull_request._links.self.href.endswith('/pulls/5')
+    assert view['repository']['full_name'] == 'owner/repo'
+    with pytest.raises(AttributeError):
+        view.missing
+
+
+def test_nested_views_are_cached(view):
+    assert view.repository is view.repository
+    assert view.pull_request.labels[0] is view.pull_request.labels[0]
+
+
+def test_nested_values_only_wrapped_on_access(view):
+    view.number
+
+    assert view._views is None
+
+
+@pytest.mark.parametrize('clone', [copy.copy, copy.deepcopy, lambda value: pickle.loads(pickle.dumps(value))])
+def test_views_can_be_copied(view, clone):
+    view.repository
+    cloned = clone(view)
+
+    assert cloned.to_dict() == PAYLOAD
+    assert cloned.repository.owner.login == 'owner'
+    assert clone(view.pull_request.labels)[1].name == 'help wanted'
+
+
+def test_uninitialised_view_has_no_attributes():
+    view = views.ObjectView.__new__(views.ObjectView)
+
+    with pytest.raises(AttributeError):
+        view.anything
+    with pytest.raises(AttributeError):
+        view._data
+
+
+def test_event_interface(view):
+    event = views.new_event(uuid.uuid4(), 'pull_request', 1, 'opened', view.to_dict())
+
+    assert event.name == 'pull_request'
+    assert event.action == 'opened'
+    assert event.payload.get('installation.id') == 10
+
+
+@pytest.mark.parametrize('event_id, revoked', [
+    ('installation.deleted', True),
+    ('installation.suspend', True),
+    ('github_app_authorization.revoked', True),
+    ('installation.created', False),
+    ('installation.unsuspend', False),
+    ('pull_request.opened', False),
+    ('push', False)
+])
+def test_is_access_revoked(event_id, revoked):
+    name, _, action = event_id.partition('.')
+    event = views.new_event(uuid.uuid4(), name, 1, action or None, {})
+
+    assert views.is_access_revoked(event) is revoked
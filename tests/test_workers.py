@@ -0,0 +1,98 @@
+"""
+    tests/test_workers
+    ~~~~~~~~~~~~~~~~~~
+
+    Tests for the background worker pools and how apps reject events when they are full.
+"""
+import asyncio
+import threading
+
+from probot import models, workers
+from probot.asgi import workers as asgi_workers
+from probot.wsgi import workers as wsgi_workers
+
+# Event id of the deliveries sent by these tests.
+PUSH = models.new_id('push')
+
+
+def queue_depth() -> float:
+    return workers.QUEUE_DEPTH.labels().value
+
+
+def rejected_total() -> float:
+    return workers.QUEUE_REJECTED.labels().value
+
+
+def test_thread_pool_rejects_when_full(mocker):
+    started, release = threading.Event(), threading.Event()
+    processed = []
+
+    def process(event, spool_key):
+        started.set()
+        release.wait(5)
+        processed.append(event)
+
+    depth, rejected = queue_depth(), rejected_total()
+    pool = wsgi_workers.WorkerPool(process, size=1, queue_size=1)
+    first, second, third = mocker.Mock(), mocker.Mock(), mocker.Mock()
+
+    assert pool.acknowledge(first) is workers.ACCEPTED
+    assert started.wait(5)
+    assert pool.acknowledge(second) is workers.ACCEPTED
+    assert pool.acknowledge(third) is workers.REJECTED
+    assert queue_depth() == depth + 1
+    assert rejected_total() == rejected + 1
+
+    release.set()
+    pool.stop()
+    assert processed == [first, second]
+    assert queue_depth() == depth
+
+
+def test_asyncio_pool_rejects_when_full(mocker):
+    processed = []
+
+    async def process(event, spool_key):
+        processed.append(event)
+
+    async def run():
+        pool = asgi_workers.WorkerPool(process, size=1, queue_size=1)
+        first, second = mocker.Mock(), mocker.Mock()
+
+        assert pool.acknowledge(first) is workers.ACCEPTED
+        assert pool.acknowledge(second) is workers.REJECTED
+        assert queue_depth() == depth + 1
+        assert rejected_total() == rejected + 1
+
+        await pool.stop()
+        assert processed == [first]
+
+    depth, rejected = queue_depth(), rejected_total()
+    asyncio.run(run())
+    assert queue_depth() == depth
+
+
+def test_rejected_delivery_is_processed_when_redelivered(new_app, new_request):
+    started, release = threading.Event(), threading.Event()
+    handled = []
+
+    def handler(context):
+        started.set()
+        release.wait(5)
+        handled.append(str(context.event.delivery_id))
+
+    instance = new_app(dedup_backend='memory', background_workers=1, background_queue_size=1)
+    instance.register_handler(PUSH, handler)
+
+    instance.on_request(new_request())
+    assert started.wait(5)
+    instance.on_request(new_request())
+    rejected = new_request()
+    assert instance.on_request(rejected) is workers.REJECTED
+
+    release.set()
+    instance.workers.stop()
+    delivery_id = rejected.headers['X-GitHub-Delivery']
+    assert instance.on_request(new_request(delivery_id=delivery_id)) is workers.ACCEPTED
+    instance.workers.stop()
+    assert handled[-1] == delivery_id